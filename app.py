@@ -5,7 +5,8 @@ Emar Delivery Arabic App - Flask Backend
 شركة إعمار لتوصيل الطلبات
 """
 
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, send_file
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, send_file, Response, stream_with_context, g
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
@@ -13,17 +14,39 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
 import json
+import logging
 import uuid
-from datetime import datetime
+import time
+from datetime import datetime, date, timedelta
 import os
 import sys
 import mimetypes
+import re
+import types
+import queue
+import threading
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 import shutil
+import zipfile
+import mmap
+import orjson
 # import magic  # Temporarily commented out due to libmagic installation issue
 # TODO: Install python-magic for better file type validation
 # Alternative: Use mimetypes.guess_type() for basic validation (currently implemented)
 import hashlib
+import heapq
+try:
+    import puremagic  # Pure-Python content sniffing; no libmagic needed
+    HAS_PUREMAGIC = True
+except ImportError:
+    HAS_PUREMAGIC = False
+try:
+    from blake3 import blake3  # SIMD hash, several times faster than SHA-256
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +57,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 # Import utilities
 from auth import auth_manager, login_required, admin_required
 from event_logger import event_logger, log_create, log_update, log_delete, log_view, log_action
+from json_store import json_store
+from search_index import search_index, document_search_index
+from commissions import commission_calculator
+from payroll import payroll_calculator
 
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'emar-delivery-secret-key-2025-fallback')
@@ -43,6 +70,15 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'emar-delivery-secret-key-2025-fa
 is_production = os.getenv('FLASK_ENV', 'development') == 'production'
 use_https = os.getenv('FLASK_USE_HTTPS', 'False').lower() == 'true'
 
+# Lazy %s-style logging instead of print: at WARNING level (production)
+# the debug/info calls skip formatting and I/O entirely
+logging.basicConfig(
+    level=logging.WARNING if is_production else logging.DEBUG,
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+    force=True
+)
+logger = logging.getLogger(__name__)
+
 app.config.update(
     SESSION_COOKIE_SECURE=use_https,  # Enable for HTTPS in production
     SESSION_COOKIE_HTTPONLY=True,
@@ -68,7 +104,12 @@ limiter = Limiter(
         os.getenv('RATELIMIT_DEFAULT', '1000 per hour'),
         "1000 per minute"  # Increased from 300 to 1000 for development testing
     ],
+    # memory:// keeps per-worker counters; point RATELIMIT_STORAGE_URL at
+    # Redis (see docker-compose.yml) so limits are enforced across workers
     storage_uri=os.getenv('RATELIMIT_STORAGE_URL', 'memory://'),
+    # Fixed windows allow up to 2x bursts at window boundaries; the moving
+    # window strategy smooths that out (supported by memory and Redis storage)
+    strategy='moving-window',
     headers_enabled=True,
     swallow_errors=True  # Don't break app if rate limiting fails
 )
@@ -104,6 +145,13 @@ csp = {
     'connect-src': "'self'"
 }
 
+# Flatten the CSP dict once at startup; handing Talisman a preformatted
+# string avoids rebuilding the header on every response
+CSP_HEADER = '; '.join(
+    f"{directive} {' '.join(value) if isinstance(value, list) else value}"
+    for directive, value in csp.items()
+)
+
 # Initialize security headers with Talisman
 talisman = Talisman(
     app,
@@ -111,7 +159,7 @@ talisman = Talisman(
     strict_transport_security=False, # Disabled for development mode to prevent connection errors
     strict_transport_security_max_age=31536000,  # 1 year
     frame_options=None,  # Disable X-Frame-Options to allow embedding previews
-    content_security_policy=csp,
+    content_security_policy=CSP_HEADER,
     # Removed content_security_policy_nonce_in to fix CSP violations with dynamic styles
     feature_policy={
         'geolocation': "'none'",
@@ -124,42 +172,74 @@ talisman = Talisman(
 app.config['JSON_AS_ASCII'] = False
 app.config['JSONIFY_MIMETYPE'] = "application/json; charset=utf-8"
 
-# Session timeout middleware
-@app.before_request
-def check_session_timeout():
-    """Check if session has expired and handle timeout"""
-    from datetime import datetime, timedelta
-
-    # Skip session check for static files and login endpoints
-    if (request.endpoint and
-        (request.endpoint.startswith('static') or
-         request.endpoint in ['index', 'get_csrf_token'] or
-         request.path in ['/api/login', '/api/csrf-token'])):
-        return
+# Hand document downloads to the front server (nginx/apache) via
+# X-Sendfile when one is configured; send_file then emits only headers
+# and the front server streams the bytes with sendfile(2). Without a
+# front server, werkzeug still uses the WSGI file wrapper on the open
+# file send_file gets from a path.
+app.config['USE_X_SENDFILE'] = os.getenv('FLASK_USE_X_SENDFILE', 'False').lower() == 'true'
 
-    # Check if user is logged in
-    if 'user_id' in session:
-        # Check session timeout
-        last_activity = session.get('last_activity')
-        if last_activity:
-            last_activity_time = datetime.fromisoformat(last_activity)
-            timeout_duration = timedelta(seconds=app.config['PERMANENT_SESSION_LIFETIME'])
-
-            if datetime.now() - last_activity_time > timeout_duration:
-                # Session expired
-                session.clear()
-                if request.is_json:
-                    return jsonify({
-                        'success': False,
-                        'error': 'انتهت صلاحية الجلسة. يرجى تسجيل الدخول مرة أخرى.',
-                        'session_expired': True
-                    }), 401
-                else:
-                    return redirect(url_for('index'))
+# nginx variant of the same handoff: when set (e.g. '/protected_files'),
+# download responses carry an X-Accel-Redirect header pointing into an
+# internal nginx location that aliases the uploads directory
+app.config['ACCEL_REDIRECT_BASE'] = os.getenv('FLASK_ACCEL_REDIRECT_BASE', '').rstrip('/')
+
+class ORJSONProvider(JSONProvider):
+    """App-wide JSON provider backed by orjson
+
+    Routes every jsonify/request.get_json through orjson, which
+    serializes Arabic text straight to UTF-8 bytes several times
+    faster than the stdlib encoder with its ensure_ascii escaping.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand the orjson bytes to the response directly instead of
+        # taking the str round trip through dumps
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype='application/json'
+        )
+
+app.json = ORJSONProvider(app)
+
+def fast_jsonify(obj, status=200):
+    """jsonify replacement backed by orjson for large response bodies
+
+    orjson serializes straight to UTF-8 bytes several times faster than
+    the stdlib encoder, which matters for endpoints returning many
+    records (search results, events, backup listings).
+    """
+    return app.response_class(
+        orjson.dumps(obj),
+        status=status,
+        mimetype='application/json; charset=utf-8'
+    )
+
+# Bodies of the fixed Arabic error responses, serialized once; the
+# frequent 404/400 paths then skip a dict alloc + json.dumps per hit
+_STATIC_ERROR_CACHE = {}
+
+def static_error(message, status):
+    """Response for a fixed error message, serialized once and reused
 
-        # Update last activity time
-        session['last_activity'] = datetime.now().isoformat()
-        session.permanent = True
+    استجابة خطأ ثابتة يتم تجهيزها مرة واحدة وإعادة استخدامها
+    """
+    key = (message, status)
+    cached = _STATIC_ERROR_CACHE.get(key)
+    if cached is None:
+        cached = _STATIC_ERROR_CACHE[key] = (
+            json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'),
+            status,
+            {'Content-Type': 'application/json; charset=utf-8'}
+        )
+    return app.response_class(*cached)
 
 # Ensure data directory exists
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
@@ -181,18 +261,27 @@ VEHICLES_DOCS_DIR = os.path.join(DOCUMENTS_DIR, 'vehicles')
 COMPANIES_DOCS_DIR = os.path.join(DOCUMENTS_DIR, 'companies')
 OTHER_DOCS_DIR = os.path.join(DOCUMENTS_DIR, 'other')
 
+# Absolute forms resolved once; the per-file security checks compare
+# against these instead of re-running abspath (and its getcwd) per call
+UPLOADS_ABS = os.path.abspath(UPLOADS_DIR)
+DOCUMENTS_ABS = os.path.abspath(DOCUMENTS_DIR)
+BASE_DOCS_ABS_DIRS = frozenset(
+    os.path.abspath(d) for d in (DRIVERS_DOCS_DIR, VEHICLES_DOCS_DIR,
+                                 COMPANIES_DOCS_DIR, OTHER_DOCS_DIR)
+)
+
 # Create secure upload directories with restricted permissions
 for directory in [SECURE_UPLOADS_BASE, UPLOADS_DIR, DOCUMENTS_DIR, DRIVERS_DOCS_DIR, VEHICLES_DOCS_DIR, COMPANIES_DOCS_DIR, OTHER_DOCS_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory, mode=0o750)  # More restrictive permissions
-        print(f"[OK] Created secure upload directory: {directory}")
+        logger.info("Created secure upload directory: %s", directory)
         
         # Create .gitkeep file to ensure directory is tracked in git
         if directory in [DRIVERS_DOCS_DIR, VEHICLES_DOCS_DIR, COMPANIES_DOCS_DIR, OTHER_DOCS_DIR]:
             gitkeep_path = os.path.join(directory, '.gitkeep')
             with open(gitkeep_path, 'w') as f:
                 f.write("# Keep this directory in git\n")
-            print(f"[INFO] Created .gitkeep in: {directory}")
+            logger.info("Created .gitkeep in: %s", directory)
 
 # Add .htaccess file to prevent direct web access (if using Apache)
 htaccess_path = os.path.join(SECURE_UPLOADS_BASE, '.htaccess')
@@ -200,14 +289,15 @@ if not os.path.exists(htaccess_path):
     try:
         with open(htaccess_path, 'w') as f:
             f.write("Deny from all\n")
-        print(f"[OK] Created .htaccess protection: {htaccess_path}")
+        logger.info("Created .htaccess protection: %s", htaccess_path)
     except Exception as e:
-        print(f"[WARN] Could not create .htaccess: {e}")
+        logger.warning("Could not create .htaccess: %s", e)
 
 # Documents upload configuration
-ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.webp', '.docx', '.xlsx'}
+# Immutable on purpose: checked on every upload and never mutated at runtime
+ALLOWED_EXTENSIONS = frozenset({'.pdf', '.jpg', '.jpeg', '.png', '.webp', '.docx', '.xlsx'})
 MAX_FILE_SIZE = 15 * 1024 * 1024  # 15MB in bytes
-ALLOWED_MIME_TYPES = {
+ALLOWED_MIME_TYPES = types.MappingProxyType({
     '.pdf': 'application/pdf',
     '.jpg': 'image/jpeg',
     '.jpeg': 'image/jpeg',
@@ -215,9 +305,35 @@ ALLOWED_MIME_TYPES = {
     '.webp': 'image/webp',
     '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
     '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-}
+})
+
+# MIME values content sniffing may legitimately report per extension;
+# docx/xlsx are ZIP containers, so a plain zip MIME from the header is
+# expected
+_ZIP_MIMES = ('application/zip', 'application/x-zip-compressed')
+ACCEPTABLE_MIME_TYPES = types.MappingProxyType({
+    '.pdf': frozenset({'application/pdf'}),
+    '.jpg': frozenset({'image/jpeg'}),
+    '.jpeg': frozenset({'image/jpeg'}),
+    '.png': frozenset({'image/png'}),
+    '.webp': frozenset({'image/webp'}),
+    '.docx': frozenset({ALLOWED_MIME_TYPES['.docx'], *_ZIP_MIMES}),
+    '.xlsx': frozenset({ALLOWED_MIME_TYPES['.xlsx'], *_ZIP_MIMES}),
+})
+
+def guess_mime_type(filename):
+    """Resolve a filename's MIME type from the allowed-extension table
+
+    One dict lookup for the extensions this app accepts; mimetypes is
+    only consulted for anything outside that set (e.g. legacy stored
+    files served for download).
+    """
+    mime = ALLOWED_MIME_TYPES.get(os.path.splitext(filename)[1].lower())
+    if mime:
+        return mime
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
 
-DOCUMENT_CATEGORIES = {
+DOCUMENT_CATEGORIES = types.MappingProxyType({
     'id_copy': 'نسخة الهوية',
     'license': 'رخصة القيادة',
     'insurance': 'تأمين المركبة',
@@ -227,7 +343,267 @@ DOCUMENT_CATEGORIES = {
     'receipt': 'إيصال',
     'certificate': 'شهادة',
     'other': 'أخرى'
-}
+})
+
+# In-memory cache for parsed JSON collections used by read-heavy endpoints
+# (search, dashboard). Keyed by file path and invalidated whenever the file's
+# mtime or size changes, so writes through json_store are picked up immediately.
+_collection_cache = {}
+
+def cached_read_all(collection):
+    """Read a collection through an mtime-keyed in-memory cache
+
+    Cache hits return the same list object without touching the disk, so
+    callers must treat the result as read-only and never mutate records
+    in place.
+    """
+    file_path = json_store._get_file_path(collection)
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        _collection_cache.pop(file_path, None)
+        return []
+
+    cache_key = (st.st_mtime_ns, st.st_size)
+    cached = _collection_cache.get(file_path)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    data = json_store.read_all(collection)
+    _collection_cache[file_path] = (cache_key, data)
+    return data
+
+# Per-collection {record[key]: record} lookups, invalidated with the
+# collection cache above
+_index_cache = {}
+
+def cached_index(collection, key='id'):
+    """Get a {record[key]: record} lookup dict through the mtime cache
+
+    Rebuilt only when the underlying collection list changes; the same
+    read-only contract as cached_read_all applies.
+    """
+    data = cached_read_all(collection)
+    cached = _index_cache.get((collection, key))
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    index = {record[key]: record for record in data if key in record}
+    _index_cache[(collection, key)] = (data, index)
+    return index
+
+# Monthly orders are stored in per-year shard files
+# (monthly_orders_<year>.json), so a month/year query parses one year's
+# worth of records instead of the whole history. {month: [orders]}
+# indexes per shard, rebuilt only when that shard's file changes.
+_month_index_cache = {}
+
+def monthly_orders_for(month, year):
+    """Get monthly orders for one (month, year) via the cached shard index
+
+    Same read-only contract as cached_read_all: callers must not mutate
+    the returned records.
+    """
+    shard = json_store.shard_collection('monthly_orders', year)
+    orders = cached_read_all(shard)
+    cached = _month_index_cache.get(shard)
+    if cached is not None and cached[0] is orders:
+        index = cached[1]
+    else:
+        index = {}
+        for order in orders:
+            index.setdefault(order.get('month'), []).append(order)
+        _month_index_cache[shard] = (orders, index)
+    return index.get(month, [])
+
+# Documents grouped per (entity_type, entity_id), rebuilt only when the
+# documents file changes, so entity pages pull their slice from a dict
+# instead of rescanning the whole collection per request
+_entity_docs_cache = [None, None]
+
+def documents_for_entity(entity_type, entity_id):
+    """Get a (read-only) list of one entity's documents via the cache"""
+    docs = cached_read_all('documents')
+    if _entity_docs_cache[0] is not docs:
+        index = defaultdict(list)
+        for doc in docs:
+            index[(doc.get('entity_type'), doc.get('entity_id'))].append(doc)
+        _entity_docs_cache[0] = docs
+        _entity_docs_cache[1] = index
+    return _entity_docs_cache[1].get((entity_type, entity_id), [])
+
+# Dashboard stats for the documents collection, recomputed when the
+# underlying list changes or the 5-minute bucket rolls over (the
+# recent-upload counts are relative to now, so they drift with time)
+_documents_stats_cache = [None, None, None]
+
+def cached_document_stats():
+    """calculate_document_stats over the cached documents collection"""
+    docs = cached_read_all('documents')
+    bucket = int(time.time() // 300)
+    if _documents_stats_cache[0] is not docs or _documents_stats_cache[2] != bucket:
+        _documents_stats_cache[0] = docs
+        _documents_stats_cache[1] = calculate_document_stats(docs)
+        _documents_stats_cache[2] = bucket
+    return _documents_stats_cache[1]
+
+# Orders bucketed by (year, month), with each order_date parsed once
+# at index build instead of once per dashboard view; the KPI
+# aggregates per month are folded in during the same pass
+_orders_month_cache = [None, None, None]
+
+def _rebuild_orders_month_index():
+    """(Re)build the month buckets and per-month KPI aggregates"""
+    orders = cached_read_all('orders')
+    if _orders_month_cache[0] is orders:
+        return
+
+    index = defaultdict(list)
+    aggregates = defaultdict(lambda: [0, 0.0])
+    for order in orders:
+        order_date = order.get('order_date', order.get('created_at', ''))
+        if not order_date:
+            continue
+        try:
+            # Handle both ISO datetime and date-only formats
+            if 'T' in order_date:
+                order_date_obj = datetime.fromisoformat(order_date.replace('Z', '+00:00'))
+            else:
+                order_date_obj = datetime.strptime(order_date, '%Y-%m-%d')
+        except (ValueError, TypeError):
+            continue
+        key = (order_date_obj.year, order_date_obj.month)
+        index[key].append(order)
+        aggregate = aggregates[key]
+        aggregate[0] += 1
+        if order.get('status') == 'completed':
+            aggregate[1] += float(order.get('commission_amount', 0))
+
+    _orders_month_cache[0] = orders
+    _orders_month_cache[1] = index
+    _orders_month_cache[2] = aggregates
+
+def orders_for_month(year, month):
+    """Get one month's orders via the cached (year, month) index"""
+    _rebuild_orders_month_index()
+    return _orders_month_cache[1].get((year, month), [])
+
+def order_month_aggregates(year, month):
+    """Get (order_count, completed_commission_sum) for one month"""
+    _rebuild_orders_month_index()
+    aggregate = _orders_month_cache[2].get((year, month))
+    return (aggregate[0], aggregate[1]) if aggregate else (0, 0.0)
+
+# Fully-computed dashboard payloads, preserialized with orjson and
+# keyed by the month window plus the mtimes of every source file the
+# KPIs read, so repeat views between writes return cached bytes
+_dashboard_cache = OrderedDict()
+_DASHBOARD_CACHE_MAX = 64
+
+def _dashboard_cache_key(year, month):
+    """Cache key covering the month window and all KPI source files"""
+    sources = (
+        'orders', 'advances', 'maintenance_schedules',
+        'drivers', 'clients', 'commission_rules', 'config',
+        json_store.shard_collection('monthly_orders', year),
+    )
+    stamps = []
+    for collection in sources:
+        try:
+            stamps.append(os.stat(json_store._get_file_path(collection)).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    # The due-maintenance KPI compares against today, so the key also
+    # rolls over at midnight
+    return (year, month, date.today().isoformat(), tuple(stamps))
+
+# Advances with an unpaid balance, pre-filtered once per collection
+# change for the dashboard's outstanding-advances KPI
+_unpaid_advances_cache = [None, None]
+
+def unpaid_advances():
+    """Get the pending/partial advances via the cached filter"""
+    advances = cached_read_all('advances')
+    if _unpaid_advances_cache[0] is not advances:
+        _unpaid_advances_cache[0] = advances
+        _unpaid_advances_cache[1] = [
+            advance for advance in advances
+            if advance.get('status') in ('pending', 'partial')
+        ]
+    return _unpaid_advances_cache[1]
+
+# Expired/expiring-soon counts per entity page, reused while the
+# entity's document list is unchanged and the minute bucket holds
+# (the counts compare against now, so they can move once a minute)
+_entity_expiry_cache = {}
+
+def entity_expiry_counts(entity_type, entity_id, documents):
+    """Count expired and expiring-within-30-days documents"""
+    if not documents:
+        return 0, 0
+
+    bucket = int(time.time() // 60)
+    key = (entity_type, entity_id)
+    cached = _entity_expiry_cache.get(key)
+    if cached is not None and cached[0] is documents and cached[1] == bucket:
+        return cached[2]
+
+    now = datetime.now()
+    now_iso = now.isoformat()
+    cutoff_iso = (now + timedelta(days=30)).isoformat()
+
+    expired_count = 0
+    expiring_soon = 0
+    for doc in documents:
+        expiry_date = doc.get('expiry_date')
+        if expiry_date and _DATE_SHAPE_RE.match(expiry_date):
+            if expiry_date < now_iso:
+                expired_count += 1
+            elif expiry_date <= cutoff_iso:
+                expiring_soon += 1
+
+    if len(_entity_expiry_cache) > 4096:
+        _entity_expiry_cache.clear()
+    _entity_expiry_cache[key] = (documents, bucket, (expired_count, expiring_soon))
+    return expired_count, expiring_soon
+
+def find_monthly_order(order_id):
+    """Find a monthly order across year shards
+
+    Returns (shard_collection, record); (None, None) when not found.
+    """
+    for year in json_store.list_shards('monthly_orders'):
+        shard = json_store.shard_collection('monthly_orders', year)
+        record = json_store.find_by_id(shard, order_id)
+        if record:
+            return shard, record
+    return None, None
+
+def _migrate_monthly_order_shards():
+    """One-time split of the legacy monthly_orders.json into year shards"""
+    try:
+        legacy = json_store.read_all('monthly_orders')
+        if not legacy:
+            return
+
+        by_year = defaultdict(list)
+        for order in legacy:
+            by_year[order.get('year') or 0].append(order)
+
+        for year, orders in by_year.items():
+            shard = json_store.shard_collection('monthly_orders', year)
+            existing = json_store.read_all(shard)
+            existing_ids = {o.get('id') for o in existing}
+            existing.extend(o for o in orders if o.get('id') not in existing_ids)
+            json_store.write_all(shard, existing)
+
+        # Empty the legacy file so nothing is served twice
+        json_store.write_all('monthly_orders', [])
+        logger.info("Migrated %s monthly orders into %s year shards", len(legacy), len(by_year))
+    except Exception as e:
+        logger.warning("Monthly-orders shard migration failed: %s", e)
+
+_migrate_monthly_order_shards()
 
 def calculate_registration_status(insurance_expiry_date):
     """Calculate registration status based on insurance expiry date"""
@@ -235,16 +611,16 @@ def calculate_registration_status(insurance_expiry_date):
         return 'غير محدد'
 
     try:
-        from datetime import datetime, timedelta
-
-        # Parse the insurance expiry date
+        # date.fromisoformat is a fast C path; strptime re-parses the
+        # format string on every call
         if isinstance(insurance_expiry_date, str):
-            expiry_date = datetime.strptime(insurance_expiry_date, '%Y-%m-%d')
+            expiry_date = date.fromisoformat(insurance_expiry_date)
+        elif isinstance(insurance_expiry_date, datetime):
+            expiry_date = insurance_expiry_date.date()
         else:
             expiry_date = insurance_expiry_date
 
-        today = datetime.now()
-        diff_days = (expiry_date - today).days
+        diff_days = (expiry_date - date.today()).days
 
         if diff_days < 0:
             return 'منتهية'
@@ -293,12 +669,19 @@ def get_csrf_token():
     from flask_wtf.csrf import generate_csrf
     return jsonify({'csrf_token': generate_csrf()})
 
+# Parsed config.json safe subset, memoized by file mtime
+_config_cache = {'mtime': None, 'safe': None}
+
 @app.route('/api/config')
 def get_config():
     """Get application configuration"""
     try:
         config_path = os.path.join(DATA_DIR, 'config.json')
         if os.path.exists(config_path):
+            mtime = os.stat(config_path).st_mtime_ns
+            if mtime == _config_cache['mtime']:
+                return jsonify(_config_cache['safe'])
+
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
                 # Remove sensitive data
@@ -311,6 +694,8 @@ def get_config():
                     'currency': config.get('currency', 'KWD'),
                     'global_commission_per_order': config.get('global_commission_per_order', 0.250)
                 }
+                _config_cache['mtime'] = mtime
+                _config_cache['safe'] = safe_config
                 return jsonify(safe_config)
         else:
             return jsonify({
@@ -325,14 +710,36 @@ def get_config():
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل الإعدادات: {str(e)}'}), 500
 
+def hardlink_tree(src, dst):
+    """Snapshot a directory tree with hardlinks instead of copying bytes
+
+    O(files) metadata operations instead of O(bytes) data copy. Falls
+    back to a real copy when linking is not possible (e.g. cross-device
+    backup location). Safe for the JSON data files because JSONStore
+    replaces them atomically (temp file + os.replace) instead of
+    truncating in place; SQLite databases write pages into the existing
+    inode, so they are always copied rather than linked.
+    """
+    os.makedirs(dst, exist_ok=True)
+    with os.scandir(src) as it:
+        for entry in it:
+            dst_path = os.path.join(dst, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                hardlink_tree(entry.path, dst_path)
+            elif '.sqlite3' in entry.name:
+                # Covers the database plus its -wal/-shm sidecars
+                shutil.copy2(entry.path, dst_path)
+            else:
+                try:
+                    os.link(entry.path, dst_path)
+                except OSError:
+                    shutil.copy2(entry.path, dst_path)
+
 @app.route('/api/admin/clear-all-data', methods=['POST'])
 @login_required
 def clear_all_data():
     """Clear all data from the system (admin only)"""
     try:
-        from json_store import json_store
-        import shutil
-        from datetime import datetime
 
         # Create backup before clearing
         backup_dir = os.path.join(os.path.dirname(__file__), 'backups')
@@ -341,8 +748,8 @@ def clear_all_data():
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_path = os.path.join(backup_dir, f'backup_before_clear_{timestamp}')
 
-        # Copy data directory to backup
-        shutil.copytree(DATA_DIR, backup_path)
+        # Snapshot data directory to backup via hardlinks
+        hardlink_tree(DATA_DIR, backup_path)
 
         # List of data files to clear
         data_files = [
@@ -368,25 +775,41 @@ def clear_all_data():
 
         # First, collect and delete attachment files before clearing data
         try:
+
             # Check driver_history.json for attachments
             driver_history_path = os.path.join(DATA_DIR, 'driver_history.json')
             if os.path.exists(driver_history_path):
                 with open(driver_history_path, 'r', encoding='utf-8') as f:
                     driver_history = json.load(f)
 
-                # Delete attachment files
+                # Collect attachment filenames first
                 uploads_dir = os.path.join(os.path.dirname(__file__), 'uploads')
-                for history_item in driver_history:
-                    if 'attachments' in history_item:
-                        for attachment in history_item['attachments']:
-                            if 'filename' in attachment:
-                                attachment_path = os.path.join(uploads_dir, attachment['filename'])
-                                if os.path.exists(attachment_path):
-                                    try:
-                                        os.remove(attachment_path)
-                                        deleted_attachments.append(attachment['filename'])
-                                    except Exception as e:
-                                        failed_files.append(f"attachment {attachment['filename']}: {str(e)}")
+                attachment_names = [
+                    attachment['filename']
+                    for history_item in driver_history
+                    for attachment in history_item.get('attachments', [])
+                    if 'filename' in attachment
+                ]
+
+                def _safe_remove(filename):
+                    """Remove one attachment, returning (filename, deleted, error)"""
+                    try:
+                        os.remove(os.path.join(uploads_dir, filename))
+                        return filename, True, None
+                    except FileNotFoundError:
+                        return filename, False, None
+                    except Exception as e:
+                        return filename, False, str(e)
+
+                # Deletion is syscall-latency bound, so overlap the
+                # removals across a small thread pool
+                if attachment_names:
+                    with ThreadPoolExecutor(max_workers=16) as executor:
+                        for filename, deleted, error in executor.map(_safe_remove, attachment_names):
+                            if deleted:
+                                deleted_attachments.append(filename)
+                            elif error is not None:
+                                failed_files.append(f"attachment {filename}: {error}")
         except Exception as e:
             failed_files.append(f'driver_history attachments: {str(e)}')
 
@@ -395,9 +818,12 @@ def clear_all_data():
             try:
                 file_path = os.path.join(DATA_DIR, file_name)
                 if os.path.exists(file_path):
-                    # Write empty array to JSON files
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump([], f, ensure_ascii=False, indent=2)
+                    # Unlink first so the hardlinked snapshot keeps the
+                    # old contents, then write a fresh empty array (no
+                    # JSON encoder needed for a constant empty list)
+                    os.remove(file_path)
+                    with open(file_path, 'wb') as f:
+                        f.write(b'[]')
                     cleared_files.append(file_name)
             except Exception as e:
                 failed_files.append(f'{file_name}: {str(e)}')
@@ -419,7 +845,6 @@ def clear_all_data():
 def create_backup():
     """Create a full backup of all data"""
     try:
-        from utils.json_store import json_store
 
         backup_dir = json_store.create_full_backup()
 
@@ -432,16 +857,35 @@ def create_backup():
     except Exception as e:
         return jsonify({'error': f'خطأ في إنشاء النسخة الاحتياطية: {str(e)}'}), 500
 
+# Computed backup status, cached until a backup is added or removed
+_backup_status_cache = {'mtime': None, 'value': None}
+
 @app.route('/api/admin/backup/status', methods=['GET'])
 @login_required
 def get_backup_status():
     """Get backup system status and recent backups"""
     try:
-        from utils.json_store import json_store
-        import os
-        from datetime import datetime, timedelta
 
         backup_root = json_store.backup_root
+
+        # The backup root's mtime changes whenever a backup directory is
+        # created or deleted, but daily backups add files inside the
+        # current day's directory all day, which only touches that
+        # child's mtime. Key the cache on the newest mtime across the
+        # root and its immediate children so both mutations invalidate.
+        if os.path.exists(backup_root):
+            root_mtime = os.stat(backup_root).st_mtime_ns
+            with os.scandir(backup_root) as it:
+                for entry in it:
+                    try:
+                        root_mtime = max(root_mtime, entry.stat(follow_symlinks=False).st_mtime_ns)
+                    except OSError:
+                        continue
+            if root_mtime == _backup_status_cache['mtime']:
+                return fast_jsonify(_backup_status_cache['value'])
+        else:
+            root_mtime = None
+
         status = {
             'backup_enabled': True,
             'backup_directory': backup_root,
@@ -450,28 +894,40 @@ def get_backup_status():
             'total_backup_size': 0
         }
 
+        def dir_stats(path):
+            """Accumulate total size and file count in one scandir pass"""
+            size = 0
+            count = 0
+            stack = [path]
+            while stack:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            size += entry.stat().st_size
+                            count += 1
+            return size, count
+
         if os.path.exists(backup_root):
-            # Get backup directories
-            for item in os.listdir(backup_root):
-                item_path = os.path.join(backup_root, item)
-                if os.path.isdir(item_path):
-                    # Calculate directory size
-                    dir_size = sum(
-                        os.path.getsize(os.path.join(dirpath, filename))
-                        for dirpath, dirnames, filenames in os.walk(item_path)
-                        for filename in filenames
-                    )
+            # Get backup directories (DirEntry carries cached stat data)
+            with os.scandir(backup_root) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+
+                    dir_size, file_count = dir_stats(entry.path)
                     status['total_backup_size'] += dir_size
 
                     backup_info = {
-                        'name': item,
-                        'path': item_path,
+                        'name': entry.name,
+                        'path': entry.path,
                         'size': dir_size,
-                        'created': datetime.fromtimestamp(os.path.getctime(item_path)).isoformat(),
-                        'file_count': sum(len(files) for _, _, files in os.walk(item_path))
+                        'created': datetime.fromtimestamp(entry.stat().st_ctime).isoformat(),
+                        'file_count': file_count
                     }
 
-                    if item.startswith('full_backup_'):
+                    if entry.name.startswith('full_backup_'):
                         status['full_backups'].append(backup_info)
                     else:
                         # Daily backup (YYYY-MM-DD format)
@@ -481,7 +937,9 @@ def get_backup_status():
             status['daily_backups'].sort(key=lambda x: x['created'], reverse=True)
             status['full_backups'].sort(key=lambda x: x['created'], reverse=True)
 
-        return jsonify(status)
+        _backup_status_cache['mtime'] = root_mtime
+        _backup_status_cache['value'] = status
+        return fast_jsonify(status)
 
     except Exception as e:
         return jsonify({'error': f'خطأ في جلب حالة النسخ الاحتياطية: {str(e)}'}), 500
@@ -491,7 +949,6 @@ def get_backup_status():
 def cleanup_old_backups():
     """Clean up old backups"""
     try:
-        from utils.json_store import json_store
 
         # Get days to keep from request (default 30)
         days_to_keep = request.json.get('days_to_keep', 30) if request.json else 30
@@ -523,7 +980,7 @@ def get_recent_events():
             user=user
         )
 
-        return jsonify(events)
+        return fast_jsonify(events)
 
     except Exception as e:
         return jsonify({'error': f'خطأ في جلب الأحداث: {str(e)}'}), 500
@@ -563,7 +1020,6 @@ def cleanup_old_events():
 def global_search():
     """Global search across drivers, clients, and vehicles"""
     try:
-        from json_store import json_store
         query = request.args.get('q', '').strip().lower()
 
         if not query or len(query) < 2:
@@ -571,84 +1027,43 @@ def global_search():
 
         results = []
 
-        # Search drivers
-        drivers = json_store.read_all('drivers')
-        for driver in drivers:
-            # Search in name, phone, national_id
-            searchable_text = ' '.join([
-                driver.get('full_name', '').lower(),
-                driver.get('phone', '').lower(),
-                driver.get('national_id', '').lower()
-            ])
-
-            if query in searchable_text:
+        # Resolve matches through the 2-gram inverted index
+        for collection, record in search_index.query(query):
+            if collection == 'drivers':
                 results.append({
-                    'id': driver.get('id'),
+                    'id': record.get('id'),
                     'type': 'driver',
-                    'title': driver.get('full_name', ''),
-                    'subtitle': f"هاتف: {driver.get('phone', '')} - الرقم المدني: {driver.get('national_id', '')}",
-                    'status': 'نشط' if driver.get('is_active', False) else 'غير نشط',
-                    'url': f"/drivers/{driver.get('id')}"
+                    'title': record.get('full_name', ''),
+                    'subtitle': f"هاتف: {record.get('phone', '')} - الرقم المدني: {record.get('national_id', '')}",
+                    'status': 'نشط' if record.get('is_active', False) else 'غير نشط',
+                    'url': f"/drivers/{record.get('id')}"
                 })
-
-        # Search clients
-        clients = json_store.read_all('clients')
-        for client in clients:
-            # Search in company name, contact person, phone
-            searchable_text = ' '.join([
-                client.get('company_name', '').lower(),
-                client.get('contact_person', '').lower(),
-                client.get('phone', '').lower()
-            ])
-
-            if query in searchable_text:
+            elif collection == 'clients':
                 results.append({
-                    'id': client.get('id'),
+                    'id': record.get('id'),
                     'type': 'client',
-                    'title': client.get('company_name', ''),
-                    'subtitle': f"جهة الاتصال: {client.get('contact_person', '')} - هاتف: {client.get('phone', '')}",
-                    'status': 'نشط' if client.get('is_active', False) else 'غير نشط',
-                    'url': f"/clients/{client.get('id')}"
+                    'title': record.get('company_name', ''),
+                    'subtitle': f"جهة الاتصال: {record.get('contact_person', '')} - هاتف: {record.get('phone', '')}",
+                    'status': 'نشط' if record.get('is_active', False) else 'غير نشط',
+                    'url': f"/clients/{record.get('id')}"
                 })
-
-        # Search companies
-        companies = json_store.read_all('companies')
-        for company in companies:
-            # Search in name, contact person, phone
-            searchable_text = ' '.join([
-                company.get('name', '').lower(),
-                company.get('contact_person', '').lower(),
-                company.get('phone', '').lower()
-            ])
-
-            if query in searchable_text:
+            elif collection == 'companies':
                 results.append({
-                    'id': company.get('id'),
+                    'id': record.get('id'),
                     'type': 'company',
-                    'title': company.get('name', ''),
-                    'subtitle': f"جهة الاتصال: {company.get('contact_person', '')} - هاتف: {company.get('phone', '')}",
-                    'status': 'نشط' if company.get('is_active', False) else 'غير نشط',
-                    'url': f"/companies/{company.get('id')}"
+                    'title': record.get('name', ''),
+                    'subtitle': f"جهة الاتصال: {record.get('contact_person', '')} - هاتف: {record.get('phone', '')}",
+                    'status': 'نشط' if record.get('is_active', False) else 'غير نشط',
+                    'url': f"/companies/{record.get('id')}"
                 })
-
-        # Search vehicles
-        vehicles = json_store.read_all('vehicles')
-        for vehicle in vehicles:
-            # Search in license plate, make, model
-            searchable_text = ' '.join([
-                vehicle.get('license_plate', '').lower(),
-                vehicle.get('make', '').lower(),
-                vehicle.get('model', '').lower()
-            ])
-
-            if query in searchable_text:
+            elif collection == 'vehicles':
                 results.append({
-                    'id': vehicle.get('id'),
+                    'id': record.get('id'),
                     'type': 'vehicle',
-                    'title': f"{vehicle.get('make', '')} {vehicle.get('model', '')}",
-                    'subtitle': f"لوحة: {vehicle.get('license_plate', '')} - سنة: {vehicle.get('year', '')}",
-                    'status': 'نشط' if vehicle.get('is_active', False) else 'غير نشط',
-                    'url': f"/vehicles/{vehicle.get('id')}"
+                    'title': f"{record.get('make', '')} {record.get('model', '')}",
+                    'subtitle': f"لوحة: {record.get('license_plate', '')} - سنة: {record.get('year', '')}",
+                    'status': 'نشط' if record.get('is_active', False) else 'غير نشط',
+                    'url': f"/vehicles/{record.get('id')}"
                 })
 
         # Sort results by type and relevance
@@ -664,7 +1079,7 @@ def global_search():
             'results_count': len(results)
         })
 
-        return jsonify({'results': results, 'query': query})
+        return fast_jsonify({'results': results, 'query': query})
 
     except Exception as e:
         return jsonify({'error': f'خطأ في البحث: {str(e)}'}), 500
@@ -674,60 +1089,64 @@ def global_search():
 def get_unpaid_advances_breakdown():
     """Get unpaid advances breakdown by driver"""
     try:
-        from json_store import json_store
-
         # Get all advances
-        advances = json_store.read_all('advances')
+        advances = cached_read_all('advances')
 
-        # Get all drivers for name lookup
-        drivers = json_store.read_all('drivers')
-        driver_lookup = {driver['id']: driver for driver in drivers}
+        # Get cached driver name lookup
+        driver_lookup = cached_index('drivers')
 
-        # Group unpaid advances by driver
+        # Group unpaid advances by driver in a single pass, accumulating
+        # the summary totals as we go
         driver_advances = {}
+        total_unpaid = 0
+        total_advances = 0
 
         for advance in advances:
-            if advance.get('status') != 'paid':  # Include pending and partial
-                driver_id = advance.get('driver_id')
-                if driver_id and driver_id in driver_lookup:
-                    driver = driver_lookup[driver_id]
-
-                    if driver_id not in driver_advances:
-                        driver_advances[driver_id] = {
-                            'driver_id': driver_id,
-                            'driver_name': driver.get('full_name', ''),
-                            'phone': driver.get('phone', ''),
-                            'total_unpaid': 0,
-                            'advances_count': 0,
-                            'advances': []
-                        }
-
-                    # Calculate unpaid amount
-                    amount = float(advance.get('amount', 0))
-                    paid_amount = float(advance.get('paid_amount', 0))
-                    unpaid_amount = amount - paid_amount
-
-                    if unpaid_amount > 0:
-                        driver_advances[driver_id]['total_unpaid'] += unpaid_amount
-                        driver_advances[driver_id]['advances_count'] += 1
-                        driver_advances[driver_id]['advances'].append({
-                            'id': advance.get('id'),
-                            'amount': amount,
-                            'paid_amount': paid_amount,
-                            'unpaid_amount': unpaid_amount,
-                            'date': advance.get('date'),
-                            'reason': advance.get('reason', ''),
-                            'status': advance.get('status', 'pending')
-                        })
+            if advance.get('status') == 'paid':  # Include pending and partial
+                continue
+
+            driver_id = advance.get('driver_id')
+            driver = driver_lookup.get(driver_id) if driver_id else None
+            if driver is None:
+                continue
+
+            # Calculate unpaid amount
+            amount = float(advance.get('amount') or 0)
+            paid_amount = float(advance.get('paid_amount') or 0)
+            unpaid_amount = amount - paid_amount
+
+            if unpaid_amount <= 0:
+                continue
+
+            entry = driver_advances.get(driver_id)
+            if entry is None:
+                entry = driver_advances[driver_id] = {
+                    'driver_id': driver_id,
+                    'driver_name': driver.get('full_name', ''),
+                    'phone': driver.get('phone', ''),
+                    'total_unpaid': 0,
+                    'advances_count': 0,
+                    'advances': []
+                }
+
+            entry['total_unpaid'] += unpaid_amount
+            entry['advances_count'] += 1
+            total_unpaid += unpaid_amount
+            total_advances += 1
+            entry['advances'].append({
+                'id': advance.get('id'),
+                'amount': amount,
+                'paid_amount': paid_amount,
+                'unpaid_amount': unpaid_amount,
+                'date': advance.get('date'),
+                'reason': advance.get('reason', ''),
+                'status': advance.get('status', 'pending')
+            })
 
         # Convert to list and sort by total unpaid amount (descending)
         breakdown = list(driver_advances.values())
         breakdown.sort(key=lambda x: x['total_unpaid'], reverse=True)
 
-        # Calculate totals
-        total_unpaid = sum(driver['total_unpaid'] for driver in breakdown)
-        total_advances = sum(driver['advances_count'] for driver in breakdown)
-
         # Log the drill-through action
         log_action('drill_through', 'unpaid_advances', None, {
             'total_drivers': len(breakdown),
@@ -735,7 +1154,7 @@ def get_unpaid_advances_breakdown():
             'total_advances': total_advances
         })
 
-        return jsonify({
+        return fast_jsonify({
             'breakdown': breakdown,
             'summary': {
                 'total_unpaid': total_unpaid,
@@ -753,16 +1172,17 @@ def get_unpaid_advances_breakdown():
 def get_orders_menu():
     """Get years and months summary for orders navigation"""
     try:
-        from json_store import json_store
-        monthly_orders = json_store.read_all('monthly_orders')
-
-        # Extract unique years from monthly orders
-        years = sorted(list(set(order.get('year', 2025) for order in monthly_orders)))
+        # The shard filenames already carry the years, so the menu needs
+        # no record parsing beyond per-shard counts
+        years = [y for y in json_store.list_shards('monthly_orders') if y]
         if not years:
             years = [2025]  # Default to current year if no data
 
         # Get summary statistics
-        total_records = len(monthly_orders)
+        total_records = sum(
+            len(cached_read_all(json_store.shard_collection('monthly_orders', year)))
+            for year in years
+        )
         current_year = datetime.now().year
         current_month = datetime.now().month
 
@@ -784,30 +1204,23 @@ def get_orders_menu():
 def get_eligible_drivers():
     """Get drivers eligible for commission tracking"""
     try:
-        from json_store import json_store
-        drivers = json_store.read_all('drivers')
+        drivers = cached_read_all('drivers')
 
-        # Filter drivers based on eligibility criteria
-        eligible_drivers = []
-        for driver in drivers:
-            employment_type = driver.get('employment_type', '')
-            commission_per_order = float(driver.get('default_commission_per_order', 0))
-            is_active = driver.get('is_active', False)
-
-            # Include ONLY commission and mixed drivers, EXCLUDE pure salary drivers
-            is_eligible = (
-                is_active and employment_type in ['commission', 'mixed']
-            )
-
-            if is_eligible:
-                eligible_drivers.append({
-                    'id': driver.get('id'),
-                    'full_name': driver.get('full_name', ''),
-                    'employment_type': employment_type,
-                    'default_commission_per_order': commission_per_order,
-                    'phone': driver.get('phone', ''),
-                    'national_id': driver.get('national_id', '')
-                })
+        # Include ONLY active commission and mixed drivers, EXCLUDE pure
+        # salary drivers - single pass, floats converted only for matches
+        eligible_drivers = [
+            {
+                'id': driver.get('id'),
+                'full_name': driver.get('full_name', ''),
+                'employment_type': employment_type,
+                'default_commission_per_order': float(driver.get('default_commission_per_order') or 0),
+                'phone': driver.get('phone', ''),
+                'national_id': driver.get('national_id', '')
+            }
+            for driver in drivers
+            if driver.get('is_active')
+            and (employment_type := driver.get('employment_type', '')) in ('commission', 'mixed')
+        ]
 
         return jsonify(eligible_drivers)
     except Exception as e:
@@ -818,76 +1231,157 @@ def get_eligible_drivers():
 def get_monthly_orders():
     """Get monthly orders for specific month and year"""
     try:
-        from json_store import json_store
         month = int(request.args.get('month', datetime.now().month))
         year = int(request.args.get('year', datetime.now().year))
 
         # Validate month and year
         if not (1 <= month <= 12):
-            return jsonify({'error': 'الشهر يجب أن يكون بين 1 و 12'}), 400
+            return jsonify(ERR_MONTH_RANGE), 400
         if year < 2020:
-            return jsonify({'error': 'السنة يجب أن تكون 2020 أو أحدث'}), 400
-
-        monthly_orders = json_store.read_all('monthly_orders')
-
-        # Filter by month and year
-        filtered_orders = [
-            order for order in monthly_orders
-            if order.get('month') == month and order.get('year') == year
+            return jsonify(ERR_YEAR_MIN), 400
+
+        # (year, month) index lookup instead of a full-collection scan
+        filtered_orders = monthly_orders_for(month, year)
+
+        # Records created since write-time denormalization already carry
+        # driver_name/client_name and are served verbatim; only legacy
+        # rows are enriched, into shallow copies since the cache is
+        # read-only
+        driver_index = cached_index('drivers')
+        client_index = cached_index('clients')
+
+        enriched_orders = [
+            order
+            if 'driver_name' in order
+            and all('client_name' in entry for entry in order.get('entries', []))
+            else dict(
+                order,
+                driver_name=(
+                    driver.get('full_name', '')
+                    if (driver := driver_index.get(order.get('driver_id', ''))) else 'غير محدد'
+                ),
+                entries=[
+                    dict(entry, client_name=(
+                        client.get('company_name', '')
+                        if (client := client_index.get(entry.get('client_id', ''))) else 'غير محدد'
+                    ))
+                    for entry in order.get('entries', [])
+                ]
+            )
+            for order in filtered_orders
         ]
 
-        # Enrich with driver and client names
-        drivers = json_store.read_all('drivers')
-        clients = json_store.read_all('clients')
-
-        driver_map = {d.get('id'): d.get('full_name', '') for d in drivers}
-        client_map = {c.get('id'): c.get('company_name', '') for c in clients}
-
-        for order in filtered_orders:
-            order['driver_name'] = driver_map.get(order.get('driver_id', ''), 'غير محدد')
-            # Enrich client names in entries
-            for entry in order.get('entries', []):
-                entry['client_name'] = client_map.get(entry.get('client_id', ''), 'غير محدد')
-
-        return jsonify(filtered_orders)
+        return jsonify(enriched_orders)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل الطلبات الشهرية: {str(e)}'}), 500
 
+# Static Arabic messages for the monthly-orders validation path, built
+# once at import time so the request/entry loops never re-create them
+ERR_MONTH_RANGE = {'error': 'الشهر يجب أن يكون بين 1 و 12'}
+ERR_YEAR_MIN = {'error': 'السنة يجب أن تكون 2020 أو أحدث'}
+ERR_DRIVER_NOT_FOUND = {'error': 'السائق غير موجود'}
+ERR_DRIVER_NOT_ELIGIBLE = {'error': 'السائق غير مؤهل لتتبع العمولات'}
+ERR_ORDER_NOT_FOUND = {'error': 'السجل الشهري غير موجود'}
+ERR_INVALID_NUMBERS = 'قيم العمولة وعدد الطلبات يجب أن تكون أرقام صحيحة'
+ERR_NEGATIVE_VALUES = 'القيم يجب أن تكون موجبة'
+ERR_INVALID_PERIOD_DATES = 'تواريخ غير صحيحة في فترات العمل'
+
+def _parse_period_date(value):
+    """Parse 'YYYY-MM-DD' into an (y, m, d) int tuple
+
+    Tuples compare lexicographically, so the overlap checks need no date
+    objects and skip strptime's per-call format parsing entirely.
+    """
+    return int(value[0:4]), int(value[5:7]), int(value[8:10])
+
 def validate_period_overlaps(entries):
     """Validate that periods within the same client don't overlap"""
+    # Overlap is only meaningful per client, so pool periods by client_id
+    # first; this also catches the same client split across two entries
+    by_client = defaultdict(list)
     for entry in entries:
-        if 'periods' not in entry or len(entry['periods']) <= 1:
+        periods = entry.get('periods')
+        if periods:
+            by_client[entry.get('client_id', '')].extend(periods)
+
+    for client_id, periods in by_client.items():
+        if len(periods) <= 1:
             continue
 
-        periods = entry['periods']
-        for i in range(len(periods)):
-            for j in range(i + 1, len(periods)):
-                period1 = periods[i]
-                period2 = periods[j]
+        # Parse each period once instead of re-parsing per pair
+        try:
+            bounds = [
+                (_parse_period_date(period['date_from']), _parse_period_date(period['date_to']))
+                for period in periods
+            ]
+        except (ValueError, TypeError, KeyError, IndexError):
+            return False, ERR_INVALID_PERIOD_DATES
+
+        # Sort by start date and sweep once: an overlap exists iff some
+        # period starts on or before the latest end seen so far
+        bounds.sort()
+        prev_end = bounds[0][1]
+        for start, end in bounds[1:]:
+            if start <= prev_end:
+                return False, f'تداخل في فترات العمل للعميل {client_id}'
+            if end > prev_end:
+                prev_end = end
 
-                try:
-                    from datetime import datetime
-                    start1 = datetime.strptime(period1['date_from'], '%Y-%m-%d').date()
-                    end1 = datetime.strptime(period1['date_to'], '%Y-%m-%d').date()
-                    start2 = datetime.strptime(period2['date_from'], '%Y-%m-%d').date()
-                    end2 = datetime.strptime(period2['date_to'], '%Y-%m-%d').date()
+    return True, None
 
-                    # Check if periods overlap
-                    if start1 <= end2 and start2 <= end1:
-                        return False, f'تداخل في فترات العمل للعميل {entry.get("client_id", "")}'
+def normalize_entry_totals(entries):
+    """Normalize order entries in place and compute aggregate totals
 
-                except (ValueError, TypeError):
-                    return False, 'تواريخ غير صحيحة في فترات العمل'
+    Converts legacy flat entries to the periods format, fills each
+    entry's total_orders/total_amount and returns
+    (total_orders, total_amount). Shared by the POST and PATCH routes.
 
-    return True, None
+    Raises:
+        ValueError: with an Arabic message when numbers are invalid
+    """
+    total_orders = 0
+    total_amount = 0.0
+
+    for entry in entries:
+        try:
+            commission_per_order = float(entry.get('commission_per_order', 0))
+            if 'periods' in entry:
+                period_orders = [int(period.get('num_orders', 0)) for period in entry['periods']]
+            else:
+                period_orders = [int(entry.get('num_orders', 0))]
+        except (ValueError, TypeError):
+            raise ValueError(ERR_INVALID_NUMBERS)
+
+        if commission_per_order < 0 or any(n < 0 for n in period_orders):
+            raise ValueError(ERR_NEGATIVE_VALUES)
+
+        if 'periods' not in entry:
+            # Old format (flat) - convert to new format for consistency
+            entry['periods'] = [{
+                'date_from': entry.get('date_from', ''),
+                'date_to': entry.get('date_to', ''),
+                'num_orders': period_orders[0]
+            }]
+
+            # Remove old flat fields
+            entry.pop('date_from', None)
+            entry.pop('date_to', None)
+            entry.pop('num_orders', None)
+
+        entry_total_orders = sum(period_orders)
+        entry_total = commission_per_order * entry_total_orders
+        entry['total_orders'] = entry_total_orders
+        entry['total_amount'] = entry_total
+        total_orders += entry_total_orders
+        total_amount += entry_total
+
+    return total_orders, total_amount
 
 @app.route('/api/orders/monthly', methods=['POST'])
 @login_required
 def create_monthly_order():
     """Create a new monthly order record"""
     try:
-        from json_store import json_store
-        import uuid
         data = request.get_json()
 
         # Validate required fields
@@ -900,14 +1394,14 @@ def create_monthly_order():
         month = int(data['month'])
         year = int(data['year'])
         if not (1 <= month <= 12):
-            return jsonify({'error': 'الشهر يجب أن يكون بين 1 و 12'}), 400
+            return jsonify(ERR_MONTH_RANGE), 400
         if year < 2020:
-            return jsonify({'error': 'السنة يجب أن تكون 2020 أو أحدث'}), 400
+            return jsonify(ERR_YEAR_MIN), 400
 
         # Validate driver exists and is eligible
         driver = json_store.find_by_id('drivers', data['driver_id'])
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return jsonify(ERR_DRIVER_NOT_FOUND), 404
 
         # Check driver eligibility
         employment_type = driver.get('employment_type', '')
@@ -917,7 +1411,7 @@ def create_monthly_order():
             (employment_type in ['salary', 'mixed'] and commission_per_order > 0)
         )
         if not is_eligible:
-            return jsonify({'error': 'السائق غير مؤهل لتتبع العمولات'}), 400
+            return jsonify(ERR_DRIVER_NOT_ELIGIBLE), 400
 
         # Validate entries
         entries = data.get('entries', [])
@@ -929,79 +1423,48 @@ def create_monthly_order():
         if not is_valid:
             return jsonify({'error': error_msg}), 400
 
-        total_orders = 0
-        total_amount = 0.0
+        # One cached set lookup per entry instead of a find_by_id scan
+        valid_client_ids = set(cached_index('clients'))
 
         for entry in entries:
             # Validate client exists
-            client = json_store.find_by_id('clients', entry.get('client_id', ''))
-            if not client:
+            if entry.get('client_id', '') not in valid_client_ids:
                 return jsonify({'error': f'العميل غير موجود: {entry.get("client_id", "")}'}), 404
 
-            # Support both old format (flat) and new format (with periods)
-            try:
-                commission_per_order = float(entry.get('commission_per_order', 0))
-                if commission_per_order < 0:
-                    return jsonify({'error': 'القيم يجب أن تكون موجبة'}), 400
-
-                if 'periods' in entry:
-                    # New format with periods
-                    entry_total_orders = 0
-                    for period in entry['periods']:
-                        period_orders = int(period.get('num_orders', 0))
-                        if period_orders < 0:
-                            return jsonify({'error': 'القيم يجب أن تكون موجبة'}), 400
-                        entry_total_orders += period_orders
-
-                    entry['total_orders'] = entry_total_orders
-                    entry_total = commission_per_order * entry_total_orders
-                    entry['total_amount'] = entry_total
-                    total_orders += entry_total_orders
-                    total_amount += entry_total
-                else:
-                    # Old format (flat) - convert to new format for consistency
-                    num_orders = int(entry.get('num_orders', 0))
-                    if num_orders < 0:
-                        return jsonify({'error': 'القيم يجب أن تكون موجبة'}), 400
-
-                    # Convert to periods format
-                    entry['periods'] = [{
-                        'date_from': entry.get('date_from', ''),
-                        'date_to': entry.get('date_to', ''),
-                        'num_orders': num_orders
-                    }]
-                    entry['total_orders'] = num_orders
-
-                    # Remove old flat fields
-                    entry.pop('date_from', None)
-                    entry.pop('date_to', None)
-                    entry.pop('num_orders', None)
-
-                    entry_total = commission_per_order * num_orders
-                    entry['total_amount'] = entry_total
-                    total_orders += num_orders
-                    total_amount += entry_total
+        # Normalize entries and compute totals (shared with PATCH)
+        try:
+            total_orders, total_amount = normalize_entry_totals(entries)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-            except (ValueError, TypeError):
-                return jsonify({'error': 'قيم العمولة وعدد الطلبات يجب أن تكون أرقام صحيحة'}), 400
+        # Denormalize names at write time so list reads serve the stored
+        # record verbatim instead of enriching on every request
+        client_index = cached_index('clients')
+        for entry in entries:
+            client = client_index.get(entry.get('client_id', ''))
+            entry['client_name'] = client.get('company_name', '') if client else 'غير محدد'
 
         # Create the monthly order record
+        now_iso = datetime.now().isoformat()
         monthly_order = {
-            'id': str(uuid.uuid4())[:8],
+            'id': uuid.uuid4().hex[:8],
             'month': month,
             'year': year,
             'driver_id': data['driver_id'],
+            'driver_name': driver.get('full_name', ''),
             'entries': entries,
             'totals': {
                 'total_orders': total_orders,
                 'total_amount': total_amount
             },
             'total_monthly_money': total_amount,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
+            'created_at': now_iso,
+            'updated_at': now_iso
         }
 
-        created_order = json_store.create('monthly_orders', monthly_order)
+        created_order = json_store.create(
+            json_store.shard_collection('monthly_orders', year), monthly_order
+        )
         return jsonify(created_order), 201
 
     except Exception as e:
@@ -1012,19 +1475,24 @@ def create_monthly_order():
 def get_monthly_order(order_id):
     """Get a specific monthly order record"""
     try:
-        from json_store import json_store
-        order = json_store.find_by_id('monthly_orders', order_id)
+        _, order = find_monthly_order(order_id)
         if not order:
-            return jsonify({'error': 'السجل الشهري غير موجود'}), 404
-
-        # Enrich with driver and client names
-        driver = json_store.find_by_id('drivers', order.get('driver_id', ''))
-        clients = json_store.read_all('clients')
-        client_map = {c.get('id'): c.get('company_name', '') for c in clients}
-
-        order['driver_name'] = driver.get('full_name', '') if driver else 'غير محدد'
-        for entry in order.get('entries', []):
-            entry['client_name'] = client_map.get(entry.get('client_id', ''), 'غير محدد')
+            return jsonify(ERR_ORDER_NOT_FOUND), 404
+
+        # Legacy rows predate write-time denormalization; fill the names
+        # from the cached indexes only where they are missing. The order
+        # is a top-level copy but its entries are still the id-index's
+        # own dicts, so copy them before writing names in
+        if 'driver_name' not in order:
+            driver = cached_index('drivers').get(order.get('driver_id', ''))
+            order['driver_name'] = driver.get('full_name', '') if driver else 'غير محدد'
+        client_index = cached_index('clients')
+        entries = [dict(entry) for entry in order.get('entries', [])]
+        for entry in entries:
+            if 'client_name' not in entry:
+                client = client_index.get(entry.get('client_id', ''))
+                entry['client_name'] = client.get('company_name', '') if client else 'غير محدد'
+        order['entries'] = entries
 
         return jsonify(order)
     except Exception as e:
@@ -1035,15 +1503,20 @@ def get_monthly_order(order_id):
 def update_monthly_order(order_id):
     """Update a monthly order record"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if order exists
-        existing_order = json_store.find_by_id('monthly_orders', order_id)
+        shard, existing_order = find_monthly_order(order_id)
         if not existing_order:
-            return jsonify({'error': 'السجل الشهري غير موجود'}), 404
+            return jsonify(ERR_ORDER_NOT_FOUND), 404
 
         # Validate entries if provided
+        if 'entries' in data and orjson.dumps(data['entries']) == orjson.dumps(existing_order.get('entries', [])):
+            # Unchanged payload (common once an order is finalized and
+            # only cosmetic fields are edited): the stored entries and
+            # totals already hold, so skip revalidation and recomputation
+            del data['entries']
+
         if 'entries' in data:
             entries = data['entries']
 
@@ -1052,48 +1525,25 @@ def update_monthly_order(order_id):
             if not is_valid:
                 return jsonify({'error': error_msg}), 400
 
-            total_orders = 0
-            total_amount = 0.0
+            # One cached set lookup per entry instead of a find_by_id scan
+            valid_client_ids = set(cached_index('clients'))
 
             for entry in entries:
                 # Validate client exists
-                client = json_store.find_by_id('clients', entry.get('client_id', ''))
-                if not client:
+                if entry.get('client_id', '') not in valid_client_ids:
                     return jsonify({'error': f'العميل غير موجود: {entry.get("client_id", "")}'}), 404
 
-                # Support both old format (flat) and new format (with periods)
-                try:
-                    commission_per_order = float(entry.get('commission_per_order', 0))
-                    if commission_per_order < 0:
-                        return jsonify({'error': 'القيم يجب أن تكون موجبة'}), 400
-
-                    if 'periods' in entry:
-                        # New format with periods
-                        entry_total_orders = 0
-                        for period in entry['periods']:
-                            period_orders = int(period.get('num_orders', 0))
-                            if period_orders < 0:
-                                return jsonify({'error': 'القيم يجب أن تكون موجبة'}), 400
-                            entry_total_orders += period_orders
-
-                        entry['total_orders'] = entry_total_orders
-                        entry_total = commission_per_order * entry_total_orders
-                        entry['total_amount'] = entry_total
-                        total_orders += entry_total_orders
-                        total_amount += entry_total
-                    else:
-                        # Old format (flat) - maintain backward compatibility
-                        num_orders = int(entry.get('num_orders', 0))
-                        if num_orders < 0:
-                            return jsonify({'error': 'القيم يجب أن تكون موجبة'}), 400
-
-                        entry_total = commission_per_order * num_orders
-                        entry['total_amount'] = entry_total
-                        total_orders += num_orders
-                        total_amount += entry_total
+            # Normalize entries and compute totals (shared with POST)
+            try:
+                total_orders, total_amount = normalize_entry_totals(entries)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
 
-                except (ValueError, TypeError):
-                    return jsonify({'error': 'قيم العمولة وعدد الطلبات يجب أن تكون أرقام صحيحة'}), 400
+            # Refresh the denormalized client names for the new entries
+            client_index = cached_index('clients')
+            for entry in entries:
+                client = client_index.get(entry.get('client_id', ''))
+                entry['client_name'] = client.get('company_name', '') if client else 'غير محدد'
 
             # Update totals
             data['totals'] = {
@@ -1102,10 +1552,27 @@ def update_monthly_order(order_id):
             }
             data['total_monthly_money'] = total_amount
 
+        # Keep the stored driver_name in step when the driver changes
+        if 'driver_id' in data:
+            driver = cached_index('drivers').get(data['driver_id'])
+            data['driver_name'] = driver.get('full_name', '') if driver else 'غير محدد'
+
         # Update timestamp
         data['updated_at'] = datetime.now().isoformat()
 
-        updated_order = json_store.update('monthly_orders', order_id, data)
+        # A changed year moves the record to another shard file
+        if 'year' in data and int(data['year']) != existing_order.get('year'):
+            moved_order = dict(existing_order, **data)
+            moved_order['year'] = int(data['year'])
+            new_shard = json_store.shard_collection('monthly_orders', moved_order['year'])
+            target_records = json_store.read_all(new_shard)
+            target_records.append(moved_order)
+            if not json_store.write_all(new_shard, target_records):
+                return jsonify({'error': 'فشل في تحديث السجل الشهري'}), 500
+            json_store.delete(shard, order_id)
+            return jsonify(moved_order)
+
+        updated_order = json_store.update(shard, order_id, data)
         if not updated_order:
             return jsonify({'error': 'فشل في تحديث السجل الشهري'}), 500
 
@@ -1119,14 +1586,13 @@ def update_monthly_order(order_id):
 def delete_monthly_order(order_id):
     """Delete a monthly order record"""
     try:
-        from json_store import json_store
 
         # Check if order exists
-        existing_order = json_store.find_by_id('monthly_orders', order_id)
+        shard, existing_order = find_monthly_order(order_id)
         if not existing_order:
-            return jsonify({'error': 'السجل الشهري غير موجود'}), 404
+            return jsonify(ERR_ORDER_NOT_FOUND), 404
 
-        success = json_store.delete('monthly_orders', order_id)
+        success = json_store.delete(shard, order_id)
         if not success:
             return jsonify({'error': 'فشل في حذف السجل الشهري'}), 500
 
@@ -1135,200 +1601,337 @@ def delete_monthly_order(order_id):
     except Exception as e:
         return jsonify({'error': f'خطأ في حذف السجل الشهري: {str(e)}'}), 500
 
+# Serialized once at import time: crawler and scanner noise hits these
+# handlers constantly, and the body never changes
+_NOT_FOUND_BODY = orjson.dumps({'error': 'الصفحة غير موجودة'})
+_SERVER_ERROR_BODY = orjson.dumps({'error': 'خطأ داخلي في الخادم'})
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return jsonify({'error': 'الصفحة غير موجودة'}), 404
+    return app.response_class(_NOT_FOUND_BODY, status=404,
+                              mimetype='application/json; charset=utf-8')
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    return jsonify({'error': 'خطأ داخلي في الخادم'}), 500
+    return app.response_class(_SERVER_ERROR_BODY, status=500,
+                              mimetype='application/json; charset=utf-8')
 
 # ========================================
 # ENHANCED ERROR HANDLING AND PERFORMANCE
 # ========================================
 
-class DocumentsErrorHandler:
-    """
-    Centralized error handling system for documents module.
-
-    This class provides comprehensive error handling with Arabic localization
-    for all document-related operations. It includes error logging, user-friendly
-    messages, and proper HTTP status code mapping.
+# Centralized error handling for the documents module: Arabic messages,
+# contextual logging and HTTP status mapping. Plain module-level
+# functions so the hot path is one dict lookup and a direct call, with
+# no class attribute dispatch in between.
+# Error logging happens off the request thread: handle_error enqueues the
+# entry and a daemon worker drains the queue in batches, so responses
+# never wait on the event-store write. The queue is bounded; under a
+# sustained error storm new entries are dropped rather than blocking.
+_error_log_queue = queue.Queue(maxsize=10000)
+
+def _error_log_worker():
+    while True:
+        batch = [_error_log_queue.get()]
+        deadline = time.time() + 0.2
+        while len(batch) < 100:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_error_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        for error_type, error_log in batch:
+            try:
+                log_action('error', error_type, None, error_log)
+            except Exception:
+                pass  # Don't let logging errors kill the worker
+
+threading.Thread(target=_error_log_worker, daemon=True,
+                 name='documents-error-log').start()
+
+ERROR_MESSAGES = {
+    'file_too_large': 'حجم الملف كبير جداً (الحد الأقصى 15 ميجابايت)',
+    'invalid_file_type': 'نوع الملف غير مدعوم. الأنواع المسموحة: PDF, JPG, PNG, DOCX, XLSX',
+    'file_not_found': 'الملف غير موجود',
+    'upload_failed': 'فشل في رفع الملف. حاول مرة أخرى',
+    'download_failed': 'فشل في تحميل الملف',
+    'zip_creation_failed': 'فشل في إنشاء الملف المضغوط',
+    'database_error': 'خطأ في قاعدة البيانات',
+    'permission_denied': 'ليس لديك صلاحية للوصول لهذا الملف',
+    'network_error': 'خطأ في الشبكة. تحقق من الاتصال',
+    'server_error': 'خطأ في الخادم. حاول مرة أخرى لاحقاً',
+    'storage_full': 'مساحة التخزين ممتلئة',
+    'file_corrupted': 'الملف تالف أو غير قابل للقراءة',
+    'no_files_selected': 'لم يتم اختيار أي ملفات',
+    'invalid_request': 'طلب غير صحيح',
+    'rate_limit_exceeded': 'تم تجاوز حد الطلبات المسموح. حاول مرة أخرى لاحقاً'
+}
 
-    Features:
-    - Arabic error messages for all scenarios
-    - Comprehensive error logging with context
-    - Proper HTTP status code mapping
-    - User-friendly error recovery suggestions
+def _req_ctx():
+    """Snapshot the request attributes used for error logging
 
-    Usage:
-        return DocumentsErrorHandler.handle_error('file_too_large', details, 413)
+    One LocalProxy dereference instead of four chained lookups per
+    logged error.
     """
-
-    ERROR_MESSAGES = {
-        'file_too_large': 'حجم الملف كبير جداً (الحد الأقصى 15 ميجابايت)',
-        'invalid_file_type': 'نوع الملف غير مدعوم. الأنواع المسموحة: PDF, JPG, PNG, DOCX, XLSX',
-        'file_not_found': 'الملف غير موجود',
-        'upload_failed': 'فشل في رفع الملف. حاول مرة أخرى',
-        'download_failed': 'فشل في تحميل الملف',
-        'zip_creation_failed': 'فشل في إنشاء الملف المضغوط',
-        'database_error': 'خطأ في قاعدة البيانات',
-        'permission_denied': 'ليس لديك صلاحية للوصول لهذا الملف',
-        'network_error': 'خطأ في الشبكة. تحقق من الاتصال',
-        'server_error': 'خطأ في الخادم. حاول مرة أخرى لاحقاً',
-        'storage_full': 'مساحة التخزين ممتلئة',
-        'file_corrupted': 'الملف تالف أو غير قابل للقراءة',
-        'no_files_selected': 'لم يتم اختيار أي ملفات',
-        'invalid_request': 'طلب غير صحيح',
-        'rate_limit_exceeded': 'تم تجاوز حد الطلبات المسموح. حاول مرة أخرى لاحقاً'
+    req = request._get_current_object()
+    return (
+        req.headers.get('User-Agent', 'Unknown'),
+        req.remote_addr,
+        req.endpoint or 'unknown',
+        req.method or 'unknown'
+    )
+
+def handle_error(error_type, details=None, status_code=500):
+    """Handle documents-module errors with Arabic messages and logging"""
+    message = ERROR_MESSAGES.get(error_type, 'حدث خطأ غير متوقع')
+
+    # One timestamp per error, shared by the log entry and response
+    now_iso = datetime.now().isoformat()
+
+    # Log error for monitoring
+    user_agent, ip_address, endpoint, method = _req_ctx()
+    error_log = {
+        'type': error_type,
+        'message': message,
+        'details': details,
+        'timestamp': now_iso,
+        'user_agent': user_agent,
+        'ip_address': ip_address,
+        'endpoint': endpoint,
+        'method': method
     }
 
-    @staticmethod
-    def handle_error(error_type, details=None, status_code=500):
-        """Handle errors with Arabic messages and logging"""
-        message = DocumentsErrorHandler.ERROR_MESSAGES.get(error_type, 'حدث خطأ غير متوقع')
-
-        # Log error for monitoring
-        error_log = {
-            'type': error_type,
-            'message': message,
-            'details': details,
-            'timestamp': datetime.now().isoformat(),
-            'user_agent': request.headers.get('User-Agent', 'Unknown'),
-            'ip_address': request.remote_addr,
-            'endpoint': request.endpoint if hasattr(request, 'endpoint') else 'unknown',
-            'method': request.method if hasattr(request, 'method') else 'unknown'
-        }
-
-        # Log to file or monitoring system
-        try:
-            log_action('error', error_type, None, error_log)
-        except:
-            pass  # Don't let logging errors break the response
-
-        return jsonify({
-            'error': message,
-            'error_code': error_type,
-            'timestamp': datetime.now().isoformat()
-        }), status_code
-
-    @staticmethod
-    def handle_upload_error(exception):
-        """Handle upload-specific errors"""
-        if isinstance(exception, FileNotFoundError):
-            return DocumentsErrorHandler.handle_error('file_not_found', str(exception), 404)
-        elif isinstance(exception, PermissionError):
-            return DocumentsErrorHandler.handle_error('permission_denied', str(exception), 403)
-        elif isinstance(exception, OSError):
-            return DocumentsErrorHandler.handle_error('storage_full', str(exception), 507)
-        elif 'file too large' in str(exception).lower():
-            return DocumentsErrorHandler.handle_error('file_too_large', str(exception), 413)
-        else:
-            return DocumentsErrorHandler.handle_error('upload_failed', str(exception), 500)
-
-class DocumentsCleanupManager:
-    """
-    Automated cleanup and maintenance system for documents module.
-
-    This class handles all cleanup operations to maintain system health
-    and prevent storage issues. It includes temporary file cleanup,
-    orphaned file removal, and database consistency maintenance.
-
-    Features:
-    - Automatic temporary file cleanup (files older than 1 hour)
-    - Orphaned file detection and removal
-    - Database consistency checks and repairs
-    - Performance monitoring and reporting
-
-    Usage:
-        cleaned_count = DocumentsCleanupManager.cleanup_temp_files()
-        removed_count = DocumentsCleanupManager.cleanup_orphaned_files()
-    """
-
-    @staticmethod
-    def cleanup_temp_files():
-        """Clean up temporary files older than 1 hour"""
-        temp_dir = os.path.join(UPLOADS_DIR, 'temp')
-        cleaned_count = 0
+    # Hand off to the background writer; never block the response
+    try:
+        _error_log_queue.put_nowait((error_type, error_log))
+    except queue.Full:
+        pass  # Drop the entry rather than stall the request
 
-        if os.path.exists(temp_dir):
-            for filename in os.listdir(temp_dir):
-                file_path = os.path.join(temp_dir, filename)
+    return jsonify({
+        'error': message,
+        'error_code': error_type,
+        'timestamp': now_iso
+    }), status_code
+
+def handle_upload_error(exception):
+    """Handle upload-specific errors"""
+    if isinstance(exception, FileNotFoundError):
+        return handle_error('file_not_found', str(exception), 404)
+    elif isinstance(exception, PermissionError):
+        return handle_error('permission_denied', str(exception), 403)
+    elif isinstance(exception, OSError):
+        return handle_error('storage_full', str(exception), 507)
+    elif 'file too large' in str(exception).lower():
+        return handle_error('file_too_large', str(exception), 413)
+    else:
+        return handle_error('upload_failed', str(exception), 500)
+
+# State carried between orphan-cleanup runs: the filename set seen last
+# time plus the mtime of every directory already walked. Directories whose
+# mtime has not moved since then cannot have gained files, so repeat runs
+# only walk what actually changed.
+_orphan_cleanup_state = {'db_files': None, 'dir_mtimes': {}}
+
+
+# Automated cleanup for the documents module: temporary-file removal and
+# orphaned-file detection, kept as module-level functions for the same
+# reason as the error handlers above.
+def cleanup_temp_files():
+    """Clean up temporary files older than 1 hour"""
+    temp_dir = os.path.join(UPLOADS_DIR, 'temp')
+    cleaned_count = 0
+    cutoff = time.time() - 3600
+
+    if os.path.exists(temp_dir):
+        # scandir gives type and mtime from one directory read instead
+        # of a separate stat call per file
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
                 try:
                     # Remove files older than 1 hour
-                    if os.path.isfile(file_path) and os.path.getmtime(file_path) < time.time() - 3600:
-                        os.remove(file_path)
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
                         cleaned_count += 1
                 except Exception as e:
                     try:
                         log_action('error', 'temp_file_cleanup_failed', None, {
-                            'filename': filename,
+                            'filename': entry.name,
                             'error': str(e)
                         })
                     except:
                         pass
 
-        return cleaned_count
+    return cleaned_count
 
-    @staticmethod
-    def cleanup_orphaned_files():
-        """Remove files that exist on disk but not in database"""
-        try:
-            # Get all documents from JSON files
-            documents = []
-            for entity_type in ['drivers', 'vehicles', 'companies', 'other']:
-                entity_docs_file = os.path.join(DATA_DIR, f'{entity_type}_documents.json')
-                if os.path.exists(entity_docs_file):
-                    with open(entity_docs_file, 'r', encoding='utf-8') as f:
-                        entity_docs = json.load(f)
-                        documents.extend(entity_docs)
-
-            db_files = {doc.get('stored_filename') for doc in documents if doc.get('stored_filename')}
-            removed_count = 0
-
-            # Check each entity type directory
-            for entity_type in ['drivers', 'vehicles', 'companies', 'other']:
-                entity_dir = os.path.join(UPLOADS_DIR, 'documents', entity_type)
-                if os.path.exists(entity_dir):
-                    for root, dirs, files in os.walk(entity_dir):
-                        for filename in files:
-                            if filename not in db_files and not filename.startswith('.'):
-                                file_path = os.path.join(root, filename)
-                                try:
-                                    os.remove(file_path)
-                                    removed_count += 1
-                                    log_action('cleanup', 'orphaned_file_removed', None, {
-                                        'filename': filename,
-                                        'path': file_path
-                                    })
-                                except Exception as e:
-                                    try:
-                                        log_action('error', 'orphaned_file_removal_failed', None, {
-                                            'filename': filename,
-                                            'error': str(e)
-                                        })
-                                    except:
-                                        pass
-
-            return removed_count
+def cleanup_orphaned_files():
+    """Remove files that exist on disk but not in database"""
+    try:
+        # Build the set of known filenames directly; only stored_filename
+        # is needed, so keeping the full document dicts around is waste
+        db_files = set()
+        for entity_type in ['drivers', 'vehicles', 'companies', 'other']:
+            entity_docs_file = os.path.join(DATA_DIR, f'{entity_type}_documents.json')
+            if os.path.exists(entity_docs_file):
+                with open(entity_docs_file, 'rb') as f:
+                    for doc in orjson.loads(f.read()):
+                        stored = doc.get('stored_filename')
+                        if stored:
+                            db_files.add(stored)
+        removed_count = 0
+
+        # A changed database can orphan files in untouched directories,
+        # so the mtime shortcut only holds while db_files is identical
+        state = _orphan_cleanup_state
+        if state['db_files'] != db_files:
+            state['dir_mtimes'] = {}
+        dir_mtimes = state['dir_mtimes']
+
+        # Check each entity type directory
+        for entity_type in ['drivers', 'vehicles', 'companies', 'other']:
+            entity_dir = os.path.join(UPLOADS_DIR, 'documents', entity_type)
+            if not os.path.exists(entity_dir):
+                continue
 
-        except Exception as e:
-            try:
-                log_action('error', 'orphaned_files_cleanup_failed', None, {'error': str(e)})
-            except:
-                pass
-            return 0
+            stack = [entity_dir]
+            while stack:
+                current_dir = stack.pop()
+                try:
+                    dir_mtime = os.stat(current_dir).st_mtime
+                    entries = list(os.scandir(current_dir))
+                except OSError:
+                    continue
+
+                unchanged = dir_mtimes.get(current_dir) == dir_mtime
+                removed_here = False
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if unchanged or not entry.is_file(follow_symlinks=False):
+                        continue
+                    filename = entry.name
+                    if filename not in db_files and not filename.startswith('.'):
+                        try:
+                            os.remove(entry.path)
+                            removed_count += 1
+                            removed_here = True
+                            log_action('cleanup', 'orphaned_file_removed', None, {
+                                'filename': filename,
+                                'path': entry.path
+                            })
+                        except Exception as e:
+                            try:
+                                log_action('error', 'orphaned_file_removal_failed', None, {
+                                    'filename': filename,
+                                    'error': str(e)
+                                })
+                            except:
+                                pass
+
+                if removed_here:
+                    # Deleting bumped the directory mtime; re-stat so the
+                    # recorded value matches the post-cleanup state
+                    try:
+                        dir_mtime = os.stat(current_dir).st_mtime
+                    except OSError:
+                        continue
+                dir_mtimes[current_dir] = dir_mtime
+
+        state['db_files'] = db_files
+        return removed_count
+
+    except Exception as e:
+        try:
+            log_action('error', 'orphaned_files_cleanup_failed', None, {'error': str(e)})
+        except:
+            pass
+        return 0
 
 # ========================================
 # DOCUMENTS UPLOAD HELPER FUNCTIONS
 # ========================================
 
-def validate_file_upload_enhanced(file, entity_type, entity_id):
+def _file_backed_fileno(file_obj):
+    """Return the fd of an upload that is already spilled to disk
+
+    SpooledTemporaryFile rolls its in-memory buffer to disk as soon as
+    fileno() is called, so only objects that have already rolled (or are
+    plain files) report a descriptor here; everything else returns None.
+    """
+    target = getattr(file_obj, 'stream', file_obj)
+    if getattr(target, '_rolled', True) is False:
+        return None
+    try:
+        return target.fileno()
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _upload_size(file_obj):
+    """Size of an upload without the seek-to-end/tell round trip
+
+    Disk-backed files answer with one fstat syscall; only in-memory
+    buffers (which have no descriptor) fall back to the seek dance.
+    """
+    fd = _file_backed_fileno(file_obj)
+    if fd is not None:
+        return os.fstat(fd).st_size
+
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(0)
+    return size
+
+def save_and_digest(src, dst_path, max_size=None):
+    """
+    Stream src to dst_path while computing size, hash and head bytes
+    حفظ الملف وحساب البصمة والحجم في مسار واحد
+
+    A single fused pass replaces the spool-scan-hash-copy sequence, so
+    each byte crosses the user/kernel boundary once on the way in and
+    once on the way out. Returns (size, hash_hex, head) where head is
+    the first 2048 bytes. If max_size is given and exceeded, the partial
+    file is removed and ValueError is raised.
+
+    The digest is an integrity fingerprint, not a signature, so BLAKE3
+    is used when the optional blake3 package is installed (several
+    times faster per byte); otherwise SHA-256.
+    """
+    digest = blake3() if HAS_BLAKE3 else hashlib.sha256()
+    size = 0
+    head = b''
+
+    try:
+        with open(dst_path, 'wb', buffering=1 << 20) as out:
+            while chunk := src.read(1 << 16):
+                digest.update(chunk)
+                out.write(chunk)
+                if not head:
+                    head = chunk[:2048]
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise ValueError('file exceeds maximum size')
+            out.flush()
+            os.fsync(out.fileno())
+    except Exception:
+        try:
+            os.remove(dst_path)
+        except OSError:
+            pass
+        raise
+
+    return size, digest.hexdigest(), head
+
+def validate_file_upload_enhanced(file, entity_type, entity_id, file_size=None, file_header=None):
     """
     Enhanced file validation with server-side MIME type checking and security
     التحقق المحسن من صحة الملف مع فحص نوع MIME من جانب الخادم والأمان
+
+    file_size and file_header are passed in by the upload endpoints so
+    the file is not re-read here.
     """
     errors = []
 
@@ -1351,52 +1954,73 @@ def validate_file_upload_enhanced(file, entity_type, entity_id):
     if file_ext not in ALLOWED_EXTENSIONS:
         allowed_list = ', '.join(ALLOWED_EXTENSIONS)
         errors.append(f'نوع الملف غير مدعوم. الأنواع المسموحة: {allowed_list}')
+        # Already rejected: skip the size read and MIME sniffing, which
+        # could only stack more errors onto a refused upload
+        return errors
 
     # Check file size
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)  # Reset file pointer
+    if file_size is None:
+        file_size = _upload_size(file)
 
     if file_size > MAX_FILE_SIZE:
         max_size_mb = MAX_FILE_SIZE / (1024 * 1024)
         errors.append(f'حجم الملف كبير جداً (الحد الأقصى {max_size_mb:.0f} ميجابايت)')
+        return errors
 
     if file_size == 0:
         errors.append('الملف فارغ')
+        return errors
 
-    # Server-side MIME type validation using python-magic
-    try:
+    # Server-side MIME type validation from the file content
+    if file_header is None:
         # Read first 2048 bytes for MIME detection
         file.seek(0)
         file_header = file.read(2048)
         file.seek(0)  # Reset file pointer
 
-        # Detect MIME type from file content
-        # detected_mime = magic.from_buffer(file_header, mime=True)  # Temporarily disabled
-        detected_mime = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    errors.extend(validate_content_mime(filename, file_header))
 
-        # Check if detected MIME type matches expected type for extension
-        expected_mime = ALLOWED_MIME_TYPES.get(file_ext)
-        if expected_mime and detected_mime != expected_mime:
-            # Temporarily disabled strict MIME checking
-            pass  # errors.append(f'نوع الملف الفعلي ({detected_mime}) لا يطابق الامتداد ({file_ext})')
+    return errors
+
+def validate_content_mime(filename, file_header):
+    """
+    Validate the sniffed content MIME type against the file extension
+    التحقق من نوع MIME الفعلي للمحتوى مقابل امتداد الملف
+
+    Shared by the multipart and streaming upload endpoints so both apply
+    the same content-based checks to the captured head bytes.
+    """
+    errors = []
+    file_ext = os.path.splitext(filename.lower())[1]
 
-        # Additional security checks for specific file types
-        if file_ext in ['.pdf']:
-            if not detected_mime.startswith('application/pdf'):
+    try:
+        # Detect MIME type from file content; fall back to the extension
+        # table when the header is unrecognized
+        detected_mime = None
+        if HAS_PUREMAGIC and file_header:
+            try:
+                detected_mime = puremagic.from_string(file_header, mime=True) or None
+            except (puremagic.PureError, ValueError):
+                detected_mime = None
+        if not detected_mime:
+            detected_mime = guess_mime_type(filename)
+
+        # Check the detected MIME type against what the extension allows
+        acceptable = ACCEPTABLE_MIME_TYPES.get(file_ext)
+        if acceptable and detected_mime not in acceptable:
+            if file_ext == '.pdf':
                 errors.append('ملف PDF غير صالح أو تالف')
-        elif file_ext in ['.jpg', '.jpeg', '.png', '.webp']:
-            if not detected_mime.startswith('image/'):
+            elif file_ext in ('.jpg', '.jpeg', '.png', '.webp'):
                 errors.append('ملف الصورة غير صالح أو تالف')
-        elif file_ext in ['.docx']:
-            if 'officedocument' not in detected_mime:
+            elif file_ext == '.docx':
                 errors.append('ملف Word غير صالح أو تالف')
-        elif file_ext in ['.xlsx']:
-            if 'spreadsheetml' not in detected_mime:
+            elif file_ext == '.xlsx':
                 errors.append('ملف Excel غير صالح أو تالف')
+            else:
+                errors.append(f'نوع الملف الفعلي ({detected_mime}) لا يطابق الامتداد ({file_ext})')
 
     except Exception as e:
-        print(f"[WARN] MIME type detection failed: {e}")
+        logger.warning("MIME type detection failed: %s", e)
         errors.append('فشل في التحقق من نوع الملف')
 
     return errors
@@ -1414,15 +2038,35 @@ def calculate_file_hash(file_obj):
     Calculate SHA-256 hash of file for integrity verification
     حساب hash SHA-256 للملف للتحقق من سلامته
     """
-    sha256_hash = hashlib.sha256()
     file_obj.seek(0)
 
-    # Read file in chunks to handle large files efficiently
-    for chunk in iter(lambda: file_obj.read(4096), b""):
-        sha256_hash.update(chunk)
+    # Large disk-backed files: hash the memory mapping in one call
+    fd = _file_backed_fileno(file_obj)
+    if fd is not None and os.fstat(fd).st_size > 1024 * 1024:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            digest = hashlib.sha256(memoryview(mm))
+        file_obj.seek(0)
+        return digest.hexdigest()
+
+    if hasattr(hashlib, 'file_digest'):
+        # C-level loop (Python 3.11+): no per-chunk interpreter dispatch
+        # and OpenSSL picks up SHA-NI acceleration where available
+        digest = hashlib.file_digest(file_obj, 'sha256')
+    else:
+        # Fallback: readinto a preallocated buffer to avoid per-chunk
+        # bytes allocation
+        digest = hashlib.sha256()
+        buf = bytearray(1024 * 1024)
+        view = memoryview(buf)
+        while n := file_obj.readinto(view):
+            digest.update(view[:n])
 
     file_obj.seek(0)  # Reset file pointer
-    return sha256_hash.hexdigest()
+    return digest.hexdigest()
+
+# Path-traversal characters stripped after secure_filename: one compiled
+# alternation scans the name once instead of three chained replaces
+_UNSAFE_FILENAME_RE = re.compile(r'\.\.+|[/\\]')
 
 def sanitize_and_generate_filename(original_filename):
     """
@@ -1433,7 +2077,7 @@ def sanitize_and_generate_filename(original_filename):
     secure_name = secure_filename(original_filename)
 
     # Remove any potentially dangerous characters
-    secure_name = secure_name.replace('..', '').replace('/', '').replace('\\', '')
+    secure_name = _UNSAFE_FILENAME_RE.sub('', secure_name)
 
     # Limit filename length
     name_part, ext_part = os.path.splitext(secure_name)
@@ -1441,69 +2085,76 @@ def sanitize_and_generate_filename(original_filename):
         name_part = name_part[:50]
     secure_name = name_part + ext_part
 
-    # Generate UUID prefix with timestamp
-    file_uuid = str(uuid.uuid4())
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Generate UUID prefix with timestamp; hex form skips the hyphen
+    # formatting and time.strftime skips building a datetime object
+    file_uuid = uuid.uuid4().hex
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
 
     # Combine UUID, timestamp, and secure filename
     final_filename = f"{timestamp}_{file_uuid}___{secure_name}"
 
     return final_filename, file_uuid
 
-def scan_file_for_threats(file_obj, filename):
+# All suspicious markers compiled into one case-insensitive alternation:
+# a single linear scan instead of one memmem pass per pattern, and no
+# lowercased copy of the buffer
+_THREAT_RE = re.compile(rb'(?i)<script|javascript:|vbscript:|<\?php|<%|eval\(|exec\(')
+
+# Executable file signatures (magic bytes), checked against the head once
+_EXECUTABLE_SIGNATURES = (
+    b'MZ',  # Windows PE executable
+    b'\x7fELF',  # Linux ELF executable
+    b'\xca\xfe\xba\xbe',  # Java class file
+)
+
+def scan_file_for_threats(file_obj, filename, file_content=None, file_size=None):
     """
     Basic file threat scanning (placeholder for real antivirus integration)
     فحص أساسي للملف للتهديدات (نائب لتكامل مكافح الفيروسات الحقيقي)
+
+    file_content (head bytes) and file_size may come from the upload
+    endpoint's single streaming pass to avoid re-reading the file.
     """
     threats_found = []
 
     try:
-        file_obj.seek(0)
-        file_content = file_obj.read(1024)  # Read first 1KB for basic checks
-        file_obj.seek(0)  # Reset file pointer
-
-        # Basic threat detection patterns
-        suspicious_patterns = [
-            b'<script',  # Potential XSS in uploaded files
-            b'javascript:',  # JavaScript URLs
-            b'vbscript:',  # VBScript URLs
-            b'<?php',  # PHP code
-            b'<%',  # ASP/JSP code
-            b'eval(',  # Eval functions
-            b'exec(',  # Exec functions
-        ]
-
-        content_lower = file_content.lower()
-        for pattern in suspicious_patterns:
-            if pattern in content_lower:
-                threats_found.append(f'Suspicious pattern detected: {pattern.decode("utf-8", errors="ignore")}')
+        if file_content is None:
+            file_obj.seek(0)
+            file_content = file_obj.read(1024)  # Read first 1KB for basic checks
+            file_obj.seek(0)  # Reset file pointer
+
+        # One regex pass over the head buffer covers every pattern;
+        # report each distinct pattern once like the old per-pattern loop
+        seen_patterns = set()
+        for match in _THREAT_RE.finditer(file_content):
+            pattern = match.group().lower()
+            if pattern not in seen_patterns:
+                seen_patterns.add(pattern)
+                threats_found.append(
+                    f'Suspicious pattern detected: {pattern.decode("utf-8", errors="ignore")}'
+                )
 
         # Check for executable file signatures
-        executable_signatures = [
-            b'MZ',  # Windows PE executable
-            b'\x7fELF',  # Linux ELF executable
-            b'\xca\xfe\xba\xbe',  # Java class file
-        ]
-
-        for sig in executable_signatures:
-            if file_content.startswith(sig):
-                threats_found.append('Executable file detected')
-                break
+        if file_content.startswith(_EXECUTABLE_SIGNATURES):
+            threats_found.append('Executable file detected')
 
         # File size anomaly check
-        file_obj.seek(0, os.SEEK_END)
-        file_size = file_obj.tell()
-        file_obj.seek(0)
+        if file_size is None:
+            file_size = _upload_size(file_obj)
 
         if file_size > 50 * 1024 * 1024:  # 50MB
             threats_found.append('File size exceeds safe limits')
 
     except Exception as e:
-        print(f"[WARN] Threat scanning error: {e}")
+        logger.warning("Threat scanning error: %s", e)
         threats_found.append('Threat scanning failed')
 
     return threats_found
 
+# Entity directories already created this process, so repeat uploads to
+# the same entity skip the exists/makedirs stat calls
+_created_entity_dirs = set()
+
 def get_storage_path(entity_type, entity_id, filename):
     """
     Get storage path for uploaded file
@@ -1519,32 +2170,70 @@ def get_storage_path(entity_type, entity_id, filename):
         entity_dir = OTHER_DOCS_DIR
 
     # Create entity directory if it doesn't exist
-    if not os.path.exists(entity_dir):
-        os.makedirs(entity_dir, mode=0o755)
+    if entity_dir not in _created_entity_dirs:
+        os.makedirs(entity_dir, mode=0o755, exist_ok=True)
+        _created_entity_dirs.add(entity_dir)
 
     return os.path.join(entity_dir, filename)
 
-def extract_file_metadata(file, filename, file_path):
+def extract_file_metadata(file, filename, file_path, file_size=None):
     """
     Extract metadata from uploaded file
     استخراج البيانات الوصفية من الملف المرفوع
     """
     # Get file size
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
+    if file_size is None:
+        file_size = _upload_size(file)
+
+    # Detect MIME type
+    mime_type = guess_mime_type(filename)
+
+    return {
+        'size_bytes': file_size,
+        'mime_type': mime_type
+    }
+
+# Failed-upload record deletions are queued and flushed as one batch, so
+# a burst of failures rewrites the collection file once instead of once
+# per record; the timer debounces the flush by half a second
+_PENDING_DELETES_DELAY = 0.5
+_pending_record_deletes = deque()
+_pending_deletes_lock = threading.Lock()
+_pending_deletes_timer = None
+
+def _flush_pending_deletes():
+    """Apply all queued record deletions, one write per collection"""
+    global _pending_deletes_timer
+
+    with _pending_deletes_lock:
+        _pending_deletes_timer = None
+        pending = list(_pending_record_deletes)
+        _pending_record_deletes.clear()
+
+    by_collection = defaultdict(list)
+    for collection, record_id in pending:
+        by_collection[collection].append(record_id)
+
+    for collection, record_ids in by_collection.items():
+        try:
+            removed = json_store.delete_many(collection, record_ids)
+            if removed:
+                logger.info("Cleaned up %s failed upload record(s) from %s", removed, collection)
+        except Exception as e:
+            logger.warning("Error during batched record cleanup: %s", e)
 
-    # Detect MIME type
-    mime_type, _ = mimetypes.guess_type(filename)
-    if not mime_type:
-        # Fallback based on extension
-        file_ext = os.path.splitext(filename)[1].lower()
-        mime_type = ALLOWED_MIME_TYPES.get(file_ext, 'application/octet-stream')
+def _queue_record_delete(collection, record_id):
+    """Queue a record deletion and arm the debounced flush timer"""
+    global _pending_deletes_timer
 
-    return {
-        'size_bytes': file_size,
-        'mime_type': mime_type
-    }
+    with _pending_deletes_lock:
+        _pending_record_deletes.append((collection, record_id))
+        if _pending_deletes_timer is None:
+            _pending_deletes_timer = threading.Timer(
+                _PENDING_DELETES_DELAY, _flush_pending_deletes
+            )
+            _pending_deletes_timer.daemon = True
+            _pending_deletes_timer.start()
 
 def cleanup_failed_upload(file_path, document_id=None):
     """
@@ -1555,27 +2244,29 @@ def cleanup_failed_upload(file_path, document_id=None):
         # Remove file if it exists
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
-            print(f"[DEL] Cleaned up failed upload file: {file_path}")
+            logger.info("Cleaned up failed upload file: %s", file_path)
 
-        # Remove database record if it was created
+        # Queue the database record for the batched delete pass
         if document_id:
-            from utils.json_store import json_store
-            json_store.delete('documents', document_id)
-            print(f"[DEL] Cleaned up failed upload record: {document_id}")
+            _queue_record_delete('documents', document_id)
 
     except Exception as e:
-        print(f"[WARN] Error during cleanup: {e}")
+        logger.warning("Error during cleanup: %s", e)
 
-def paginate_documents(documents, page, limit):
+def paginate_documents(documents, page, limit, total=None):
     """
     Paginate documents list
     تقسيم قائمة الوثائق إلى صفحات
+
+    total overrides len(documents) when the caller passes a pre-cut
+    prefix of the sorted order instead of the full list.
     """
     # Validate parameters
     page = max(1, int(page) if str(page).isdigit() else 1)
     limit = max(1, min(100, int(limit) if str(limit).isdigit() else 20))
 
-    total = len(documents)
+    if total is None:
+        total = len(documents)
     total_pages = (total + limit - 1) // limit  # Ceiling division
 
     # Calculate offset
@@ -1601,96 +2292,109 @@ def filter_documents(documents, filters):
     Filter documents based on criteria
     تصفية الوثائق حسب المعايير
     """
-    filtered = documents
+    # Build one predicate per active filter, then walk the list once
+    # instead of rebuilding an intermediate list per filter
+    preds = []
 
     for key, value in filters.items():
         if value is not None and value != '':
             if key == 'search':
                 # Text search in multiple fields
                 query = str(value).lower()
-                filtered = [
-                    doc for doc in filtered
-                    if (query in doc.get('display_name', '').lower() or
-                        query in doc.get('original_filename', '').lower() or
-                        query in doc.get('notes', '').lower())
-                ]
+                preds.append(lambda doc, q=query: q in '\x00'.join((
+                    doc.get('display_name') or '',
+                    doc.get('original_filename') or '',
+                    doc.get('notes') or '',
+                )).lower())
             else:
                 # Exact match filtering
-                filtered = [doc for doc in filtered if doc.get(key) == value]
+                preds.append(lambda doc, k=key, v=value: doc.get(k) == v)
+
+    if not preds:
+        return documents
 
-    return filtered
+    return [doc for doc in documents if all(pred(doc) for pred in preds)]
 
-def sort_documents(documents, sort_by='created_at', sort_order='desc'):
+# Allowed sort fields with a type-correct default each, so records with
+# a missing or None value never mix types inside the comparison
+_SORT_DEFAULTS = {
+    'created_at': '',
+    'updated_at': '',
+    'display_name': '',
+    'original_filename': '',
+    'size_bytes': 0,
+}
+
+def sort_documents(documents, sort_by='created_at', sort_order='desc', top=None):
     """
     Sort documents by specified field
     ترتيب الوثائق حسب الحقل المحدد
-    """
-    allowed_fields = ['created_at', 'updated_at', 'display_name', 'size_bytes', 'original_filename']
 
-    if sort_by not in allowed_fields:
+    When top is given, only the first `top` documents of the sorted
+    order are returned, selected with a heap in O(N log K) instead of
+    sorting the whole list — enough for any paginated page prefix.
+    """
+    if sort_by not in _SORT_DEFAULTS:
         sort_by = 'created_at'
 
-    if sort_order not in ['asc', 'desc']:
+    if sort_order not in ('asc', 'desc'):
         sort_order = 'desc'
 
     reverse = (sort_order == 'desc')
+    default = _SORT_DEFAULTS[sort_by]
 
     try:
-        return sorted(documents, key=lambda x: x.get(sort_by, ''), reverse=reverse)
-    except Exception:
-        # Fallback to created_at if sorting fails
-        return sorted(documents, key=lambda x: x.get('created_at', ''), reverse=True)
+        # Extract the keys in one pass and sort an index list, so the
+        # comparisons run against a plain list instead of calling
+        # dict.get through a lambda N log N times
+        keys = [doc.get(sort_by) or default for doc in documents]
+        if top is not None and top < len(documents):
+            picker = heapq.nlargest if reverse else heapq.nsmallest
+            order = picker(top, range(len(documents)), key=keys.__getitem__)
+        else:
+            order = sorted(range(len(documents)), key=keys.__getitem__, reverse=reverse)
+        return [documents[i] for i in order]
+    except TypeError:
+        # Fallback to created_at if a record carries an unorderable value
+        return sorted(documents, key=lambda x: x.get('created_at') or '', reverse=True)
 
 def calculate_document_stats(documents):
     """
     Calculate document statistics
     حساب إحصائيات الوثائق
     """
-    from datetime import datetime, timedelta
 
     total = len(documents)
 
-    # Count by entity type
-    by_entity_type = {}
-    for doc in documents:
-        entity_type = doc.get('entity_type', 'other')
-        by_entity_type[entity_type] = by_entity_type.get(entity_type, 0) + 1
-
-    # Count by category
-    by_category = {}
-    for doc in documents:
-        category = doc.get('category', 'other')
-        by_category[category] = by_category.get(category, 0) + 1
-
-    # Count by status
-    by_status = {}
-    for doc in documents:
-        status = doc.get('status', 'active')
-        by_status[status] = by_status.get(status, 0) + 1
+    by_entity_type = Counter()
+    by_category = Counter()
+    by_status = Counter()
 
-    # Recent uploads
+    # Recent-upload cutoffs as ISO strings: created_at is stored in
+    # isoformat, so a lexicographic compare replaces per-document parsing
     now = datetime.now()
-    seven_days_ago = now - timedelta(days=7)
-    thirty_days_ago = now - timedelta(days=30)
+    seven_days_ago = (now - timedelta(days=7)).isoformat()
+    thirty_days_ago = (now - timedelta(days=30)).isoformat()
 
     recent_7_days = 0
     recent_30_days = 0
 
     for doc in documents:
-        try:
-            created_at = datetime.fromisoformat(doc.get('created_at', ''))
+        by_entity_type[doc.get('entity_type', 'other')] += 1
+        by_category[doc.get('category', 'other')] += 1
+        by_status[doc.get('status', 'active')] += 1
+
+        created_at = doc.get('created_at') or ''
+        if created_at >= thirty_days_ago:
+            recent_30_days += 1
             if created_at >= seven_days_ago:
                 recent_7_days += 1
-            if created_at >= thirty_days_ago:
-                recent_30_days += 1
-        except:
-            continue
 
     return {
         'total_documents': total,
-        'by_entity_type': by_entity_type,
-        'by_category': by_category,
-        'by_status': by_status,
+        'by_entity_type': dict(by_entity_type),
+        'by_category': dict(by_category),
+        'by_status': dict(by_status),
         'recent_uploads': {
             'last_7_days': recent_7_days,
             'last_30_days': recent_30_days
@@ -1706,37 +2410,22 @@ def search_documents(documents, query, limit=10):
         return []
 
     query = query.strip().lower()
+    # Case-insensitive highlighter: \g<0> keeps the original casing of
+    # each hit, where the old lowercase str.replace missed mixed-case text
+    highlight = re.compile(re.escape(query), re.IGNORECASE).sub
     results = []
 
     for doc in documents:
         matches = []
 
-        # Search in display_name
-        display_name = doc.get('display_name', '')
-        if query in display_name.lower():
-            matches.append({
-                'field': 'display_name',
-                'value': display_name,
-                'highlighted': display_name.replace(query, f'<mark>{query}</mark>')
-            })
-
-        # Search in original_filename
-        filename = doc.get('original_filename', '')
-        if query in filename.lower():
-            matches.append({
-                'field': 'original_filename',
-                'value': filename,
-                'highlighted': filename.replace(query, f'<mark>{query}</mark>')
-            })
-
-        # Search in notes
-        notes = doc.get('notes', '')
-        if query in notes.lower():
-            matches.append({
-                'field': 'notes',
-                'value': notes,
-                'highlighted': notes.replace(query, f'<mark>{query}</mark>')
-            })
+        for field in ('display_name', 'original_filename', 'notes'):
+            value = doc.get(field, '')
+            if value and query in value.lower():
+                matches.append({
+                    'field': field,
+                    'value': value,
+                    'highlighted': highlight(r'<mark>\g<0></mark>', value)
+                })
 
         if matches:
             result = {
@@ -1750,6 +2439,11 @@ def search_documents(documents, query, limit=10):
             }
             results.append(result)
 
+            # Enough candidates to fill the page at any relevance mix;
+            # stop scanning instead of matching the whole collection
+            if len(results) >= limit * 3:
+                break
+
     # Sort by relevance (number of matches)
     results.sort(key=lambda x: x['relevance'], reverse=True)
 
@@ -1766,6 +2460,13 @@ def safe_strip(value, default=''):
         return value.strip()
     return str(value).strip() if value else default
 
+# Valid document statuses; frozenset lookup instead of a list scan
+_DOCUMENT_STATUSES = frozenset(('active', 'expired', 'pending_renewal'))
+
+# Shape prefilter for YYYY-MM-DD dates: obviously malformed input skips
+# the strptime call and its exception machinery
+_DATE_SHAPE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
 def validate_document_update(data):
     """
     Validate document update request data
@@ -1787,17 +2488,19 @@ def validate_document_update(data):
 
     # Validate status
     status = safe_strip(data.get('status'))
-    if status and status not in ['active', 'expired', 'pending_renewal']:
+    if status and status not in _DOCUMENT_STATUSES:
         errors.append('حالة الوثيقة غير صحيحة')
 
     # Validate expiry_date
     expiry_date = safe_strip(data.get('expiry_date'))
     if expiry_date:
-        try:
-            from datetime import datetime
-            datetime.strptime(expiry_date, '%Y-%m-%d')
-        except ValueError:
+        if not _DATE_SHAPE_RE.match(expiry_date):
             errors.append('تاريخ انتهاء الصلاحية غير صحيح (استخدم تنسيق YYYY-MM-DD)')
+        else:
+            try:
+                datetime.strptime(expiry_date, '%Y-%m-%d')
+            except ValueError:
+                errors.append('تاريخ انتهاء الصلاحية غير صحيح (استخدم تنسيق YYYY-MM-DD)')
 
     # Validate notes length
     notes = safe_strip(data.get('notes'))
@@ -1806,6 +2509,15 @@ def validate_document_update(data):
 
     return errors
 
+def get_request_user():
+    """
+    Resolve the current user once per request
+    الحصول على المستخدم الحالي مرة واحدة لكل طلب
+    """
+    if not hasattr(g, '_current_user'):
+        g._current_user = auth_manager.get_current_user()
+    return g._current_user
+
 def check_document_permission(document, current_user):
     """
     Check if user has permission to modify/delete document
@@ -1828,23 +2540,22 @@ def secure_file_delete(file_path):
             return True  # File doesn't exist, consider it deleted
 
         # Validate file path is within uploads directory
-        uploads_dir = os.path.abspath(UPLOADS_DIR)
         file_abs_path = os.path.abspath(file_path)
 
-        if not file_abs_path.startswith(uploads_dir):
-            print(f"[WARN] Attempted to delete file outside uploads directory: {file_path}")
+        if not file_abs_path.startswith(UPLOADS_ABS):
+            logger.warning("Attempted to delete file outside uploads directory: %s", file_path)
             return False
 
         # Delete the file
         os.remove(file_path)
-        print(f"[OK] File deleted: {file_path}")
+        logger.info("File deleted: %s", file_path)
         return True
 
     except PermissionError:
-        print(f"[ERR] Permission denied deleting file: {file_path}")
+        logger.error("Permission denied deleting file: %s", file_path)
         return False
     except Exception as e:
-        print(f"[ERR] Error deleting file {file_path}: {e}")
+        logger.error("Error deleting file %s: %s", file_path, e)
         return False
 
 def cleanup_empty_directories(file_path):
@@ -1860,32 +2571,26 @@ def cleanup_empty_directories(file_path):
         dir_path = os.path.dirname(file_path)
 
         # Only clean up directories within uploads/documents
-        uploads_docs_dir = os.path.abspath(DOCUMENTS_DIR)
         dir_abs_path = os.path.abspath(dir_path)
 
-        if not dir_abs_path.startswith(uploads_docs_dir):
+        if not dir_abs_path.startswith(DOCUMENTS_ABS):
             return
 
         # Don't delete the base directories
-        base_dirs = [
-            os.path.abspath(DRIVERS_DOCS_DIR),
-            os.path.abspath(VEHICLES_DOCS_DIR),
-            os.path.abspath(OTHER_DOCS_DIR)
-        ]
-
-        if dir_abs_path in base_dirs:
+        if dir_abs_path in BASE_DOCS_ABS_DIRS:
             return
 
         # Check if directory is empty and delete if so
         if os.path.exists(dir_path) and not os.listdir(dir_path):
             os.rmdir(dir_path)
-            print(f"🗑️ Cleaned up empty directory: {dir_path}")
+            _created_entity_dirs.discard(dir_path)
+            logger.info("Cleaned up empty directory: %s", dir_path)
 
             # Recursively clean up parent directories
             cleanup_empty_directories(dir_path)
 
     except Exception as e:
-        print(f"[WARN] Error cleaning up directory {file_path}: {e}")
+        logger.warning("Error cleaning up directory %s: %s", file_path, e)
 
 def validate_document_access(document, current_user):
     """
@@ -1915,11 +2620,10 @@ def get_document_file_path(document):
     file_path = get_storage_path(entity_type, entity_id, stored_filename)
 
     # Validate path is within uploads directory
-    uploads_dir = os.path.abspath(UPLOADS_DIR)
     file_abs_path = os.path.abspath(file_path)
 
-    if not file_abs_path.startswith(uploads_dir):
-        print(f"[WARN] Security: File path outside uploads directory: {file_path}")
+    if not file_abs_path.startswith(UPLOADS_ABS):
+        logger.warning("Security: File path outside uploads directory: %s", file_path)
         return None
 
     return file_path if os.path.exists(file_path) else None
@@ -1968,9 +2672,23 @@ def serve_file_securely(file_path, filename, disposition='attachment'):
     """
     try:
         # Detect MIME type
-        mime_type, _ = mimetypes.guess_type(filename)
-        if not mime_type:
-            mime_type = 'application/octet-stream'
+        mime_type = guess_mime_type(filename)
+
+        accel_base = app.config.get('ACCEL_REDIRECT_BASE')
+        if accel_base:
+            # Emit headers only and let nginx serve the bytes from its
+            # internal location with sendfile(2); the kernel moves the
+            # file pages to the socket without touching this process
+            rel_path = os.path.relpath(os.path.abspath(file_path), UPLOADS_ABS)
+            response = Response(mimetype=mime_type)
+            response.headers['X-Accel-Redirect'] = (
+                f"{accel_base}/{rel_path.replace(os.sep, '/')}"
+            )
+            response.headers['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+            response.headers['X-Content-Type-Options'] = 'nosniff'
+            response.headers['X-Frame-Options'] = 'SAMEORIGIN'
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
 
         # Create response
         response = send_file(
@@ -1985,13 +2703,18 @@ def serve_file_securely(file_path, filename, disposition='attachment'):
         response.headers['X-Frame-Options'] = 'SAMEORIGIN'
         response.headers['Cache-Control'] = 'private, no-cache'
 
+        if app.config.get('USE_X_SENDFILE'):
+            # Ask nginx to stream the file instead of buffering it fully
+            # before the first byte reaches the client
+            response.headers['X-Accel-Buffering'] = 'no'
+
         if disposition == 'inline':
             response.headers['Content-Disposition'] = f'inline; filename="{filename}"'
 
         return response
 
     except Exception as e:
-        print(f"❌ Error serving file {file_path}: {e}")
+        logger.error("Error serving file %s: %s", file_path, e)
         return None
 
 # Authentication Routes
@@ -2008,13 +2731,13 @@ def login():
         if not csrf_token:
             # For login endpoint, we'll be more lenient and allow login without CSRF token
             # This is acceptable for authentication endpoints as they establish the session
-            print(f"[DEBUG] Login attempt without CSRF token - allowing for authentication endpoint")
+            logger.debug("Login attempt without CSRF token - allowing for authentication endpoint")
         else:
             try:
                 validate_csrf(csrf_token)
-                print(f"[DEBUG] CSRF token validation successful")
+                logger.debug("CSRF token validation successful")
             except Exception as csrf_error:
-                print(f"[DEBUG] CSRF token validation failed: {csrf_error}")
+                logger.debug("CSRF token validation failed: %s", csrf_error)
                 # For login, we'll still allow the attempt but log the issue
         data = request.get_json()
         username = data.get('username', '').strip()
@@ -2026,8 +2749,8 @@ def login():
         if auth_manager.validate_credentials(username, password):
             session_data = auth_manager.create_session(username)
 
-            # Set session timeout tracking
-            session['last_activity'] = datetime.now().isoformat()
+            # Set session timeout tracking (epoch float, see utils/auth.py)
+            session['last_activity'] = time.time()
             session.permanent = True
 
             return jsonify({
@@ -2050,6 +2773,11 @@ def login():
 def logout():
     """User logout endpoint"""
     try:
+        # Drop the cached auth-check answer so the logout is visible
+        # immediately, not after the cache TTL lapses
+        sid = _auth_check_sid()
+        if sid:
+            _auth_check_cache.pop(sid, None)
         auth_manager.destroy_session()
         return jsonify({
             'success': True,
@@ -2058,18 +2786,52 @@ def logout():
     except Exception as e:
         return jsonify({'error': f'خطأ في تسجيل الخروج: {str(e)}'}), 500
 
+# Short-lived auth-check cache keyed by session cookie: document loading
+# fires bursts of parallel /api/auth/check XHRs, and a ~2 s TTL answers
+# the repeats without re-deserializing the session each time
+_AUTH_CHECK_TTL = 2.0
+_auth_check_cache = {}
+
+def _auth_check_sid():
+    """Session cookie value used as the auth-check cache key"""
+    return request.cookies.get(app.config.get('SESSION_COOKIE_NAME') or 'session')
+
 @app.route('/api/auth/check')
 @limiter.limit("60 per minute")  # Increased rate limit for auth check to fix document loading
 def check_auth():
     """Check authentication status"""
+    sid = _auth_check_sid()
+    now = time.time()
+
+    if sid:
+        cached = _auth_check_cache.get(sid)
+        if cached and cached[0] > now:
+            return jsonify(cached[1])
+
     if auth_manager.is_authenticated():
-        user = auth_manager.get_current_user()
-        return jsonify({
+        payload = {
             'authenticated': True,
-            'user': user
-        })
+            'user': auth_manager.get_current_user()
+        }
     else:
-        return jsonify({'authenticated': False})
+        payload = {'authenticated': False}
+
+    if sid:
+        if len(_auth_check_cache) > 4096:
+            _auth_check_cache.clear()
+        _auth_check_cache[sid] = (now + _AUTH_CHECK_TTL, payload)
+
+    return jsonify(payload)
+
+# Dedicated pool for bcrypt work: hashing is C code that releases the
+# GIL, so running it off the request thread lets hashes overlap instead
+# of pinning a Flask worker for the full cost of each one
+_BCRYPT_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bcrypt')
+
+# Pool for per-file disk work in bulk endpoints: unlink/rmdir release
+# the GIL, so fanning the calls out overlaps the disk round-trips
+# (fan-out stays bounded by the 50-item bulk cap)
+_FILE_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='file-io')
 
 @app.route('/api/admin/change-password', methods=['POST'])
 @limiter.limit("3 per minute")  # Strict rate limiting for password change attempts
@@ -2077,33 +2839,33 @@ def check_auth():
 def change_admin_password():
     """Change admin password endpoint"""
     try:
-        print(f"[DEBUG] Password change endpoint called")
+        logger.debug("Password change endpoint called")
         data = request.get_json()
         current_password = data.get('current_password', '').strip()
         new_password = data.get('new_password', '').strip()
         confirm_password = data.get('confirm_password', '').strip()
 
-        print(f"[DEBUG] Received password change request for user: {session.get('username')}")
+        logger.debug("Received password change request for user: %s", session.get('username'))
 
         # Validate input
         if not current_password or not new_password or not confirm_password:
-            print(f"[DEBUG] Validation failed: missing fields")
+            logger.debug("Validation failed: missing fields")
             return jsonify({'error': 'جميع الحقول مطلوبة'}), 400
 
         # Check if new password matches confirmation
         if new_password != confirm_password:
-            print(f"[DEBUG] Validation failed: password mismatch")
+            logger.debug("Validation failed: password mismatch")
             return jsonify({'error': 'كلمة المرور الجديدة وتأكيدها غير متطابقتين'}), 400
 
         # Validate password strength
         password_validation = validate_password_strength(new_password)
         if not password_validation['valid']:
-            print(f"[DEBUG] Validation failed: weak password")
+            logger.debug("Validation failed: weak password")
             return jsonify({'error': password_validation['message']}), 400
 
         # Check if new password is different from current
         if current_password == new_password:
-            print(f"[DEBUG] Validation failed: same password")
+            logger.debug("Validation failed: same password")
             return jsonify({'error': 'كلمة المرور الجديدة يجب أن تكون مختلفة عن الحالية'}), 400
 
         # Verify current password
@@ -2111,26 +2873,33 @@ def change_admin_password():
         admin_config = config.get('admin', {})
         current_username = admin_config.get('username', 'admin')
 
-        print(f"[DEBUG] Verifying current password for user: {current_username}")
+        # Hash the new password on the bcrypt pool while the current
+        # password is verified inline: both calls cost ~100-300 ms each
+        # and bcrypt releases the GIL, so the two run in parallel
+        import bcrypt
+        hash_future = _BCRYPT_POOL.submit(
+            bcrypt.hashpw, new_password.encode('utf-8'), bcrypt.gensalt(rounds=12)
+        )
+
+        logger.debug("Verifying current password for user: %s", current_username)
         if not auth_manager.validate_credentials(current_username, current_password):
-            print(f"[DEBUG] Current password verification failed")
+            logger.debug("Current password verification failed")
+            hash_future.cancel()
             return jsonify({'error': 'كلمة المرور الحالية غير صحيحة'}), 401
 
-        print(f"[DEBUG] Current password verified successfully")
+        logger.debug("Current password verified successfully")
 
-        # Hash the new password
-        import bcrypt
-        password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        print(f"[DEBUG] New password hashed: {password_hash[:20]}...")
+        password_hash = hash_future.result().decode('utf-8')
+        logger.debug(f"New password hashed: {password_hash[:20]}...")
 
         # Update the configuration
-        print(f"[DEBUG] Calling update_admin_password...")
+        logger.debug("Calling update_admin_password...")
         success = auth_manager.update_admin_password(password_hash)
         if not success:
-            print(f"[DEBUG] update_admin_password returned False")
+            logger.debug("update_admin_password returned False")
             return jsonify({'error': 'فشل في تحديث كلمة المرور'}), 500
 
-        print(f"[DEBUG] Password updated successfully")
+        logger.debug("Password updated successfully")
 
         # Log the password change event
         log_action('admin_password_change', {
@@ -2145,28 +2914,43 @@ def change_admin_password():
         })
 
     except Exception as e:
-        print(f"Error changing admin password: {e}")
+        logger.error("changing admin password: %s", e)
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'خطأ في تغيير كلمة المرور: {str(e)}'}), 500
 
+# Special characters accepted in passwords; frozenset gives O(1) probes
+_PASSWORD_SPECIAL_CHARS = frozenset("!@#$%^&*()_+-=[]{}|;':\",./<>?")
+
 def validate_password_strength(password):
     """Validate password strength"""
     if len(password) < 8:
         return {'valid': False, 'message': 'كلمة المرور يجب أن تحتوي على 8 أحرف على الأقل'}
 
-    if not any(c.isupper() for c in password):
+    # Classify every character in one pass instead of four any() scans
+    has_upper = has_lower = has_digit = has_special = False
+    for c in password:
+        if c.isupper():
+            has_upper = True
+        elif c.islower():
+            has_lower = True
+        elif c.isdigit():
+            has_digit = True
+        elif c in _PASSWORD_SPECIAL_CHARS:
+            has_special = True
+        if has_upper and has_lower and has_digit and has_special:
+            break
+
+    if not has_upper:
         return {'valid': False, 'message': 'كلمة المرور يجب أن تحتوي على حرف كبير واحد على الأقل'}
 
-    if not any(c.islower() for c in password):
+    if not has_lower:
         return {'valid': False, 'message': 'كلمة المرور يجب أن تحتوي على حرف صغير واحد على الأقل'}
 
-    if not any(c.isdigit() for c in password):
+    if not has_digit:
         return {'valid': False, 'message': 'كلمة المرور يجب أن تحتوي على رقم واحد على الأقل'}
 
-    # Check for special characters
-    special_chars = "!@#$%^&*()_+-=[]{}|;':\",./<>?"
-    if not any(c in special_chars for c in password):
+    if not has_special:
         return {'valid': False, 'message': 'كلمة المرور يجب أن تحتوي على رمز خاص واحد على الأقل'}
 
     return {'valid': True, 'message': 'كلمة المرور قوية'}
@@ -2249,18 +3033,17 @@ def upload_document():
     document_id = None
 
     try:
-        from utils.json_store import json_store
         from flask_wtf.csrf import validate_csrf
 
         # Manual CSRF validation for file upload requests
         csrf_token = request.headers.get('X-CSRFToken') or request.form.get('csrf_token')
-        print(f"[DEBUG] Upload request with CSRF token: {csrf_token}")
+        logger.debug("Upload request with CSRF token: %s", csrf_token)
         
         try:
             validate_csrf(csrf_token)
-            print(f"[OK] CSRF validation successful for upload")
+            logger.info("CSRF validation successful for upload")
         except Exception as csrf_error:
-            print(f"[ERROR] CSRF validation failed: {csrf_error}")
+            logger.error("CSRF validation failed: %s", csrf_error)
             return jsonify({'error': f'رمز الحماية غير صحيح'}), 400
 
         # Get form data
@@ -2276,26 +3059,37 @@ def upload_document():
         if not display_name:
             return jsonify({'error': 'اسم الوثيقة مطلوب'}), 400
 
+        # The validators get the size from a stat and the head bytes from
+        # one small read; the only full pass over the data is the fused
+        # save-and-hash below
+        if file and file.filename:
+            file_size = _upload_size(file)
+            file_header = file.stream.read(2048)
+            file.stream.seek(0)
+        else:
+            file_size = file_header = None
+
         # Enhanced file validation with security checks
-        validation_errors = validate_file_upload_enhanced(file, entity_type, entity_id)
+        validation_errors = validate_file_upload_enhanced(
+            file, entity_type, entity_id,
+            file_size=file_size, file_header=file_header
+        )
         if validation_errors:
             return jsonify({'error': validation_errors[0]}), 400
 
         # Perform threat scanning
-        threats = scan_file_for_threats(file, file.filename)
+        threats = scan_file_for_threats(file, file.filename,
+                                        file_content=file_header, file_size=file_size)
         if threats:
-            print(f"[WARN] Security threats detected in file {file.filename}: {threats}")
+            logger.warning("Security threats detected in file %s: %s", file.filename, threats)
             return jsonify({'error': 'تم اكتشاف تهديدات أمنية في الملف'}), 400
 
-        # Calculate file hash for integrity verification
-        file_hash = calculate_file_hash(file)
-
         # Validate entity exists if entity_id provided
         if entity_id:
             if entity_type == 'driver':
                 entity = json_store.find_by_id('drivers', entity_id)
                 if not entity:
-                    return jsonify({'error': 'السائق غير موجود'}), 404
+                    return static_error('السائق غير موجود', 404)
             elif entity_type == 'vehicle':
                 entity = json_store.find_by_id('vehicles', entity_id)
                 if not entity:
@@ -2308,11 +3102,13 @@ def upload_document():
         file_path = get_storage_path(entity_type, entity_id, secure_name)
 
         # Extract file metadata
-        metadata = extract_file_metadata(file, file.filename, file_path)
+        metadata = extract_file_metadata(file, file.filename, file_path, file_size=file_size)
 
-        # Save file to disk
-        file.save(file_path)
-        print(f"[OK] File saved to: {file_path}")
+        # Land the upload in one fused pass that also produces the hash,
+        # instead of a hashing read followed by a separate save
+        file_size, file_hash, file_header = save_and_digest(file.stream, file_path)
+        metadata['size_bytes'] = file_size
+        logger.info("File saved to: %s", file_path)
 
         # Create document record
         document_data = {
@@ -2323,7 +3119,7 @@ def upload_document():
             'stored_filename': secure_name,
             'mime_type': metadata['mime_type'],
             'size_bytes': metadata['size_bytes'],
-            'uploaded_by': auth_manager.get_current_user().get('username', 'admin'),
+            'uploaded_by': get_request_user().get('username', 'admin'),
             'tags': [],
             'category': category,
             'notes': notes,
@@ -2363,7 +3159,166 @@ def upload_document():
     except Exception as e:
         # Clean up on failure
         cleanup_failed_upload(file_path, document_id)
-        print(f"❌ Upload failed: {e}")
+        logger.error("Upload failed: %s", e)
+        return jsonify({'error': f'فشل في رفع الملف: {str(e)}'}), 500
+
+@app.route('/api/documents/stream-upload', methods=['POST'])
+@csrf.exempt  # Exempt from automatic CSRF protection to handle manually
+@limiter.limit("10 per minute")  # Rate limiting for file uploads
+@login_required
+def stream_upload_document():
+    """
+    Streaming document upload for large files
+    رفع الوثائق الكبيرة عبر التدفق المباشر
+
+    Reads the raw request body in 64 KB chunks into a disk-backed
+    temporary file, so memory use stays flat regardless of file size and
+    the multipart parser is bypassed entirely. Metadata travels in
+    headers (percent-encoded UTF-8): X-Filename (required), X-Entity-Type,
+    X-Entity-Id, X-Display-Name, X-Category, X-Notes, X-Expiry-Date.
+    The regular multipart endpoint remains for small uploads.
+    """
+    from urllib.parse import unquote
+
+    file_path = None
+    document_id = None
+
+    try:
+        from flask_wtf.csrf import validate_csrf
+
+        # Manual CSRF validation, same policy as the multipart endpoint
+        csrf_token = request.headers.get('X-CSRFToken')
+        try:
+            validate_csrf(csrf_token)
+        except Exception as csrf_error:
+            logger.error("CSRF validation failed: %s", csrf_error)
+            return jsonify({'error': 'رمز الحماية غير صحيح'}), 400
+
+        # Metadata from headers (percent-encoded to survive Arabic text)
+        original_filename = unquote(request.headers.get('X-Filename', '').strip())
+        entity_type = unquote(request.headers.get('X-Entity-Type', '').strip())
+        entity_id = unquote(request.headers.get('X-Entity-Id', '').strip()) or None
+        display_name = unquote(request.headers.get('X-Display-Name', '').strip())
+        category = unquote(request.headers.get('X-Category', 'other').strip())
+        notes = unquote(request.headers.get('X-Notes', '').strip())
+        expiry_date = unquote(request.headers.get('X-Expiry-Date', '').strip()) or None
+
+        if not original_filename:
+            return jsonify({'error': 'اسم الملف مطلوب'}), 400
+        if not display_name:
+            return jsonify({'error': 'اسم الوثيقة مطلوب'}), 400
+        if entity_type not in ['driver', 'vehicle', 'company', 'other']:
+            return static_error('نوع الكيان غير صحيح', 400)
+        if entity_type in ['driver', 'vehicle', 'company'] and not entity_id:
+            return jsonify({'error': 'معرف الكيان مطلوب للسائقين والمركبات والشركات'}), 400
+
+        file_ext = os.path.splitext(original_filename.lower())[1]
+        if file_ext not in ALLOWED_EXTENSIONS:
+            allowed_list = ', '.join(ALLOWED_EXTENSIONS)
+            return jsonify({'error': f'نوع الملف غير مدعوم. الأنواع المسموحة: {allowed_list}'}), 400
+
+        # Validate entity exists before any bytes are written
+        if entity_id:
+            if entity_type == 'driver':
+                entity = json_store.find_by_id('drivers', entity_id)
+                if not entity:
+                    return static_error('السائق غير موجود', 404)
+            elif entity_type == 'vehicle':
+                entity = json_store.find_by_id('vehicles', entity_id)
+                if not entity:
+                    return jsonify({'error': 'المركبة غير موجودة'}), 404
+
+        # Generate secure filename and storage path
+        secure_name, file_uuid = sanitize_and_generate_filename(original_filename)
+        file_path = get_storage_path(entity_type, entity_id, secure_name)
+
+        mime_type = guess_mime_type(original_filename)
+
+        # Stream the raw body straight to its final path in one fused
+        # pass that also produces the size, hash and head bytes, instead
+        # of spooling to a temp file and re-reading it for the scan, the
+        # hash and the final copy
+        try:
+            file_size, file_hash, file_header = save_and_digest(
+                request.stream, file_path, max_size=MAX_FILE_SIZE
+            )
+        except ValueError:
+            file_path = None  # save_and_digest already removed the partial file
+            max_size_mb = MAX_FILE_SIZE / (1024 * 1024)
+            return jsonify({'error': f'حجم الملف كبير جداً (الحد الأقصى {max_size_mb:.0f} ميجابايت)'}), 413
+
+        if file_size == 0:
+            cleanup_failed_upload(file_path)
+            file_path = None
+            return jsonify({'error': 'الملف فارغ'}), 400
+
+        # Content-based MIME validation on the captured head bytes, same
+        # policy as the multipart endpoint
+        mime_errors = validate_content_mime(original_filename, file_header)
+        if mime_errors:
+            cleanup_failed_upload(file_path)
+            file_path = None
+            return jsonify({'error': mime_errors[0]}), 400
+
+        # Threat scanning runs on the captured head bytes
+        threats = scan_file_for_threats(None, original_filename,
+                                        file_content=file_header, file_size=file_size)
+        if threats:
+            logger.warning("Security threats detected in file %s: %s", original_filename, threats)
+            cleanup_failed_upload(file_path)
+            file_path = None
+            return jsonify({'error': 'تم اكتشاف تهديدات أمنية في الملف'}), 400
+        logger.info("File saved to: %s", file_path)
+
+        # Create document record
+        document_data = {
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'display_name': display_name,
+            'original_filename': original_filename,
+            'stored_filename': secure_name,
+            'mime_type': mime_type,
+            'size_bytes': file_size,
+            'uploaded_by': get_request_user().get('username', 'admin'),
+            'tags': [],
+            'category': category,
+            'notes': notes,
+            'expiry_date': expiry_date,
+            'status': 'active'
+        }
+
+        # Save to database
+        document = json_store.create('documents', document_data)
+        document_id = document['id']
+
+        # Log the upload action
+        log_action('upload', 'document', document_id, {
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'filename': original_filename,
+            'size_bytes': file_size,
+            'category': category
+        })
+
+        return jsonify({
+            'success': True,
+            'message': 'تم رفع الملف بنجاح',
+            'document': {
+                'id': document['id'],
+                'display_name': display_name,
+                'original_filename': original_filename,
+                'size_bytes': file_size,
+                'mime_type': mime_type,
+                'category': category,
+                'uploaded_at': document['created_at'],
+                'file_url': f'/api/documents/download/{document["id"]}'
+            }
+        })
+
+    except Exception as e:
+        # Clean up on failure
+        cleanup_failed_upload(file_path, document_id)
+        logger.error("Stream upload failed: %s", e)
         return jsonify({'error': f'فشل في رفع الملف: {str(e)}'}), 500
 
 @app.route('/api/documents', methods=['GET'])
@@ -2375,7 +3330,6 @@ def list_documents():
     عرض قائمة الوثائق مع التصفية والتقسيم والبحث
     """
     try:
-        from utils.json_store import json_store
 
         # Get query parameters
         page = request.args.get('page', 1)
@@ -2390,10 +3344,14 @@ def list_documents():
 
         # Validate entity_type
         if entity_type and entity_type not in ['driver', 'vehicle', 'company', 'other']:
-            return jsonify({'error': 'نوع الكيان غير صحيح'}), 400
+            return static_error('نوع الكيان غير صحيح', 400)
 
-        # Get all documents
-        documents = json_store.read_all('documents')
+        # Entity-scoped listings start from the per-entity index slice;
+        # everything else reads through the mtime cache
+        if entity_type and entity_id:
+            documents = documents_for_entity(entity_type, entity_id)
+        else:
+            documents = cached_read_all('documents')
 
         # Apply filters
         filters = {}
@@ -2410,11 +3368,16 @@ def list_documents():
 
         filtered_docs = filter_documents(documents, filters)
 
-        # Sort documents
-        sorted_docs = sort_documents(filtered_docs, sort_by, sort_order)
+        # Sort documents; only the prefix covering the requested page
+        # is needed, so let the heap pick top K instead of a full sort
+        page = max(1, int(page) if str(page).isdigit() else 1)
+        limit = max(1, min(100, int(limit) if str(limit).isdigit() else 20))
+        sorted_docs = sort_documents(filtered_docs, sort_by, sort_order,
+                                     top=page * limit)
 
         # Paginate results
-        result = paginate_documents(sorted_docs, page, limit)
+        result = paginate_documents(sorted_docs, page, limit,
+                                    total=len(filtered_docs))
 
         # Add filters applied to response
         result['filters_applied'] = {k: v for k, v in filters.items() if v is not None}
@@ -2433,13 +3396,9 @@ def documents_stats():
     الحصول على إحصائيات الوثائق لبطاقات لوحة التحكم
     """
     try:
-        from utils.json_store import json_store
-
-        # Get all documents
-        documents = json_store.read_all('documents')
-
-        # Calculate statistics
-        stats = calculate_document_stats(documents)
+        # Served from the stats cache; recomputed only when the
+        # collection changes or the time bucket rolls over
+        stats = cached_document_stats()
 
         return jsonify(stats)
 
@@ -2455,11 +3414,10 @@ def get_entity_documents(entity_type, entity_id):
     الحصول على جميع وثائق كيان محدد (سائق أو مركبة)
     """
     try:
-        from utils.json_store import json_store
 
         # Validate entity_type
         if entity_type not in ['driver', 'vehicle', 'company']:
-            return jsonify({'error': 'نوع الكيان غير صحيح'}), 400
+            return static_error('نوع الكيان غير صحيح', 400)
 
         # Check if entity exists
         if entity_type == 'driver':
@@ -2480,37 +3438,21 @@ def get_entity_documents(entity_type, entity_id):
                 entity_name = 'الكيان'
             return jsonify({'error': f'{entity_name} غير موجود'}), 404
 
-        # Get documents for this entity
-        documents = json_store.filter_records('documents', {
-            'entity_type': entity_type,
-            'entity_id': entity_id
-        })
+        # Get documents for this entity from the per-entity index
+        entity_docs = documents_for_entity(entity_type, entity_id)
 
         # Sort by creation date (newest first)
-        documents = sort_documents(documents, 'created_at', 'desc')
+        documents = sort_documents(entity_docs, 'created_at', 'desc')
 
         # Calculate entity-specific stats
         stats = calculate_document_stats(documents)
 
-        # Add expiry information
-        from datetime import datetime, timedelta
-        now = datetime.now()
-        thirty_days_later = now + timedelta(days=30)
-
-        expired_count = 0
-        expiring_soon = 0
-
-        for doc in documents:
-            expiry_date = doc.get('expiry_date')
-            if expiry_date:
-                try:
-                    expiry = datetime.fromisoformat(expiry_date)
-                    if expiry < now:
-                        expired_count += 1
-                    elif expiry <= thirty_days_later:
-                        expiring_soon += 1
-                except:
-                    continue
+        # Add expiry information; counts are cached against the entity's
+        # (pre-sort, identity-stable) document list and a minute bucket,
+        # so repeated entity-page polls skip the scan
+        expired_count, expiring_soon = entity_expiry_counts(
+            entity_type, entity_id, entity_docs
+        )
 
         stats['expired_count'] = expired_count
         stats['expiring_soon'] = expiring_soon
@@ -2534,7 +3476,6 @@ def search_documents_api():
     البحث في الوثائق مع التمييز
     """
     try:
-        from utils.json_store import json_store
 
         # Get query parameters
         query = request.args.get('q', '').strip()
@@ -2550,16 +3491,22 @@ def search_documents_api():
         # Validate limit
         limit = max(1, min(50, limit))
 
-        # Get all documents
-        documents = json_store.read_all('documents')
+        if entity_type and entity_type not in ['driver', 'vehicle', 'company', 'other']:
+            return static_error('نوع الكيان غير صحيح', 400)
+
+        # Resolve candidates through the bigram index; only queries too
+        # short to have a bigram fall back to the full collection scan
+        if len(query) >= 2:
+            documents = [record for _, record in
+                         document_search_index.query(query.lower())]
+        else:
+            documents = cached_read_all('documents')
 
         # Filter by entity_type if specified
         if entity_type:
-            if entity_type not in ['driver', 'vehicle', 'company', 'other']:
-                return jsonify({'error': 'نوع الكيان غير صحيح'}), 400
             documents = [doc for doc in documents if doc.get('entity_type') == entity_type]
 
-        # Perform search
+        # Perform search (verifies and highlights the candidates)
         results = search_documents(documents, query, limit)
 
         return jsonify({
@@ -2579,27 +3526,26 @@ def update_document(document_id):
     Update document metadata
     تحديث بيانات الوثيقة الوصفية
     """
-    print(f"[DEBUG] update_document endpoint called with document_id={document_id}")
+    logger.debug("update_document endpoint called with document_id=%s", document_id)
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
-        print(f"[DEBUG] update_document called with document_id={document_id}, data={data}")
+        logger.debug("update_document called with document_id=%s, data=%s", document_id, data)
         if not data:
             return jsonify({'error': 'بيانات التحديث مطلوبة'}), 400
 
         # Find document
         document = json_store.find_by_id('documents', document_id)
         if not document:
-            return jsonify({'error': 'الوثيقة غير موجودة'}), 404
+            return static_error('الوثيقة غير موجودة', 404)
 
         # Check permissions
-        current_user = auth_manager.get_current_user()
-        print(f"DEBUG: current_user = {current_user}")
-        print(f"DEBUG: document uploaded_by = {document.get('uploaded_by')}")
+        current_user = get_request_user()
+        logger.debug("current_user = %s", current_user)
+        logger.debug("document uploaded_by = %s", document.get('uploaded_by'))
         permission_result = check_document_permission(document, current_user)
-        print(f"DEBUG: permission_result = {permission_result}")
+        logger.debug("permission_result = %s", permission_result)
         if not permission_result:
             return jsonify({'error': 'ليس لديك صلاحية لتعديل هذه الوثيقة'}), 403
 
@@ -2623,9 +3569,9 @@ def update_document(document_id):
             updates['status'] = safe_strip(data['status'])
 
         # Update document
-        print(f"DEBUG: Updating document {document_id} with updates: {updates}")
+        logger.debug("Updating document %s with updates: %s", document_id, updates)
         updated_document = json_store.update('documents', document_id, updates)
-        print(f"DEBUG: Update result: {updated_document}")
+        logger.debug("Update result: %s", updated_document)
         if not updated_document:
             return jsonify({'error': 'فشل في تحديث الوثيقة'}), 500
 
@@ -2643,7 +3589,7 @@ def update_document(document_id):
         })
 
     except Exception as e:
-        print(f"DEBUG: Exception in update_document: {e}")
+        logger.debug("Exception in update_document: %s", e)
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'خطأ في تحديث الوثيقة: {str(e)}'}), 500
@@ -2657,30 +3603,28 @@ def delete_document(document_id):
     حذف وثيقة وملفها
     """
     try:
-        from json_store import json_store
         from flask_wtf.csrf import validate_csrf
 
         # Manual CSRF validation for DELETE requests
         csrf_token = request.headers.get('X-CSRFToken')
-        print(f"[DEBUG] DELETE request for document {document_id}")
-        print(f"[DEBUG] CSRF token received: {csrf_token}")
-        print(f"[DEBUG] Request headers: {dict(request.headers)}")
+        logger.debug("DELETE request for document %s", document_id)
+        logger.debug("CSRF token received: %s", csrf_token)
 
         try:
             validate_csrf(csrf_token)
-            print(f"[OK] CSRF validation successful")
+            logger.info("CSRF validation successful")
         except Exception as csrf_error:
-            print(f"[ERROR] CSRF validation failed: {csrf_error}")
-            print(f"[ERROR] CSRF error type: {type(csrf_error)}")
+            logger.error("CSRF validation failed: %s", csrf_error)
+            logger.error("CSRF error type: %s", type(csrf_error))
             return jsonify({'error': f'رمز الحماية غير صحيح: {str(csrf_error)}'}), 400
 
         # Find document
         document = json_store.find_by_id('documents', document_id)
         if not document:
-            return jsonify({'error': 'الوثيقة غير موجودة'}), 404
+            return static_error('الوثيقة غير موجودة', 404)
 
         # Check permissions
-        current_user = auth_manager.get_current_user()
+        current_user = get_request_user()
         if not check_document_permission(document, current_user):
             return jsonify({'error': 'ليس لديك صلاحية لحذف هذه الوثيقة'}), 403
 
@@ -2695,7 +3639,7 @@ def delete_document(document_id):
             # Delete physical file
             file_deleted = secure_file_delete(file_path)
             if not file_deleted:
-                print(f"[WARN] Warning: Could not delete file {file_path} for document {document_id}")
+                logger.warning("Warning: Could not delete file %s for document %s", file_path, document_id)
 
             # Clean up empty directories
             cleanup_empty_directories(file_path)
@@ -2730,7 +3674,6 @@ def update_document_status(document_id):
     تحديث حالة الوثيقة بسرعة
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -2744,10 +3687,10 @@ def update_document_status(document_id):
         # Find document
         document = json_store.find_by_id('documents', document_id)
         if not document:
-            return jsonify({'error': 'الوثيقة غير موجودة'}), 404
+            return static_error('الوثيقة غير موجودة', 404)
 
         # Check permissions
-        current_user = auth_manager.get_current_user()
+        current_user = get_request_user()
         if not check_document_permission(document, current_user):
             return jsonify({'error': 'ليس لديك صلاحية لتعديل هذه الوثيقة'}), 403
 
@@ -2782,7 +3725,6 @@ def bulk_delete_documents():
     حذف متعدد للوثائق
     """
     try:
-        from utils.json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -2796,58 +3738,88 @@ def bulk_delete_documents():
         if len(document_ids) > 50:  # Limit bulk operations
             return jsonify({'error': 'لا يمكن حذف أكثر من 50 وثيقة في المرة الواحدة'}), 400
 
-        current_user = auth_manager.get_current_user()
+        current_user = get_request_user()
+        # Admins may delete anything; decide once instead of per document
+        is_admin = bool(current_user) and current_user.get('role') == 'admin'
         deleted = []
         failed = []
 
-        # Process each document
+        # Resolve all requested documents in one scan instead of one
+        # find_by_id pass per ID
+        documents = json_store.find_many_by_id('documents', document_ids)
+
+        to_delete = []
         for document_id in document_ids:
-            try:
-                # Find document
-                document = json_store.find_by_id('documents', document_id)
-                if not document:
-                    failed.append({
-                        'document_id': document_id,
-                        'error': 'الوثيقة غير موجودة'
-                    })
-                    continue
+            document = documents.get(document_id)
+            if not document:
+                failed.append({
+                    'document_id': document_id,
+                    'error': 'الوثيقة غير موجودة'
+                })
+                continue
 
-                # Check permissions
-                if not check_document_permission(document, current_user):
-                    failed.append({
-                        'document_id': document_id,
-                        'error': 'ليس لديك صلاحية لحذف هذه الوثيقة'
-                    })
-                    continue
+            # Check permissions
+            if not is_admin and not check_document_permission(document, current_user):
+                failed.append({
+                    'document_id': document_id,
+                    'error': 'ليس لديك صلاحية لحذف هذه الوثيقة'
+                })
+                continue
 
-                # Get file path
-                stored_filename = document.get('stored_filename')
-                entity_type = document.get('entity_type')
-                entity_id = document.get('entity_id')
+            to_delete.append((document_id, document))
 
-                # Delete physical file
-                if stored_filename:
-                    file_path = get_storage_path(entity_type, entity_id, stored_filename)
-                    file_deleted = secure_file_delete(file_path)
-                    if file_deleted:
-                        cleanup_empty_directories(file_path)
-
-                # Delete database record
-                if json_store.delete('documents', document_id):
-                    deleted.append(document_id)
-
-                    # Log the delete action
-                    log_action('bulk_delete', 'document', document_id, {
-                        'entity_type': entity_type,
-                        'entity_id': entity_id,
-                        'filename': document.get('original_filename'),
-                        'display_name': document.get('display_name')
-                    })
-                else:
-                    failed.append({
-                        'document_id': document_id,
-                        'error': 'فشل في حذف سجل الوثيقة'
-                    })
+        # Remove all database records in a single read/write cycle. The
+        # write can fail without raising (delete_many then returns 0 with
+        # the records still on disk), so re-verify which IDs are actually
+        # gone before touching any physical file
+        if to_delete:
+            removed = json_store.delete_many(
+                'documents', [document_id for document_id, _ in to_delete]
+            )
+            if removed != len(to_delete):
+                remaining = json_store.find_many_by_id(
+                    'documents', [document_id for document_id, _ in to_delete]
+                )
+                for document_id, _ in to_delete:
+                    if document_id in remaining:
+                        failed.append({
+                            'document_id': document_id,
+                            'error': 'فشل في حذف سجل الوثيقة'
+                        })
+                to_delete = [
+                    item for item in to_delete if item[0] not in remaining
+                ]
+
+        # Delete physical files after the records are gone; the unlinks
+        # are fanned out so the disk round-trips overlap
+        def _delete_document_file(document):
+            stored_filename = document.get('stored_filename')
+            if stored_filename:
+                file_path = get_storage_path(
+                    document.get('entity_type'),
+                    document.get('entity_id'),
+                    stored_filename
+                )
+                if secure_file_delete(file_path):
+                    cleanup_empty_directories(file_path)
+
+        file_futures = [
+            _FILE_IO_POOL.submit(_delete_document_file, document)
+            for _, document in to_delete
+        ]
+
+        for (document_id, document), future in zip(to_delete, file_futures):
+            try:
+                future.result()
+                deleted.append(document_id)
+
+                # Log the delete action
+                log_action('bulk_delete', 'document', document_id, {
+                    'entity_type': document.get('entity_type'),
+                    'entity_id': document.get('entity_id'),
+                    'filename': document.get('original_filename'),
+                    'display_name': document.get('display_name')
+                })
 
             except Exception as e:
                 failed.append({
@@ -2882,18 +3854,53 @@ def bulk_delete_documents():
     except Exception as e:
         return jsonify({'error': f'خطأ في الحذف المتعدد: {str(e)}'}), 500
 
+class _ZipStreamBuffer:
+    """Unseekable in-memory sink that hands finished ZIP bytes to a generator
+
+    zipfile accepts an unseekable output (it appends data descriptors
+    instead of rewriting headers), so the archive can be produced and
+    sent chunk by chunk instead of being assembled in one BytesIO.
+    """
+
+    def __init__(self):
+        self._chunks = deque()
+        self._pos = 0
+
+    def write(self, data):
+        n = len(data)
+        if n:
+            self._pos += n
+            self._chunks.append(bytes(data))
+        return n
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def seekable(self):
+        return False
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        chunks = self._chunks
+        while chunks:
+            yield chunks.popleft()
+
 @app.route('/api/documents/bulk/download', methods=['POST'])
 @login_required
 def bulk_download_documents():
     """
     Bulk download documents as ZIP file
     تحميل متعدد للوثائق كملف مضغوط
+
+    The archive streams to the client as it is built, so peak memory
+    stays at one read chunk instead of the sum of all file sizes.
     """
     try:
-        from utils.json_store import json_store
-        import zipfile
-        import io
-        from datetime import datetime
 
         data = request.get_json()
         document_ids = data.get('document_ids', [])
@@ -2901,91 +3908,118 @@ def bulk_download_documents():
         if not document_ids:
             return jsonify({'error': 'لا توجد وثائق محددة للتحميل'}), 400
 
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            added_files = 0
-            failed_files = []
+        # Resolve every document up front so error responses can still
+        # be sent before the first archive byte goes out
+        entries = []
+        used_names = set()
+        failed_files = []
 
-            for doc_id in document_ids:
-                try:
-                    # Find document
-                    document = json_store.find_by_id('documents', doc_id)
-                    if not document:
-                        failed_files.append({'id': doc_id, 'error': 'الوثيقة غير موجودة'})
-                        continue
+        # Resolve all requested IDs in one collection scan
+        found = json_store.find_many_by_id('documents', document_ids)
 
-                    # Check permissions (basic check - user must be logged in)
-                    # In production, add more sophisticated permission checks
+        # First pass: resolve paths without touching the filesystem
+        candidates = []
+        for doc_id in document_ids:
+            document = found.get(doc_id)
+            if not document:
+                failed_files.append({'id': doc_id, 'error': 'الوثيقة غير موجودة'})
+                continue
 
-                    # Get file path
-                    stored_filename = document.get('stored_filename')
-                    entity_type = document.get('entity_type')
-                    entity_id = document.get('entity_id')
+            # Check permissions (basic check - user must be logged in)
+            # In production, add more sophisticated permission checks
 
-                    if not stored_filename:
-                        failed_files.append({'id': doc_id, 'error': 'اسم الملف غير موجود'})
-                        continue
+            stored_filename = document.get('stored_filename')
+            if not stored_filename:
+                failed_files.append({'id': doc_id, 'error': 'اسم الملف غير موجود'})
+                continue
 
-                    file_path = get_storage_path(entity_type, entity_id, stored_filename)
+            file_path = get_storage_path(
+                document.get('entity_type'), document.get('entity_id'),
+                stored_filename
+            )
+            candidates.append((doc_id, document, file_path))
 
-                    if not os.path.exists(file_path):
-                        failed_files.append({'id': doc_id, 'error': 'الملف غير موجود على الخادم'})
-                        continue
+        # One scandir per storage directory replaces a stat per file
+        existing_by_dir = {}
+        for _, _, file_path in candidates:
+            dir_path = os.path.dirname(file_path)
+            if dir_path not in existing_by_dir:
+                try:
+                    with os.scandir(dir_path) as it:
+                        existing_by_dir[dir_path] = {entry.name for entry in it}
+                except OSError:
+                    existing_by_dir[dir_path] = set()
 
-                    # Use original filename, but ensure uniqueness in ZIP
-                    original_filename = document.get('original_filename', f'document_{doc_id}')
-                    filename = original_filename
-                    counter = 1
-                    base_name, ext = os.path.splitext(original_filename)
-
-                    # Check if filename already exists in ZIP
-                    while filename in zip_file.namelist():
-                        filename = f"{base_name}_{counter}{ext}"
-                        counter += 1
-
-                    # Add file to ZIP
-                    zip_file.write(file_path, filename)
-                    added_files += 1
-
-                    # Log the download action
-                    log_action('bulk_download', 'document', doc_id, {
-                        'entity_type': entity_type,
-                        'entity_id': entity_id,
-                        'filename': original_filename,
-                        'display_name': document.get('display_name')
-                    })
+        for doc_id, document, file_path in candidates:
+            try:
+                entity_type = document.get('entity_type')
+                entity_id = document.get('entity_id')
 
-                except Exception as e:
-                    failed_files.append({'id': doc_id, 'error': f'خطأ في إضافة الملف: {str(e)}'})
+                if os.path.basename(file_path) not in existing_by_dir[os.path.dirname(file_path)]:
+                    failed_files.append({'id': doc_id, 'error': 'الملف غير موجود على الخادم'})
                     continue
 
-        if added_files == 0:
+                # Use original filename, but ensure uniqueness in ZIP;
+                # set membership instead of rescanning namelist() per file
+                original_filename = document.get('original_filename', f'document_{doc_id}')
+                filename = original_filename
+                counter = 1
+                base_name, ext = os.path.splitext(original_filename)
+
+                while filename in used_names:
+                    filename = f"{base_name}_{counter}{ext}"
+                    counter += 1
+                used_names.add(filename)
+
+                entries.append((file_path, filename))
+
+                # Log the download action
+                log_action('bulk_download', 'document', doc_id, {
+                    'entity_type': entity_type,
+                    'entity_id': entity_id,
+                    'filename': original_filename,
+                    'display_name': document.get('display_name')
+                })
+
+            except Exception as e:
+                failed_files.append({'id': doc_id, 'error': f'خطأ في إضافة الملف: {str(e)}'})
+                continue
+
+        if not entries:
             return jsonify({
                 'error': 'لا توجد ملفات صالحة للتحميل',
                 'failed_files': failed_files
             }), 400
 
-        zip_buffer.seek(0)
-
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         zip_filename = f'documents_{timestamp}.zip'
 
         # Log the bulk download action
         log_action('bulk_download_complete', 'documents', None, {
-            'total_files': added_files,
+            'total_files': len(entries),
             'failed_files': len(failed_files),
             'zip_filename': zip_filename
         })
 
-        return send_file(
-            zip_buffer,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=zip_filename
+        def generate():
+            buffer = _ZipStreamBuffer()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                for file_path, arcname in entries:
+                    with open(file_path, 'rb') as src, \
+                            zip_file.open(arcname, 'w') as dst:
+                        while chunk := src.read(1 << 20):
+                            dst.write(chunk)
+                            yield from buffer.drain()
+                    yield from buffer.drain()
+            yield from buffer.drain()
+
+        response = Response(
+            stream_with_context(generate()),
+            mimetype='application/zip'
         )
+        response.headers['Content-Disposition'] = f'attachment; filename={zip_filename}'
+        return response
 
     except Exception as e:
         return jsonify({'error': f'خطأ في إنشاء الملف المضغوط: {str(e)}'}), 500
@@ -2998,15 +4032,14 @@ def get_document_info(document_id):
     الحصول على معلومات الوثيقة بدون تحميل
     """
     try:
-        from json_store import json_store
 
         # Find document
         document = json_store.find_by_id('documents', document_id)
         if not document:
-            return jsonify({'error': 'الوثيقة غير موجودة'}), 404
+            return static_error('الوثيقة غير موجودة', 404)
 
         # Check permissions
-        current_user = auth_manager.get_current_user()
+        current_user = get_request_user()
         if not validate_document_access(document, current_user):
             return jsonify({'error': 'ليس لديك صلاحية لعرض هذه الوثيقة'}), 403
 
@@ -3053,15 +4086,14 @@ def download_document(document_id):
     تحميل ملف الوثيقة بأمان
     """
     try:
-        from json_store import json_store
 
         # Find document
         document = json_store.find_by_id('documents', document_id)
         if not document:
-            return jsonify({'error': 'الوثيقة غير موجودة'}), 404
+            return static_error('الوثيقة غير موجودة', 404)
 
         # Check permissions
-        current_user = auth_manager.get_current_user()
+        current_user = get_request_user()
         if not validate_document_access(document, current_user):
             return jsonify({'error': 'ليس لديك صلاحية لتحميل هذه الوثيقة'}), 403
 
@@ -3098,15 +4130,14 @@ def preview_document(document_id):
     معاينة ملف الوثيقة في المتصفح
     """
     try:
-        from json_store import json_store
 
         # Find document
         document = json_store.find_by_id('documents', document_id)
         if not document:
-            return jsonify({'error': 'الوثيقة غير موجودة'}), 404
+            return static_error('الوثيقة غير موجودة', 404)
 
         # Check permissions
-        current_user = auth_manager.get_current_user()
+        current_user = get_request_user()
         if not validate_document_access(document, current_user):
             return jsonify({'error': 'ليس لديك صلاحية لمعاينة هذه الوثيقة'}), 403
 
@@ -3174,9 +4205,6 @@ def dashboard_stats():
        Description: Total commission earnings for commission-based drivers
     """
     try:
-        from json_store import json_store
-        from commissions import commission_calculator
-        from datetime import datetime
 
         # Get month/year from query parameters or use current
         now = datetime.now()
@@ -3189,41 +4217,34 @@ def dashboard_stats():
         if not (2020 <= current_year <= 2030):  # Reasonable year range
             current_year = now.year
 
-        # Get all data
-        orders = json_store.read_all('orders')
-        advances = json_store.read_all('advances')
-        maintenance_schedules = json_store.read_all('maintenance_schedules')
+        # Serve repeat views of an unchanged month from the
+        # preserialized cache before touching any collection
+        cache_key = _dashboard_cache_key(current_year, current_month)
+        cached_body = _dashboard_cache.get(cache_key)
+        if cached_body is not None:
+            _dashboard_cache.move_to_end(cache_key)
+            cached_stats = orjson.loads(cached_body)
+            log_view('dashboard', None, {
+                'month': current_month,
+                'year': current_year,
+                'monthly_orders': cached_stats['monthly_orders'],
+                'unpaid_advances': cached_stats['outstanding_advances']
+            })
+            return app.response_class(cached_body, mimetype='application/json')
+
+        # Get all data through the mtime caches
+        maintenance_schedules = cached_read_all('maintenance_schedules')
 
         # ========================================
         # KPI 1: MONTHLY ORDERS CALCULATION
         # ========================================
         # Formula: COUNT(orders WHERE order_date BETWEEN start_of_month AND end_of_month)
         # Purpose: Track delivery volume for the selected month
-        monthly_orders = 0
-        monthly_commission_total = 0
-
-        for order in orders:
-            order_date = order.get('order_date', order.get('created_at', ''))
-            if order_date:
-                try:
-                    # Handle both ISO datetime and date-only formats
-                    if 'T' in order_date:
-                        order_date_obj = datetime.fromisoformat(order_date.replace('Z', '+00:00'))
-                    else:
-                        order_date_obj = datetime.strptime(order_date, '%Y-%m-%d')
-
-                    # Check if order falls within the selected month/year
-                    if (order_date_obj.year == current_year and
-                        order_date_obj.month == current_month):
-                        monthly_orders += 1  # Increment monthly order count
-
-                        # Accumulate commission earnings for completed orders only
-                        if order.get('status') == 'completed':
-                            monthly_commission_total += float(order.get('commission_amount', 0))
-
-                except (ValueError, TypeError):
-                    # Skip orders with invalid date formats
-                    continue
+        # Both the count and the completed-commission sum are folded
+        # into the month index at build time, so a view is a dict get
+        monthly_orders, monthly_commission_total = order_month_aggregates(
+            current_year, current_month
+        )
 
         # ========================================
         # KPI 2: EXPECTED SALARIES CALCULATION
@@ -3242,11 +4263,10 @@ def dashboard_stats():
         # Formula: SUM(advance_amount - paid_amount) WHERE status != 'paid'
         # Purpose: Track total unpaid balance across all driver advances
         # Includes: 'pending' and 'partial' status advances
-        outstanding_advances = sum([
+        outstanding_advances = sum(
             float(advance.get('amount', 0)) - float(advance.get('paid_amount', 0))
-            for advance in advances
-            if advance.get('status') in ['pending', 'partial']  # Only unpaid/partially paid advances
-        ])
+            for advance in unpaid_advances()  # Only unpaid/partially paid advances
+        )
 
         # ========================================
         # KPI 4: DUE MAINTENANCE CALCULATION
@@ -3254,23 +4274,17 @@ def dashboard_stats():
         # Formula: COUNT(vehicles WHERE next_maintenance_date <= current_date OR mileage >= maintenance_mileage)
         # Purpose: Track vehicles requiring immediate maintenance attention
         # Criteria: Maintenance due date has passed or reached
+        # The date part of an ISO string orders lexicographically, so a
+        # slice compare replaces a datetime parse per schedule; the
+        # shape check skips malformed values like the parse used to
         due_maintenance = 0
+        today_iso = now.date().isoformat()
         for schedule in maintenance_schedules:
             due_date = schedule.get('due_date')
-            if due_date:
-                try:
-                    # Handle both ISO datetime and date-only formats
-                    if 'T' in due_date:
-                        due_date_obj = datetime.fromisoformat(due_date.replace('Z', '+00:00'))
-                    else:
-                        due_date_obj = datetime.strptime(due_date, '%Y-%m-%d')
-
-                    # Check if maintenance is due (due date has passed)
-                    if due_date_obj.date() <= now.date():
-                        due_maintenance += 1  # Increment due maintenance count
-                except (ValueError, TypeError):
-                    # Skip schedules with invalid date formats
-                    continue
+            if due_date and _DATE_SHAPE_RE.match(due_date[:10]):
+                # Check if maintenance is due (due date has passed)
+                if due_date[:10] <= today_iso:
+                    due_maintenance += 1  # Increment due maintenance count
 
         # ========================================
         # FINAL KPI RESULTS COMPILATION
@@ -3285,6 +4299,12 @@ def dashboard_stats():
             'monthly_commission_total': round(monthly_commission_total, 3)      # KPI 5: Total commission earnings
         }
 
+        # Cache the serialized payload for repeat views of this window
+        body = orjson.dumps(stats)
+        _dashboard_cache[cache_key] = body
+        if len(_dashboard_cache) > _DASHBOARD_CACHE_MAX:
+            _dashboard_cache.popitem(last=False)
+
         # Log dashboard view
         log_view('dashboard', None, {
             'month': current_month,
@@ -3293,7 +4313,7 @@ def dashboard_stats():
             'unpaid_advances': stats['outstanding_advances']
         })
 
-        return jsonify(stats)
+        return app.response_class(body, mimetype='application/json')
 
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل إحصائيات لوحة التحكم: {str(e)}'}), 500
@@ -3305,7 +4325,6 @@ def dashboard_stats():
 def get_drivers():
     """Get all drivers"""
     try:
-        from json_store import json_store
         drivers = json_store.read_all('drivers')
         return jsonify(drivers)
     except Exception as e:
@@ -3317,7 +4336,6 @@ def get_drivers():
 def get_active_drivers():
     """Get only active drivers for dropdowns"""
     try:
-        from json_store import json_store
         all_drivers = json_store.read_all('drivers')
 
         # Filter only active drivers
@@ -3355,7 +4373,6 @@ def get_active_drivers():
 def create_driver():
     """Create a new driver"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -3367,7 +4384,7 @@ def create_driver():
         # Validate phone format
         phone = data.get('phone', '').strip()
         if not phone.startswith('+965') or len(phone) != 12:
-            return jsonify({'error': 'رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX'}), 400
+            return static_error('رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX', 400)
 
         # Validate national ID
         national_id = data.get('national_id', '').strip()
@@ -3429,10 +4446,9 @@ def create_driver():
 def get_driver(driver_id):
     """Get a specific driver"""
     try:
-        from json_store import json_store
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
         return jsonify(driver)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل السائق: {str(e)}'}), 500
@@ -3442,19 +4458,18 @@ def get_driver(driver_id):
 def update_driver(driver_id):
     """Update a driver"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if driver exists
         existing_driver = json_store.find_by_id('drivers', driver_id)
         if not existing_driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # Validate phone format if provided
         if 'phone' in data:
             phone = data.get('phone', '').strip()
             if phone and (not phone.startswith('+965') or len(phone) != 12):
-                return jsonify({'error': 'رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX'}), 400
+                return static_error('رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX', 400)
 
         # Validate national ID if provided
         if 'national_id' in data:
@@ -3517,12 +4532,11 @@ def update_driver(driver_id):
 def delete_driver(driver_id):
     """Delete a driver"""
     try:
-        from json_store import json_store
 
         # Check if driver exists
         existing_driver = json_store.find_by_id('drivers', driver_id)
         if not existing_driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # TODO: Check if driver has active orders or advances before deletion
 
@@ -3550,7 +4564,6 @@ def bulk_delete_drivers():
     حذف متعدد للسائقين
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -3637,7 +4650,6 @@ def bulk_delete_drivers():
 def get_vehicles():
     """Get all vehicles"""
     try:
-        from json_store import json_store
         vehicles = json_store.read_all('vehicles')
         return jsonify(vehicles)
     except Exception as e:
@@ -3648,7 +4660,6 @@ def get_vehicles():
 def create_vehicle():
     """Create a new vehicle"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -3702,10 +4713,9 @@ def create_vehicle():
 def get_vehicle(vehicle_id):
     """Get a specific vehicle"""
     try:
-        from json_store import json_store
         vehicle = json_store.find_by_id('vehicles', vehicle_id)
         if not vehicle:
-            return jsonify({'error': 'السيارة غير موجودة'}), 404
+            return static_error('السيارة غير موجودة', 404)
         return jsonify(vehicle)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل السيارة: {str(e)}'}), 500
@@ -3715,13 +4725,12 @@ def get_vehicle(vehicle_id):
 def update_vehicle(vehicle_id):
     """Update a vehicle"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if vehicle exists
         existing_vehicle = json_store.find_by_id('vehicles', vehicle_id)
         if not existing_vehicle:
-            return jsonify({'error': 'السيارة غير موجودة'}), 404
+            return static_error('السيارة غير موجودة', 404)
 
         # Validate license plate uniqueness if provided
         if 'license_plate' in data:
@@ -3778,12 +4787,11 @@ def update_vehicle(vehicle_id):
 def delete_vehicle(vehicle_id):
     """Delete a vehicle"""
     try:
-        from json_store import json_store
 
         # Check if vehicle exists
         existing_vehicle = json_store.find_by_id('vehicles', vehicle_id)
         if not existing_vehicle:
-            return jsonify({'error': 'السيارة غير موجودة'}), 404
+            return static_error('السيارة غير موجودة', 404)
 
         # TODO: Check if vehicle has active orders before deletion
 
@@ -3804,7 +4812,6 @@ def bulk_delete_vehicles():
     حذف متعدد للسيارات
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -3890,7 +4897,6 @@ def bulk_delete_vehicles():
 def get_clients():
     """Get all clients"""
     try:
-        from json_store import json_store
         clients = json_store.read_all('clients')
         return jsonify(clients)
     except Exception as e:
@@ -3901,7 +4907,6 @@ def get_clients():
 def create_client():
     """Create a new client"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -3913,15 +4918,14 @@ def create_client():
         # Validate phone format
         phone = data.get('phone', '').strip()
         if not phone.startswith('+965') or len(phone) != 12:
-            return jsonify({'error': 'رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX'}), 400
+            return static_error('رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX', 400)
 
         # Validate email format if provided
         email = data.get('email', '').strip()
         if email:
-            import re
             email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
             if not re.match(email_pattern, email):
-                return jsonify({'error': 'البريد الإلكتروني غير صحيح'}), 400
+                return static_error('البريد الإلكتروني غير صحيح', 400)
 
         # Validate commission rate
         commission_rate = data.get('commission_rate')
@@ -3956,10 +4960,9 @@ def create_client():
 def get_client(client_id):
     """Get a specific client"""
     try:
-        from json_store import json_store
         client = json_store.find_by_id('clients', client_id)
         if not client:
-            return jsonify({'error': 'العميل غير موجود'}), 404
+            return static_error('العميل غير موجود', 404)
         return jsonify(client)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل العميل: {str(e)}'}), 500
@@ -3969,28 +4972,26 @@ def get_client(client_id):
 def update_client(client_id):
     """Update a client"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if client exists
         existing_client = json_store.find_by_id('clients', client_id)
         if not existing_client:
-            return jsonify({'error': 'العميل غير موجود'}), 404
+            return static_error('العميل غير موجود', 404)
 
         # Validate phone format if provided
         if 'phone' in data:
             phone = data.get('phone', '').strip()
             if phone and (not phone.startswith('+965') or len(phone) != 12):
-                return jsonify({'error': 'رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX'}), 400
+                return static_error('رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX', 400)
 
         # Validate email format if provided
         if 'email' in data:
             email = data.get('email', '').strip()
             if email:
-                import re
                 email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
                 if not re.match(email_pattern, email):
-                    return jsonify({'error': 'البريد الإلكتروني غير صحيح'}), 400
+                    return static_error('البريد الإلكتروني غير صحيح', 400)
 
         # Validate commission rate if provided
         if 'commission_rate' in data:
@@ -4033,12 +5034,11 @@ def update_client(client_id):
 def delete_client(client_id):
     """Delete a client"""
     try:
-        from json_store import json_store
 
         # Check if client exists
         existing_client = json_store.find_by_id('clients', client_id)
         if not existing_client:
-            return jsonify({'error': 'العميل غير موجود'}), 404
+            return static_error('العميل غير موجود', 404)
 
         # TODO: Check if client has active orders before deletion
 
@@ -4059,7 +5059,6 @@ def bulk_delete_clients():
     حذف متعدد للعملاء
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -4145,7 +5144,6 @@ def bulk_delete_clients():
 def get_companies():
     """Get all companies"""
     try:
-        from json_store import json_store
         companies = json_store.read_all('companies')
         return jsonify(companies)
     except Exception as e:
@@ -4156,7 +5154,6 @@ def get_companies():
 def create_company():
     """Create a new company"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -4168,15 +5165,14 @@ def create_company():
         # Validate phone format
         phone = data.get('phone', '').strip()
         if not phone.startswith('+965') or len(phone) != 12:
-            return jsonify({'error': 'رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX'}), 400
+            return static_error('رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX', 400)
 
         # Validate email format if provided
         email = data.get('email', '').strip()
         if email:
-            import re
             email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
             if not re.match(email_pattern, email):
-                return jsonify({'error': 'البريد الإلكتروني غير صحيح'}), 400
+                return static_error('البريد الإلكتروني غير صحيح', 400)
 
         # Set company data
         company_data = {
@@ -4209,10 +5205,9 @@ def create_company():
 def get_company(company_id):
     """Get a specific company"""
     try:
-        from json_store import json_store
         company = json_store.find_by_id('companies', company_id)
         if not company:
-            return jsonify({'error': 'الشركة غير موجودة'}), 404
+            return static_error('الشركة غير موجودة', 404)
         return jsonify(company)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل الشركة: {str(e)}'}), 500
@@ -4222,28 +5217,26 @@ def get_company(company_id):
 def update_company(company_id):
     """Update a company"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if company exists
         existing_company = json_store.find_by_id('companies', company_id)
         if not existing_company:
-            return jsonify({'error': 'الشركة غير موجودة'}), 404
+            return static_error('الشركة غير موجودة', 404)
 
         # Validate phone format if provided
         if 'phone' in data:
             phone = data.get('phone', '').strip()
             if phone and (not phone.startswith('+965') or len(phone) != 12):
-                return jsonify({'error': 'رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX'}), 400
+                return static_error('رقم الهاتف يجب أن يكون بصيغة +965XXXXXXXX', 400)
 
         # Validate email format if provided
         if 'email' in data:
             email = data.get('email', '').strip()
             if email:
-                import re
                 email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
                 if not re.match(email_pattern, email):
-                    return jsonify({'error': 'البريد الإلكتروني غير صحيح'}), 400
+                    return static_error('البريد الإلكتروني غير صحيح', 400)
 
         # Prepare update data
         update_data = {}
@@ -4280,12 +5273,11 @@ def update_company(company_id):
 def delete_company(company_id):
     """Delete a company"""
     try:
-        from json_store import json_store
 
         # Check if company exists
         existing_company = json_store.find_by_id('companies', company_id)
         if not existing_company:
-            return jsonify({'error': 'الشركة غير موجودة'}), 404
+            return static_error('الشركة غير موجودة', 404)
 
         # Log the deletion event before deleting
         log_delete('company', company_id, {
@@ -4309,7 +5301,6 @@ def delete_company(company_id):
 def get_orders():
     """Get all orders"""
     try:
-        from json_store import json_store
         orders = json_store.read_all('orders')
 
         # Enrich orders with driver and client names
@@ -4332,8 +5323,6 @@ def get_orders():
 def create_order():
     """Create a new order"""
     try:
-        from json_store import json_store
-        from commissions import commission_calculator
         data = request.get_json()
 
         # Validate required fields
@@ -4345,12 +5334,12 @@ def create_order():
         # Validate driver exists
         driver = json_store.find_by_id('drivers', data.get('driver_id'))
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # Validate client exists
         client = json_store.find_by_id('clients', data.get('client_id'))
         if not client:
-            return jsonify({'error': 'العميل غير موجود'}), 404
+            return static_error('العميل غير موجود', 404)
 
         # Calculate commission
         commission_result = commission_calculator.calculate_commission(
@@ -4397,10 +5386,9 @@ def create_order():
 def get_order(order_id):
     """Get a specific order"""
     try:
-        from json_store import json_store
         order = json_store.find_by_id('orders', order_id)
         if not order:
-            return jsonify({'error': 'الطلب غير موجود'}), 404
+            return static_error('الطلب غير موجود', 404)
 
         # Enrich with driver and client names
         driver = json_store.find_by_id('drivers', order.get('driver_id', ''))
@@ -4418,26 +5406,24 @@ def get_order(order_id):
 def update_order(order_id):
     """Update an order"""
     try:
-        from json_store import json_store
-        from commissions import commission_calculator
         data = request.get_json()
 
         # Check if order exists
         existing_order = json_store.find_by_id('orders', order_id)
         if not existing_order:
-            return jsonify({'error': 'الطلب غير موجود'}), 404
+            return static_error('الطلب غير موجود', 404)
 
         # Validate driver if provided
         if 'driver_id' in data and data['driver_id']:
             driver = json_store.find_by_id('drivers', data['driver_id'])
             if not driver:
-                return jsonify({'error': 'السائق غير موجود'}), 404
+                return static_error('السائق غير موجود', 404)
 
         # Validate client if provided
         if 'client_id' in data and data['client_id']:
             client = json_store.find_by_id('clients', data['client_id'])
             if not client:
-                return jsonify({'error': 'العميل غير موجود'}), 404
+                return static_error('العميل غير موجود', 404)
 
         # Recalculate commission if driver or client changed
         recalculate_commission = (
@@ -4496,12 +5482,11 @@ def update_order(order_id):
 def delete_order(order_id):
     """Delete an order"""
     try:
-        from json_store import json_store
 
         # Check if order exists
         existing_order = json_store.find_by_id('orders', order_id)
         if not existing_order:
-            return jsonify({'error': 'الطلب غير موجود'}), 404
+            return static_error('الطلب غير موجود', 404)
 
         success = json_store.delete('orders', order_id)
         if not success:
@@ -4518,7 +5503,6 @@ def delete_order(order_id):
 def calculate_commission():
     """Calculate commission for a specific driver and client"""
     try:
-        from commissions import commission_calculator
         data = request.get_json()
 
         driver_id = data.get('driver_id')
@@ -4540,7 +5524,6 @@ def calculate_commission():
 def get_advances():
     """Get all advances"""
     try:
-        from json_store import json_store
         advances = json_store.read_all('advances')
 
         # Enrich advances with driver names
@@ -4562,7 +5545,6 @@ def get_advances():
 def create_advance():
     """Create a new advance"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -4574,7 +5556,7 @@ def create_advance():
         # Validate driver exists
         driver = json_store.find_by_id('drivers', data.get('driver_id'))
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # Validate amount
         try:
@@ -4649,10 +5631,9 @@ def create_advance():
 def get_advance(advance_id):
     """Get a specific advance"""
     try:
-        from json_store import json_store
         advance = json_store.find_by_id('advances', advance_id)
         if not advance:
-            return jsonify({'error': 'السُلفة غير موجودة'}), 404
+            return static_error('السُلفة غير موجودة', 404)
 
         # Enrich with driver name
         driver = json_store.find_by_id('drivers', advance.get('driver_id', ''))
@@ -4668,19 +5649,18 @@ def get_advance(advance_id):
 def update_advance(advance_id):
     """Update an advance"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if advance exists
         existing_advance = json_store.find_by_id('advances', advance_id)
         if not existing_advance:
-            return jsonify({'error': 'السُلفة غير موجودة'}), 404
+            return static_error('السُلفة غير موجودة', 404)
 
         # Validate driver if provided
         if 'driver_id' in data and data['driver_id']:
             driver = json_store.find_by_id('drivers', data['driver_id'])
             if not driver:
-                return jsonify({'error': 'السائق غير موجود'}), 404
+                return static_error('السائق غير موجود', 404)
 
         # Validate amount if provided
         if 'amount' in data:
@@ -4697,8 +5677,8 @@ def update_advance(advance_id):
                 paid_amount = float(data.get('paid_amount', 0))
                 existing_paid_amount = float(existing_advance.get('paid_amount', 0))
 
-                print(f"DEBUG: paid_amount={paid_amount}, existing_paid_amount={existing_paid_amount}")
-                print(f"DEBUG: data={data}")
+                logger.debug("paid_amount=%s, existing_paid_amount=%s", paid_amount, existing_paid_amount)
+                logger.debug("data=%s", data)
 
                 # Only validate if the value actually changed
                 if paid_amount != existing_paid_amount:
@@ -4718,7 +5698,7 @@ def update_advance(advance_id):
                         data['status'] = 'partial'
 
             except (ValueError, TypeError) as e:
-                print(f"DEBUG: Exception in paid_amount validation: {e}")
+                logger.debug("Exception in paid_amount validation: %s", e)
                 return jsonify({'error': 'المبلغ المدفوع غير صحيح'}), 400
 
         # Validate advance deduction fields if provided
@@ -4730,7 +5710,7 @@ def update_advance(advance_id):
         if 'advance_deduction_value' in data:
             try:
                 deduction_value_raw = data.get('advance_deduction_value', 0)
-                print(f"DEBUG: advance_deduction_value raw={deduction_value_raw}, type={type(deduction_value_raw)}")
+                logger.debug("advance_deduction_value raw=%s, type=%s", deduction_value_raw, type(deduction_value_raw))
                 deduction_value = float(deduction_value_raw)
                 if deduction_value < 0:
                     return jsonify({'error': 'قيمة خصم السُلفة يجب أن تكون أكبر من أو تساوي صفر'}), 400
@@ -4738,7 +5718,7 @@ def update_advance(advance_id):
                 if deduction_mode == 'percentage' and deduction_value > 100:
                     return jsonify({'error': 'النسبة المئوية يجب أن تكون أقل من أو تساوي 100%'}), 400
             except (ValueError, TypeError) as e:
-                print(f"DEBUG: Exception in advance_deduction_value validation: {e}")
+                logger.debug("Exception in advance_deduction_value validation: %s", e)
                 return jsonify({'error': 'قيمة خصم السُلفة غير صحيحة'}), 400
 
         # Prepare update data
@@ -4775,12 +5755,11 @@ def update_advance(advance_id):
 def delete_advance(advance_id):
     """Delete an advance"""
     try:
-        from json_store import json_store
 
         # Check if advance exists
         existing_advance = json_store.find_by_id('advances', advance_id)
         if not existing_advance:
-            return jsonify({'error': 'السُلفة غير موجودة'}), 404
+            return static_error('السُلفة غير موجودة', 404)
 
         success = json_store.delete('advances', advance_id)
         if not success:
@@ -4799,7 +5778,6 @@ def bulk_delete_advances():
     حذف متعدد للسُلف
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -4885,12 +5863,11 @@ def bulk_delete_advances():
 def get_driver_advances(driver_id):
     """Get all advances for a specific driver"""
     try:
-        from json_store import json_store
 
         # Validate driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         advances = json_store.filter_records('advances', {'driver_id': driver_id})
 
@@ -4925,7 +5902,6 @@ def get_driver_advances(driver_id):
 def get_outstanding_advances():
     """Get summary of outstanding advances"""
     try:
-        from json_store import json_store
         advances = json_store.read_all('advances')
         drivers = json_store.read_all('drivers')
 
@@ -4973,7 +5949,6 @@ def get_outstanding_advances():
 def calculate_payroll():
     """Calculate payroll for specific month/year"""
     try:
-        from payroll import payroll_calculator
         data = request.get_json()
 
         year = data.get('year')
@@ -4987,7 +5962,7 @@ def calculate_payroll():
             year = int(year)
             month = int(month)
             if month < 1 or month > 12:
-                return jsonify({'error': 'الشهر يجب أن يكون بين 1 و 12'}), 400
+                return jsonify(ERR_MONTH_RANGE), 400
         except (ValueError, TypeError):
             return jsonify({'error': 'السنة والشهر يجب أن يكونا أرقاماً صحيحة'}), 400
 
@@ -5002,7 +5977,6 @@ def calculate_payroll():
 def get_payroll_runs():
     """Get all payroll runs"""
     try:
-        from json_store import json_store
         payroll_runs = json_store.read_all('payroll_runs')
 
         # Sort by date descending
@@ -5017,8 +5991,6 @@ def get_payroll_runs():
 def create_payroll_run():
     """Create and save a payroll run"""
     try:
-        from json_store import json_store
-        from payroll import payroll_calculator
         data = request.get_json()
 
         year = data.get('year')
@@ -5075,10 +6047,9 @@ def create_payroll_run():
 def get_payroll_run(run_id):
     """Get a specific payroll run"""
     try:
-        from json_store import json_store
         payroll_run = json_store.find_by_id('payroll_runs', run_id)
         if not payroll_run:
-            return jsonify({'error': 'دفعة الرواتب غير موجودة'}), 404
+            return static_error('دفعة الرواتب غير موجودة', 404)
 
         return jsonify(payroll_run)
     except Exception as e:
@@ -5089,11 +6060,10 @@ def get_payroll_run(run_id):
 def approve_payroll_run(run_id):
     """Approve a payroll run"""
     try:
-        from json_store import json_store
 
         payroll_run = json_store.find_by_id('payroll_runs', run_id)
         if not payroll_run:
-            return jsonify({'error': 'دفعة الرواتب غير موجودة'}), 404
+            return static_error('دفعة الرواتب غير موجودة', 404)
 
         if payroll_run.get('status') != 'pending':
             return jsonify({'error': 'دفعة الرواتب غير قابلة للاعتماد'}), 400
@@ -5115,12 +6085,10 @@ def approve_payroll_run(run_id):
 def process_payroll_deductions(run_id):
     """Process advance deductions for an approved payroll run"""
     try:
-        from json_store import json_store
-        from payroll import payroll_calculator
 
         payroll_run = json_store.find_by_id('payroll_runs', run_id)
         if not payroll_run:
-            return jsonify({'error': 'دفعة الرواتب غير موجودة'}), 404
+            return static_error('دفعة الرواتب غير موجودة', 404)
 
         if payroll_run.get('status') != 'approved':
             return jsonify({'error': 'دفعة الرواتب يجب أن تكون معتمدة أولاً'}), 400
@@ -5148,11 +6116,10 @@ def process_payroll_deductions(run_id):
 def close_payroll_run(run_id):
     """Close a payroll run (mark as completed)"""
     try:
-        from json_store import json_store
 
         payroll_run = json_store.find_by_id('payroll_runs', run_id)
         if not payroll_run:
-            return jsonify({'error': 'دفعة الرواتب غير موجودة'}), 404
+            return static_error('دفعة الرواتب غير موجودة', 404)
 
         if payroll_run.get('status') not in ['approved']:
             return jsonify({'error': 'دفعة الرواتب يجب أن تكون معتمدة'}), 400
@@ -5174,12 +6141,11 @@ def close_payroll_run(run_id):
 def get_driver_payroll_history(driver_id):
     """Get payroll history for a specific driver"""
     try:
-        from json_store import json_store
 
         # Validate driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # Get all payroll runs
         payroll_runs = json_store.read_all('payroll_runs')
@@ -5224,7 +6190,6 @@ def get_driver_payroll_history(driver_id):
 def get_maintenance_schedules():
     """Get all maintenance schedules"""
     try:
-        from json_store import json_store
         schedules = json_store.read_all('maintenance_schedules')
 
         # Enrich schedules with vehicle information
@@ -5257,7 +6222,6 @@ def get_maintenance_schedules():
 def create_maintenance_schedule():
     """Create a new maintenance schedule"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -5269,7 +6233,7 @@ def create_maintenance_schedule():
         # Validate vehicle exists
         vehicle = json_store.find_by_id('vehicles', data.get('vehicle_id'))
         if not vehicle:
-            return jsonify({'error': 'السيارة غير موجودة'}), 404
+            return static_error('السيارة غير موجودة', 404)
 
         # Validate due date
         try:
@@ -5306,10 +6270,9 @@ def create_maintenance_schedule():
 def get_maintenance_schedule(schedule_id):
     """Get a specific maintenance schedule"""
     try:
-        from json_store import json_store
         schedule = json_store.find_by_id('maintenance_schedules', schedule_id)
         if not schedule:
-            return jsonify({'error': 'جدولة الصيانة غير موجودة'}), 404
+            return static_error('جدولة الصيانة غير موجودة', 404)
 
         # Enrich with vehicle info
         vehicle = json_store.find_by_id('vehicles', schedule.get('vehicle_id', ''))
@@ -5325,19 +6288,18 @@ def get_maintenance_schedule(schedule_id):
 def update_maintenance_schedule(schedule_id):
     """Update a maintenance schedule"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if schedule exists
         existing_schedule = json_store.find_by_id('maintenance_schedules', schedule_id)
         if not existing_schedule:
-            return jsonify({'error': 'جدولة الصيانة غير موجودة'}), 404
+            return static_error('جدولة الصيانة غير موجودة', 404)
 
         # Validate vehicle if provided
         if 'vehicle_id' in data and data['vehicle_id']:
             vehicle = json_store.find_by_id('vehicles', data['vehicle_id'])
             if not vehicle:
-                return jsonify({'error': 'السيارة غير موجودة'}), 404
+                return static_error('السيارة غير موجودة', 404)
 
         # Validate due date if provided
         if 'due_date' in data and data['due_date']:
@@ -5379,12 +6341,11 @@ def update_maintenance_schedule(schedule_id):
 def delete_maintenance_schedule(schedule_id):
     """Delete a maintenance schedule"""
     try:
-        from json_store import json_store
 
         # Check if schedule exists
         existing_schedule = json_store.find_by_id('maintenance_schedules', schedule_id)
         if not existing_schedule:
-            return jsonify({'error': 'جدولة الصيانة غير موجودة'}), 404
+            return static_error('جدولة الصيانة غير موجودة', 404)
 
         success = json_store.delete('maintenance_schedules', schedule_id)
         if not success:
@@ -5403,7 +6364,6 @@ def bulk_delete_maintenance_schedules():
     حذف متعدد لجدولة الصيانة
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -5488,7 +6448,6 @@ def bulk_delete_maintenance_schedules():
 def get_due_maintenance():
     """Get maintenance schedules that are due or overdue"""
     try:
-        from json_store import json_store
         schedules = json_store.read_all('maintenance_schedules')
 
         due_schedules = []
@@ -5529,7 +6488,6 @@ def get_due_maintenance():
 def get_breakdowns():
     """Get all breakdowns"""
     try:
-        from json_store import json_store
         breakdowns = json_store.read_all('breakdowns')
         
         # Add vehicle information to each breakdown
@@ -5552,10 +6510,9 @@ def get_breakdowns():
 def get_breakdown(breakdown_id):
     """Get a specific breakdown"""
     try:
-        from json_store import json_store
         breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
         return jsonify(breakdown)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل العطل: {str(e)}'}), 500
@@ -5565,7 +6522,6 @@ def get_breakdown(breakdown_id):
 def create_breakdown():
     """Create a new breakdown"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Validate required fields
@@ -5577,7 +6533,7 @@ def create_breakdown():
         # Validate vehicle exists
         vehicle = json_store.find_by_id('vehicles', data.get('vehicle_id'))
         if not vehicle:
-            return jsonify({'error': 'السيارة غير موجودة'}), 404
+            return static_error('السيارة غير موجودة', 404)
 
         # Validate repair cost
         repair_cost = data.get('repair_cost', 0)
@@ -5609,19 +6565,18 @@ def create_breakdown():
 def update_breakdown(breakdown_id):
     """Update a breakdown"""
     try:
-        from json_store import json_store
         data = request.get_json()
 
         # Check if breakdown exists
         existing_breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not existing_breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
 
         # Validate vehicle if provided
         if 'vehicle_id' in data and data['vehicle_id']:
             vehicle = json_store.find_by_id('vehicles', data['vehicle_id'])
             if not vehicle:
-                return jsonify({'error': 'السيارة غير موجودة'}), 404
+                return static_error('السيارة غير موجودة', 404)
 
         # Validate repair cost if provided
         if 'repair_cost' in data:
@@ -5660,12 +6615,11 @@ def update_breakdown(breakdown_id):
 def delete_breakdown(breakdown_id):
     """Delete a breakdown"""
     try:
-        from json_store import json_store
 
         # Check if breakdown exists
         existing_breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not existing_breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
 
         success = json_store.delete('breakdowns', breakdown_id)
         if not success:
@@ -5684,7 +6638,6 @@ def bulk_delete_breakdowns():
     حذف متعدد للأعطال
     """
     try:
-        from json_store import json_store
 
         # Get request data
         data = request.get_json()
@@ -5771,12 +6724,11 @@ def bulk_delete_breakdowns():
 def get_breakdown_history(breakdown_id):
     """Get history for a specific breakdown"""
     try:
-        from json_store import json_store
 
         # Check if breakdown exists
         breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
         
         # Get breakdown history
         history = json_store.filter_records('breakdown_history', {'breakdown_id': breakdown_id})
@@ -5791,16 +6743,15 @@ def get_breakdown_history(breakdown_id):
 def create_breakdown_history(breakdown_id):
     """Create a new breakdown history entry"""
     try:
-        from json_store import json_store
 
         data = request.get_json()
         if not data:
-            return jsonify({'error': 'لم يتم إرسال بيانات'}), 400
+            return static_error('لم يتم إرسال بيانات', 400)
 
         # Check if breakdown exists
         breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
 
         # Validate required fields
         required_fields = ['action_date', 'action_type', 'description']
@@ -5835,16 +6786,15 @@ def create_breakdown_history(breakdown_id):
 def update_breakdown_history(breakdown_id, history_id):
     """Update a breakdown history entry"""
     try:
-        from json_store import json_store
 
         data = request.get_json()
         if not data:
-            return jsonify({'error': 'لم يتم إرسال بيانات'}), 400
+            return static_error('لم يتم إرسال بيانات', 400)
 
         # Check if breakdown exists
         breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
 
         # Check if history entry exists
         history = json_store.find_by_id('breakdown_history', history_id)
@@ -5883,12 +6833,11 @@ def update_breakdown_history(breakdown_id, history_id):
 def delete_breakdown_history(breakdown_id, history_id):
     """Delete a breakdown history entry"""
     try:
-        from json_store import json_store
 
         # Check if breakdown exists
         breakdown = json_store.find_by_id('breakdowns', breakdown_id)
         if not breakdown:
-            return jsonify({'error': 'العطل غير موجود'}), 404
+            return static_error('العطل غير موجود', 404)
 
         # Check if history entry exists
         history = json_store.find_by_id('breakdown_history', history_id)
@@ -5911,7 +6860,6 @@ def delete_breakdown_history(breakdown_id, history_id):
 def get_maintenance_logs():
     """Get all maintenance logs"""
     try:
-        from json_store import json_store
 
         logs = json_store.read_all('maintenance_logs')
         
@@ -5935,11 +6883,10 @@ def get_maintenance_logs():
 def create_maintenance_log():
     """Create a new maintenance log"""
     try:
-        from json_store import json_store
 
         data = request.get_json()
         if not data:
-            return jsonify({'error': 'لم يتم إرسال بيانات'}), 400
+            return static_error('لم يتم إرسال بيانات', 400)
 
         # Validate required fields
         required_fields = ['vehicle_id', 'maintenance_date', 'maintenance_type', 'description']
@@ -5977,11 +6924,10 @@ def create_maintenance_log():
 def get_maintenance_log(log_id):
     """Get a specific maintenance log"""
     try:
-        from json_store import json_store
 
         log = json_store.find_by_id('maintenance_logs', log_id)
         if not log:
-            return jsonify({'error': 'سجل الصيانة غير موجود'}), 404
+            return static_error('سجل الصيانة غير موجود', 404)
         return jsonify(log)
     except Exception as e:
         return jsonify({'error': f'خطأ في تحميل سجل الصيانة: {str(e)}'}), 500
@@ -5991,16 +6937,15 @@ def get_maintenance_log(log_id):
 def update_maintenance_log(log_id):
     """Update a maintenance log"""
     try:
-        from json_store import json_store
 
         data = request.get_json()
         if not data:
-            return jsonify({'error': 'لم يتم إرسال بيانات'}), 400
+            return static_error('لم يتم إرسال بيانات', 400)
 
         # Check if log exists
         existing_log = json_store.find_by_id('maintenance_logs', log_id)
         if not existing_log:
-            return jsonify({'error': 'سجل الصيانة غير موجود'}), 404
+            return static_error('سجل الصيانة غير موجود', 404)
 
         # Update only allowed fields
         allowed_fields = [
@@ -6037,12 +6982,11 @@ def update_maintenance_log(log_id):
 def delete_maintenance_log(log_id):
     """Delete a maintenance log"""
     try:
-        from json_store import json_store
 
         # Check if log exists
         existing_log = json_store.find_by_id('maintenance_logs', log_id)
         if not existing_log:
-            return jsonify({'error': 'سجل الصيانة غير موجود'}), 404
+            return static_error('سجل الصيانة غير موجود', 404)
 
         success = json_store.delete('maintenance_logs', log_id)
         if not success:
@@ -6060,12 +7004,11 @@ def delete_maintenance_log(log_id):
 def get_driver_history(driver_id):
     """Get history for a specific driver"""
     try:
-        from json_store import json_store
 
         # Check if driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         history = json_store.filter_records('driver_history', {'driver_id': driver_id})
 
@@ -6082,14 +7025,11 @@ def get_driver_history(driver_id):
 def upload_driver_photo(driver_id):
     """Upload driver photo"""
     try:
-        from json_store import json_store
-        import os
-        from werkzeug.utils import secure_filename
         
         # Check if driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
             
         # Check if the post request has the file part
         if 'photo' not in request.files:
@@ -6159,19 +7099,17 @@ def upload_driver_photo(driver_id):
 def download_attachment(driver_id, history_id, filename):
     """Download attachment file"""
     try:
-        from json_store import json_store
-        import os
         from flask import send_file, abort
         
         # Check if driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
             
         # Check if history entry exists
         history = json_store.find_by_id('driver_history', history_id)
         if not history or history.get('driver_id') != driver_id:
-            return jsonify({'error': 'سجل السائق غير موجود'}), 404
+            return static_error('سجل السائق غير موجود', 404)
             
         # Check if attachment exists in history
         attachments = history.get('attachments', [])
@@ -6203,14 +7141,11 @@ def download_attachment(driver_id, history_id, filename):
 def create_driver_history_with_files(driver_id):
     """Create a new driver history entry with file attachments"""
     try:
-        from json_store import json_store
-        import os
-        from werkzeug.utils import secure_filename
         
         # Check if driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
             
         # Get form data
         title = request.form.get('title', '').strip()
@@ -6273,17 +7208,16 @@ def create_driver_history_with_files(driver_id):
 def update_driver_history(driver_id, history_id):
     """Update a driver history entry"""
     try:
-        from json_store import json_store
 
         # Check if driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # Check if history entry exists
         history_entry = json_store.find_by_id('driver_history', history_id)
         if not history_entry:
-            return jsonify({'error': 'سجل السائق غير موجود'}), 404
+            return static_error('سجل السائق غير موجود', 404)
 
         # Verify the history belongs to the driver
         if history_entry.get('driver_id') != driver_id:
@@ -6320,18 +7254,16 @@ def update_driver_history(driver_id, history_id):
 def delete_driver_history(driver_id, history_id):
     """Delete a driver history entry"""
     try:
-        from json_store import json_store
-        import os
 
         # Check if driver exists
         driver = json_store.find_by_id('drivers', driver_id)
         if not driver:
-            return jsonify({'error': 'السائق غير موجود'}), 404
+            return static_error('السائق غير موجود', 404)
 
         # Check if history entry exists
         history_entry = json_store.find_by_id('driver_history', history_id)
         if not history_entry:
-            return jsonify({'error': 'سجل السائق غير موجود'}), 404
+            return static_error('سجل السائق غير موجود', 404)
 
         # Verify the history belongs to the driver
         if history_entry.get('driver_id') != driver_id:
@@ -6347,7 +7279,7 @@ def delete_driver_history(driver_id, history_id):
                 if os.path.exists(file_path):
                     os.remove(file_path)
             except Exception as e:
-                print(f"Warning: Could not delete attachment file: {e}")
+                logger.warning("Could not delete attachment file: %s", e)
 
         # Delete the history entry
         json_store.delete('driver_history', history_id)
@@ -6374,8 +7306,8 @@ def run_cleanup():
         }
 
         # Run cleanup operations
-        results['temp_files_cleaned'] = DocumentsCleanupManager.cleanup_temp_files()
-        results['orphaned_files_removed'] = DocumentsCleanupManager.cleanup_orphaned_files()
+        results['temp_files_cleaned'] = cleanup_temp_files()
+        results['orphaned_files_removed'] = cleanup_orphaned_files()
 
         # Log cleanup action
         log_action('admin', 'system_cleanup', None, results)
@@ -6387,7 +7319,7 @@ def run_cleanup():
         })
 
     except Exception as e:
-        return DocumentsErrorHandler.handle_error('server_error', str(e))
+        return handle_error('server_error', str(e))
 
 @app.route('/api/admin/performance', methods=['GET'])
 @login_required
@@ -6403,6 +7335,34 @@ def get_performance_stats():
             'timestamp': datetime.now().isoformat()
         }
 
+        # One scandir walk per entity directory: each entry carries its
+        # stat result, and the resulting size map serves both the
+        # directory totals and the per-document size lookups, instead of
+        # an os.walk plus an exists/getsize stat pair per file
+        file_sizes = {}
+        for entity_type in ['drivers', 'vehicles', 'other']:
+            # UPLOADS_DIR already ends in /documents; the old join added
+            # a second 'documents' level that never existed on disk
+            entity_dir = os.path.join(UPLOADS_DIR, entity_type)
+            if not os.path.isdir(entity_dir):
+                continue
+
+            dir_size = 0
+            stack = [entity_dir]
+            while stack:
+                try:
+                    with os.scandir(stack.pop()) as it:
+                        for entry in it:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                size = entry.stat().st_size
+                                file_sizes[os.path.abspath(entry.path)] = size
+                                dir_size += size
+                except OSError:
+                    continue
+            stats['upload_directories'][entity_type] = dir_size
+
         # Count documents and calculate sizes
         for entity_type in ['drivers', 'vehicles', 'other']:
             entity_docs_file = os.path.join(DATA_DIR, f'{entity_type}_documents.json')
@@ -6412,19 +7372,11 @@ def get_performance_stats():
                     stats['documents_by_type'][entity_type] = len(entity_docs)
                     stats['total_documents'] += len(entity_docs)
 
-                    # Calculate total file size
+                    # Calculate total file size from the walk's size map
                     for doc in entity_docs:
                         file_path = get_storage_path(entity_type, doc.get('entity_id'), doc.get('stored_filename'))
-                        if file_path and os.path.exists(file_path):
-                            stats['total_file_size'] += os.path.getsize(file_path)
-
-            # Check directory sizes
-            entity_dir = os.path.join(UPLOADS_DIR, 'documents', entity_type)
-            if os.path.exists(entity_dir):
-                dir_size = sum(os.path.getsize(os.path.join(dirpath, filename))
-                              for dirpath, dirnames, filenames in os.walk(entity_dir)
-                              for filename in filenames)
-                stats['upload_directories'][entity_type] = dir_size
+                        if file_path:
+                            stats['total_file_size'] += file_sizes.get(os.path.abspath(file_path), 0)
 
         # Format file sizes for display
         stats['total_file_size_formatted'] = format_file_size(stats['total_file_size'])
@@ -6435,7 +7387,7 @@ def get_performance_stats():
         })
 
     except Exception as e:
-        return DocumentsErrorHandler.handle_error('server_error', str(e))
+        return handle_error('server_error', str(e))
 
 def format_file_size(size_bytes):
     """Format file size in human readable format"""
@@ -6460,8 +7412,8 @@ if __name__ == '__main__':
     port = int(os.getenv('FLASK_PORT', '1111'))
 
     if debug_mode:
-        print("[WARN] WARNING: Debug mode is enabled. Do not use in production!")
+        logger.warning("WARNING: Debug mode is enabled. Do not use in production!")
     else:
-        print("[OK] Production mode: Debug disabled")
+        logger.info("Production mode: Debug disabled")
 
     app.run(debug=debug_mode, host=host, port=port)
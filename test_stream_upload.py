@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Streaming Document Upload Endpoint
+Covers /api/documents/stream-upload: metadata headers, content-based
+MIME validation and cleanup of rejected payloads
+"""
+
+import os
+import sys
+from urllib.parse import quote
+
+sys.path.append('.')
+sys.path.append('utils')
+
+from app import app, get_document_file_path
+from json_store import json_store
+
+
+def setup_test_session(sess):
+    """Setup authenticated session for testing"""
+    sess['is_authenticated'] = True
+    sess['user_id'] = 'admin'
+    sess['username'] = 'admin'
+    sess['login_time'] = '2025-09-03T08:00:00'
+
+
+def create_test_pdf_content():
+    """Create test PDF content"""
+    return b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\nxref\n0 2\n0000000000 65535 f \ntrailer\n<< /Size 2 /Root 1 0 R >>\nstartxref\n50\n%%EOF'
+
+
+def create_test_png_content():
+    """Create test PNG content (magic bytes + minimal chunk data)"""
+    return b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def stream_headers(csrf_token, filename, display_name):
+    """Build the metadata headers the stream endpoint expects"""
+    return {
+        'X-CSRFToken': csrf_token,
+        'X-Filename': quote(filename),
+        'X-Entity-Type': 'driver',
+        'X-Entity-Id': 'd002',
+        'X-Display-Name': quote(display_name),
+        'X-Category': 'license',
+        'X-Notes': quote('Stream upload test'),
+    }
+
+
+def cleanup_document(doc_id):
+    """Remove the uploaded test document record and its stored file"""
+    document = json_store.find_by_id('documents', doc_id)
+    if document:
+        file_path = get_document_file_path(document)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        json_store.delete('documents', doc_id)
+
+
+def test_stream_upload_endpoint():
+    """Valid PDF streams through and a mismatched payload is rejected"""
+    print("\n=== Testing Stream Upload Endpoint ===")
+
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            setup_test_session(sess)
+
+        csrf_response = client.get('/api/csrf-token')
+        assert csrf_response.status_code == 200
+        csrf_token = csrf_response.get_json().get('csrf_token')
+        assert csrf_token
+
+        # Valid PDF content under a .pdf name is accepted
+        response = client.post(
+            '/api/documents/stream-upload',
+            data=create_test_pdf_content(),
+            headers=stream_headers(csrf_token, 'stream_test.pdf', 'Stream Upload Test')
+        )
+        print(f"Valid upload status: {response.status_code}")
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result.get('success') is True
+        doc_id = result.get('document', {}).get('id')
+        assert doc_id
+
+        try:
+            document = json_store.find_by_id('documents', doc_id)
+            assert document is not None
+            file_path = get_document_file_path(document)
+            assert file_path and os.path.exists(file_path)
+        finally:
+            cleanup_document(doc_id)
+
+
+def test_stream_upload_rejects_mismatched_content():
+    """PNG bytes under a .pdf name fail the content MIME check"""
+    print("\n=== Testing Stream Upload Content Validation ===")
+
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            setup_test_session(sess)
+
+        csrf_response = client.get('/api/csrf-token')
+        assert csrf_response.status_code == 200
+        csrf_token = csrf_response.get_json().get('csrf_token')
+
+        documents_before = len(json_store.read_all('documents'))
+
+        response = client.post(
+            '/api/documents/stream-upload',
+            data=create_test_png_content(),
+            headers=stream_headers(csrf_token, 'fake_pdf.pdf', 'Mismatched Content Test')
+        )
+        print(f"Mismatched upload status: {response.status_code}")
+        assert response.status_code == 400
+        error = response.get_json().get('error', '')
+        print(f"Rejection error: {error}")
+        assert 'PDF' in error
+
+        # No record and no stray file may survive a rejected upload
+        assert len(json_store.read_all('documents')) == documents_before
+
+
+def main():
+    """Run stream upload tests"""
+    print("Starting Stream Upload Test")
+    print("=" * 40)
+
+    test_stream_upload_endpoint()
+    test_stream_upload_rejects_mismatched_content()
+
+    print("\nStream Upload Test Complete")
+
+
+if __name__ == '__main__':
+    main()
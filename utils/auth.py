@@ -7,9 +7,10 @@ Authentication Logic
 
 import json
 import os
+import time
 import bcrypt
 from functools import wraps
-from flask import session, request, jsonify
+from flask import session, request, jsonify, redirect, url_for, current_app
 from datetime import datetime, timedelta
 
 class AuthManager:
@@ -155,12 +156,47 @@ class AuthManager:
 # Global instance
 auth_manager = AuthManager()
 
+def check_session_timeout():
+    """Check inactivity timeout for the current authenticated session
+
+    Returns an error response if the session has expired, otherwise
+    refreshes the last-activity timestamp and returns None. Runs only on
+    protected routes so static files and health checks skip it entirely.
+    """
+    last_activity = session.get('last_activity')
+    if last_activity:
+        # Sessions created before the epoch-float change stored ISO strings
+        if isinstance(last_activity, str):
+            last_activity = datetime.fromisoformat(last_activity).timestamp()
+
+        if time.time() - last_activity > current_app.config['PERMANENT_SESSION_LIFETIME']:
+            # Session expired
+            session.clear()
+            if request.is_json:
+                return jsonify({
+                    'success': False,
+                    'error': 'انتهت صلاحية الجلسة. يرجى تسجيل الدخول مرة أخرى.',
+                    'session_expired': True
+                }), 401
+            else:
+                return redirect(url_for('index'))
+
+    # Update last activity time
+    session['last_activity'] = time.time()
+    session.permanent = True
+    return None
+
 def login_required(f):
     """Decorator to require authentication for routes"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not auth_manager.is_authenticated():
             return jsonify({'error': 'يجب تسجيل الدخول أولاً'}), 401
+
+        timeout_response = check_session_timeout()
+        if timeout_response is not None:
+            return timeout_response
+
         return f(*args, **kwargs)
     return decorated_function
 
@@ -170,10 +206,14 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not auth_manager.is_authenticated():
             return jsonify({'error': 'يجب تسجيل الدخول أولاً'}), 401
-        
+
+        timeout_response = check_session_timeout()
+        if timeout_response is not None:
+            return timeout_response
+
         user = auth_manager.get_current_user()
         if not user or user.get('user_id') != 'admin':
             return jsonify({'error': 'صلاحيات المدير مطلوبة'}), 403
-        
+
         return f(*args, **kwargs)
     return decorated_function
@@ -178,8 +178,9 @@ class CommissionCalculator:
         try:
             from json_store import json_store
 
-            # Get commission data from monthly_orders table (commission matrix)
-            monthly_orders = json_store.read_all('monthly_orders')
+            # Get commission data from the year's monthly_orders shard
+            # (commission matrix)
+            monthly_orders = json_store.read_shard('monthly_orders', year)
             total_commission = 0
             total_orders = 0
             commission_details = []
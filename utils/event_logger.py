@@ -1,51 +1,144 @@
 """
 Event Logging System for Emar Delivery Management
 Logs key user actions with timestamps for audit and monitoring
+
+Events are stored in SQLite (data/events.sqlite3) with indexes on
+timestamp, entity type, action and user, so recent-event queries are
+indexed seeks instead of full-file JSON parses. An existing
+event_log.json is imported once on first start and kept only as the
+legacy export format.
 """
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from json_store import json_store
 
 
 class EventLogger:
-    """Lightweight event logging system"""
-    
-    def __init__(self, log_file: str = None):
+    """Lightweight event logging system backed by SQLite"""
+
+    def __init__(self, db_file: str = None, log_file: str = None):
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+        if db_file is None:
+            self.db_file = os.path.join(data_dir, 'events.sqlite3')
+        else:
+            self.db_file = db_file
+
+        # Legacy JSON log location, used only for one-time migration
         if log_file is None:
-            self.log_file = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), 
-                'data', 
-                'event_log.json'
-            )
+            self.log_file = os.path.join(data_dir, 'event_log.json')
         else:
             self.log_file = log_file
-        
-        # Ensure log file exists
-        if not os.path.exists(self.log_file):
-            self._initialize_log_file()
-    
-    def _initialize_log_file(self):
-        """Initialize empty log file"""
+
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._initialize_db()
+        self._migrate_json_log()
+
+    def _initialize_db(self):
+        """Create the events table and query indexes"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id TEXT,
+                    ts REAL,
+                    action TEXT,
+                    entity_type TEXT,
+                    entity_id TEXT,
+                    user TEXT,
+                    ip_address TEXT,
+                    session_id TEXT,
+                    details TEXT
+                )
+                """
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_events_ts ON events(ts DESC)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_events_entity ON events(entity_type)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_events_action ON events(action)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_events_user ON events(user)')
+
+    def _migrate_json_log(self):
+        """Import events from the legacy JSON log on first start"""
         try:
-            os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+            with self._lock:
+                count = self._conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+            if count > 0 or not os.path.exists(self.log_file):
+                return
+
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+            if not isinstance(logs, list) or not logs:
+                return
+
+            rows = []
+            for log in logs:
+                try:
+                    ts = datetime.fromisoformat(log.get('timestamp', '')).timestamp()
+                except ValueError:
+                    continue
+                # Some legacy rows carry non-scalar values; coerce for SQLite
+                def coerce(value):
+                    if value is None or isinstance(value, (str, int, float)):
+                        return value
+                    return json.dumps(value, ensure_ascii=False)
+
+                rows.append((
+                    coerce(log.get('id')),
+                    ts,
+                    coerce(log.get('action')),
+                    coerce(log.get('entity_type')),
+                    coerce(log.get('entity_id')),
+                    coerce(log.get('user')),
+                    coerce(log.get('ip_address')),
+                    coerce(log.get('session_id')),
+                    json.dumps(log.get('details') or {}, ensure_ascii=False)
+                ))
+
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    'INSERT INTO events VALUES (?,?,?,?,?,?,?,?,?)', rows
+                )
+            print(f"[SUCCESS] Migrated {len(rows)} events from event_log.json to SQLite")
         except Exception as e:
-            print(f"Error initializing log file: {e}")
-    
-    def log_event(self, 
-                  action: str, 
-                  entity_type: str = None, 
-                  entity_id: str = None, 
-                  user: str = "admin", 
+            print(f"Error migrating event log: {e}")
+
+    @staticmethod
+    def _row_to_event(row) -> Dict:
+        """Convert a database row back to the event dict shape"""
+        try:
+            details = json.loads(row[8]) if row[8] else {}
+        except (TypeError, ValueError):
+            details = {}
+        return {
+            'id': row[0],
+            'timestamp': datetime.fromtimestamp(row[1]).isoformat(),
+            'action': row[2],
+            'entity_type': row[3],
+            'entity_id': row[4],
+            'user': row[5],
+            'ip_address': row[6],
+            'details': details,
+            'session_id': row[7]
+        }
+
+    def log_event(self,
+                  action: str,
+                  entity_type: str = None,
+                  entity_id: str = None,
+                  user: str = "admin",
                   details: Dict[str, Any] = None,
                   ip_address: str = None) -> bool:
         """
         Log an event
-        
+
         Args:
             action: Action performed (e.g., 'create', 'update', 'delete', 'view')
             entity_type: Type of entity (e.g., 'driver', 'vehicle', 'order', 'advance')
@@ -53,205 +146,152 @@ class EventLogger:
             user: Username performing the action
             details: Additional details about the action
             ip_address: IP address of the user
-        
+
         Returns:
             bool: True if logged successfully
         """
         try:
-            event = {
-                'id': self._generate_event_id(),
-                'timestamp': datetime.now().isoformat(),
-                'action': action,
-                'entity_type': entity_type,
-                'entity_id': entity_id,
-                'user': user,
-                'ip_address': ip_address,
-                'details': details or {},
-                'session_id': self._get_session_id()
-            }
-            
-            # Read existing logs
-            logs = self._read_logs()
-            
-            # Add new event
-            logs.append(event)
-            
-            # Keep only last 10000 events to prevent file from growing too large
-            if len(logs) > 10000:
-                logs = logs[-10000:]
-            
-            # Write back to file
-            return self._write_logs(logs)
-            
+            row = (
+                self._generate_event_id(),
+                datetime.now().timestamp(),
+                action,
+                entity_type,
+                entity_id,
+                user,
+                ip_address,
+                self._get_session_id(),
+                json.dumps(details or {}, ensure_ascii=False)
+            )
+            with self._lock, self._conn:
+                self._conn.execute('INSERT INTO events VALUES (?,?,?,?,?,?,?,?,?)', row)
+            return True
+
         except Exception as e:
             print(f"Error logging event: {e}")
             return False
-    
+
     def _generate_event_id(self) -> str:
         """Generate unique event ID"""
         import uuid
-        return str(uuid.uuid4())[:8]
-    
+        return uuid.uuid4().hex[:8]
+
     def _get_session_id(self) -> str:
         """Get current session ID (simplified)"""
         return "web_session"
-    
-    def _read_logs(self) -> List[Dict]:
-        """Read logs from file"""
-        try:
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-    
-    def _write_logs(self, logs: List[Dict]) -> bool:
-        """Write logs to file"""
-        try:
-            # Create backup before writing
-            json_store._create_daily_backup(self.log_file)
-            
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error writing logs: {e}")
-            return False
-    
-    def get_recent_events(self, limit: int = 50, 
+
+    def get_recent_events(self, limit: int = 50,
                          entity_type: str = None,
                          action: str = None,
                          user: str = None) -> List[Dict]:
         """
         Get recent events with optional filtering
-        
+
         Args:
             limit: Maximum number of events to return
             entity_type: Filter by entity type
             action: Filter by action
             user: Filter by user
-        
+
         Returns:
-            List of events
+            List of events (newest first)
         """
         try:
-            logs = self._read_logs()
-            
-            # Apply filters
+            query = 'SELECT * FROM events'
+            conditions = []
+            params = []
+
             if entity_type:
-                logs = [log for log in logs if log.get('entity_type') == entity_type]
+                conditions.append('entity_type = ?')
+                params.append(entity_type)
             if action:
-                logs = [log for log in logs if log.get('action') == action]
+                conditions.append('action = ?')
+                params.append(action)
             if user:
-                logs = [log for log in logs if log.get('user') == user]
-            
-            # Sort by timestamp (newest first) and limit
-            logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            return logs[:limit]
-            
+                conditions.append('user = ?')
+                params.append(user)
+
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            query += ' ORDER BY ts DESC LIMIT ?'
+            params.append(limit)
+
+            with self._lock:
+                rows = self._conn.execute(query, params).fetchall()
+            return [self._row_to_event(row) for row in rows]
+
         except Exception as e:
             print(f"Error getting recent events: {e}")
             return []
-    
+
     def get_event_stats(self, days: int = 7) -> Dict[str, Any]:
         """
         Get event statistics for the last N days
-        
+
         Args:
             days: Number of days to analyze
-        
+
         Returns:
             Dictionary with statistics
         """
         try:
             from datetime import timedelta
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            logs = self._read_logs()
-            
-            # Filter events within date range
-            recent_logs = []
-            for log in logs:
-                try:
-                    event_date = datetime.fromisoformat(log.get('timestamp', ''))
-                    if event_date >= cutoff_date:
-                        recent_logs.append(log)
-                except ValueError:
-                    continue
-            
+
+            cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT action, entity_type, user, ts FROM events WHERE ts >= ?',
+                    (cutoff,)
+                ).fetchall()
+
             # Calculate statistics
             stats = {
-                'total_events': len(recent_logs),
+                'total_events': len(rows),
                 'actions': {},
                 'entity_types': {},
                 'users': {},
                 'daily_counts': {},
                 'period_days': days
             }
-            
-            for log in recent_logs:
-                # Count by action
-                action = log.get('action', 'unknown')
+
+            for action, entity_type, user, ts in rows:
+                action = action or 'unknown'
                 stats['actions'][action] = stats['actions'].get(action, 0) + 1
-                
-                # Count by entity type
-                entity_type = log.get('entity_type', 'unknown')
+
+                entity_type = entity_type or 'unknown'
                 stats['entity_types'][entity_type] = stats['entity_types'].get(entity_type, 0) + 1
-                
-                # Count by user
-                user = log.get('user', 'unknown')
+
+                user = user or 'unknown'
                 stats['users'][user] = stats['users'].get(user, 0) + 1
-                
-                # Count by day
-                try:
-                    event_date = datetime.fromisoformat(log.get('timestamp', ''))
-                    day_key = event_date.strftime('%Y-%m-%d')
-                    stats['daily_counts'][day_key] = stats['daily_counts'].get(day_key, 0) + 1
-                except ValueError:
-                    continue
-            
+
+                day_key = datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
+                stats['daily_counts'][day_key] = stats['daily_counts'].get(day_key, 0) + 1
+
             return stats
-            
+
         except Exception as e:
             print(f"Error getting event stats: {e}")
             return {'total_events': 0, 'actions': {}, 'entity_types': {}, 'users': {}, 'daily_counts': {}, 'period_days': days}
-    
+
     def clear_old_events(self, days_to_keep: int = 90) -> int:
         """
         Clear events older than specified days
-        
+
         Args:
             days_to_keep: Number of days to keep
-        
+
         Returns:
             Number of events removed
         """
         try:
             from datetime import timedelta
-            
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-            logs = self._read_logs()
-            
-            # Filter events to keep
-            filtered_logs = []
-            removed_count = 0
-            
-            for log in logs:
-                try:
-                    event_date = datetime.fromisoformat(log.get('timestamp', ''))
-                    if event_date >= cutoff_date:
-                        filtered_logs.append(log)
-                    else:
-                        removed_count += 1
-                except ValueError:
-                    # Keep events with invalid timestamps
-                    filtered_logs.append(log)
-            
-            # Write filtered logs back
-            if removed_count > 0:
-                self._write_logs(filtered_logs)
-            
-            return removed_count
-            
+
+            cutoff = (datetime.now() - timedelta(days=days_to_keep)).timestamp()
+
+            with self._lock, self._conn:
+                cursor = self._conn.execute('DELETE FROM events WHERE ts < ?', (cutoff,))
+            return cursor.rowcount
+
         except Exception as e:
             print(f"Error clearing old events: {e}")
             return 0
@@ -7,9 +7,12 @@ JSON Storage Utility with File Locking
 
 import json
 import os
+import sqlite3
+import tempfile
 import time
 import platform
 import shutil
+import orjson
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import uuid
@@ -47,6 +50,11 @@ class JSONStore:
             os.makedirs(self.data_dir)
         if not os.path.exists(self.backup_root):
             os.makedirs(self.backup_root)
+
+        # Per-collection {id: record} maps keyed by file mtime+size, so
+        # ID lookups skip the linear scan; any write (ours or external)
+        # changes the stat key and triggers a rebuild
+        self._id_index: Dict[str, tuple] = {}
     
     def _get_file_path(self, filename: str) -> str:
         """Get full path for data file"""
@@ -64,7 +72,9 @@ class JSONStore:
 
         for attempt in range(max_retries):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
+                # Binary mode: orjson parses UTF-8 bytes directly, skipping
+                # the text-layer decode that json.load goes through
+                with open(file_path, 'rb') as f:
                     if HAS_FCNTL:
                         fcntl.flock(f.fileno(), fcntl.LOCK_SH)  # Shared lock for reading
                     elif platform.system() == 'Windows':
@@ -79,9 +89,9 @@ class JSONStore:
                             raise
 
                     try:
-                        data = json.load(f)
+                        data = orjson.loads(f.read())
                         return data if isinstance(data, list) else []
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         return []
                     finally:
                         if HAS_FCNTL:
@@ -99,29 +109,42 @@ class JSONStore:
                 # For Windows, if locking fails, try without locking
                 if platform.system() == 'Windows':
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
+                        with open(file_path, 'rb') as f:
+                            data = orjson.loads(f.read())
                             return data if isinstance(data, list) else []
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         return []
                 raise e
 
         return []
     
     def _write_with_lock(self, file_path: str, data: List[Dict]) -> bool:
-        """Write JSON file with file locking"""
+        """Write JSON file atomically with file locking
+
+        The payload lands in a temporary file next to the target and is
+        moved over it with os.replace, so the live inode is never
+        truncated in place: readers always see either the old or the new
+        complete file, and hardlink snapshots of the previous contents
+        (e.g. the backup taken before clear-all-data) stay intact. The
+        exclusive lock is held on the destination only to serialize
+        concurrent writers.
+        """
         max_retries = 5
         retry_delay = 0.1
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 
         for attempt in range(max_retries):
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
+                # Append mode creates a missing file without truncating an
+                # existing one; the handle is used purely as a lock anchor
+                with open(file_path, 'ab') as lock_file:
                     if HAS_FCNTL:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # Exclusive lock for writing
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)  # Exclusive lock for writing
                     elif platform.system() == 'Windows':
                         # Windows file locking
                         try:
-                            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                            lock_file.seek(0)
+                            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
                         except IOError:
                             # File is locked, retry
                             if attempt < max_retries - 1:
@@ -130,16 +153,14 @@ class JSONStore:
                             raise
 
                     try:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                        f.flush()
-                        os.fsync(f.fileno())  # Force write to disk
+                        self._replace_with_payload(file_path, payload)
                         return True
                     finally:
                         if HAS_FCNTL:
-                            fcntl.flock(f.fileno(), fcntl.LOCK_UN)  # Unlock
+                            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)  # Unlock
                         elif platform.system() == 'Windows':
                             try:
-                                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
                             except IOError:
                                 pass  # Ignore unlock errors
 
@@ -150,17 +171,35 @@ class JSONStore:
                 # For Windows, if locking fails, try without locking
                 if platform.system() == 'Windows':
                     try:
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            json.dump(data, f, ensure_ascii=False, indent=2)
-                            f.flush()
-                            os.fsync(f.fileno())
-                            return True
+                        self._replace_with_payload(file_path, payload)
+                        return True
                     except Exception:
                         pass
                 raise e
 
         return False
 
+    @staticmethod
+    def _replace_with_payload(file_path: str, payload: bytes) -> None:
+        """Write payload to a temp file and atomically move it over target"""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(file_path) or '.',
+            prefix=os.path.basename(file_path) + '.',
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())  # Force write to disk
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
     def _create_daily_backup(self, file_path: str) -> bool:
         """Create daily backup of a JSON file"""
         try:
@@ -223,6 +262,22 @@ class JSONStore:
                     shutil.copy2(source_path, dest_path)
                     backup_count += 1
 
+            # The event history lives in SQLite; snapshot it through the
+            # sqlite3 backup API so a hot WAL database still yields a
+            # consistent copy (a plain file copy would not)
+            db_path = os.path.join(self.data_dir, 'events.sqlite3')
+            if os.path.exists(db_path):
+                source_db = sqlite3.connect(db_path)
+                try:
+                    backup_db = sqlite3.connect(os.path.join(backup_dir, 'events.sqlite3'))
+                    try:
+                        source_db.backup(backup_db)
+                    finally:
+                        backup_db.close()
+                finally:
+                    source_db.close()
+                backup_count += 1
+
             print(f"[SUCCESS] Full backup created: {backup_dir} ({backup_count} files)")
             return backup_dir
         except Exception as e:
@@ -233,15 +288,82 @@ class JSONStore:
         """Read all records from a collection"""
         file_path = self._get_file_path(collection)
         return self._read_with_lock(file_path)
+
+    def write_all(self, collection: str, data: List[Dict]) -> bool:
+        """Replace a collection's contents with the given records"""
+        file_path = self._get_file_path(collection)
+
+        # Create daily backup before writing
+        self._create_daily_backup(file_path)
+
+        return self._write_with_lock(file_path, data)
+
+    def shard_collection(self, collection: str, year) -> str:
+        """Collection name of a per-year shard (e.g. monthly_orders_2025)"""
+        return f"{collection}_{year}"
+
+    def read_shard(self, collection: str, year) -> List[Dict]:
+        """Read all records from one year shard of a collection"""
+        return self.read_all(self.shard_collection(collection, year))
+
+    def list_shards(self, collection: str) -> List[int]:
+        """List the years that have a shard file for a collection"""
+        prefix = f"{collection}_"
+        years = []
+        for filename in os.listdir(self.data_dir):
+            if filename.startswith(prefix) and filename.endswith('.json'):
+                suffix = filename[len(prefix):-5]
+                if suffix.isdigit():
+                    years.append(int(suffix))
+        return sorted(years)
     
+    def _id_index_for(self, collection: str) -> Dict[str, Dict]:
+        """Get the {id: record} map for a collection, rebuilding if stale"""
+        file_path = self._get_file_path(collection)
+        try:
+            stat = os.stat(file_path)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stat_key = None
+
+        cached = self._id_index.get(collection)
+        if cached is None or cached[0] != stat_key:
+            index = {}
+            for record in self._read_with_lock(file_path):
+                record_id = record.get('id')
+                if record_id:
+                    index[record_id] = record
+            cached = (stat_key, index)
+            self._id_index[collection] = cached
+
+        return cached[1]
+
     def find_by_id(self, collection: str, record_id: str) -> Optional[Dict]:
-        """Find a record by ID"""
-        data = self.read_all(collection)
-        for record in data:
-            if record.get('id') == record_id:
-                return record
-        return None
-    
+        """Find a record by ID
+
+        Returns a top-level copy so callers that enrich the record (the
+        routes add display names before serializing) do not write into
+        the cached index. Nested lists/dicts are still shared - callers
+        that mutate those must copy them first.
+        """
+        record = self._id_index_for(collection).get(record_id)
+        return dict(record) if record is not None else None
+
+    def find_many_by_id(self, collection: str, record_ids: List[str]) -> Dict[str, Dict]:
+        """Find several records by ID in a single lookup pass
+
+        Returns:
+            Mapping of record ID to record for the IDs that exist; the
+            records are top-level copies, as in find_by_id
+        """
+        index = self._id_index_for(collection)
+        found = {}
+        for record_id in record_ids:
+            record = index.get(record_id)
+            if record is not None:
+                found[record_id] = dict(record)
+        return found
+
     def create(self, collection: str, record: Dict) -> Dict:
         """Create a new record"""
         file_path = self._get_file_path(collection)
@@ -253,7 +375,7 @@ class JSONStore:
 
         # Generate ID if not provided
         if 'id' not in record:
-            record['id'] = str(uuid.uuid4())[:8]
+            record['id'] = uuid.uuid4().hex[:8]
 
         # Add auto-incrementing row number if not provided
         if 'row_number' not in record:
@@ -308,6 +430,27 @@ class JSONStore:
             return self._write_with_lock(file_path, data)
 
         return False
+
+    def delete_many(self, collection: str, record_ids: List[str]) -> int:
+        """Delete several records by ID in one read/write cycle"""
+        if not record_ids:
+            return 0
+
+        file_path = self._get_file_path(collection)
+
+        # Create daily backup before writing
+        self._create_daily_backup(file_path)
+
+        data = self._read_with_lock(file_path)
+
+        wanted = set(record_ids)
+        remaining = [record for record in data if record.get('id') not in wanted]
+        removed = len(data) - len(remaining)
+
+        if removed and self._write_with_lock(file_path, remaining):
+            return removed
+
+        return 0
     
     def filter_records(self, collection: str, filters: Dict) -> List[Dict]:
         """Filter records by criteria"""
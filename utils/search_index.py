@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Global Search Index
+فهرس البحث الشامل
+
+Maintains a lowercase 2-gram inverted index over the searchable entity
+collections so global search resolves queries by intersecting small
+posting sets instead of scanning every record on each request.
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+from json_store import json_store
+
+# Searchable fields per collection (mirrors what global search exposes)
+ENTITY_FIELDS = {
+    'drivers': ('full_name', 'phone', 'national_id'),
+    'clients': ('company_name', 'contact_person', 'phone'),
+    'companies': ('name', 'contact_person', 'phone'),
+    'vehicles': ('license_plate', 'make', 'model'),
+}
+
+
+# Searchable fields for the document search endpoint
+DOCUMENT_FIELDS = {
+    'documents': ('display_name', 'original_filename', 'notes'),
+}
+
+
+class SearchIndex:
+    """2-gram inverted index with mtime-based invalidation"""
+
+    def __init__(self, entity_fields: Dict[str, tuple] = None):
+        self._entity_fields = dict(entity_fields or ENTITY_FIELDS)
+        self._mtimes = None
+        # bigram -> set of (collection, record_id)
+        self._ngram_index: Dict[str, set] = {}
+        # (collection, record_id) -> (record, searchable_text)
+        self._records: Dict[Tuple[str, str], Tuple[Dict, str]] = {}
+
+    def _collection_mtime(self, collection: str):
+        """Get mtime of a collection file (None if missing)"""
+        file_path = json_store._get_file_path(collection)
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _rebuild_if_stale(self) -> None:
+        """Rebuild the index when any indexed collection changed on disk"""
+        current = {name: self._collection_mtime(name) for name in self._entity_fields}
+        if current == self._mtimes:
+            return
+
+        ngram_index = {}
+        records = {}
+        for collection, fields in self._entity_fields.items():
+            for record in json_store.read_all(collection):
+                record_id = record.get('id')
+                if not record_id:
+                    continue
+                searchable_text = ' '.join(
+                    (record.get(field) or '').lower() for field in fields
+                )
+                key = (collection, record_id)
+                records[key] = (record, searchable_text)
+                for i in range(len(searchable_text) - 1):
+                    ngram_index.setdefault(searchable_text[i:i + 2], set()).add(key)
+
+        self._ngram_index = ngram_index
+        self._records = records
+        self._mtimes = current
+
+    def query(self, query: str) -> List[Tuple[str, Dict]]:
+        """Find records whose searchable text contains the query
+
+        Args:
+            query: Lowercase search string (2 characters minimum)
+
+        Returns:
+            List of (collection, record) tuples
+        """
+        self._rebuild_if_stale()
+
+        grams = {query[i:i + 2] for i in range(len(query) - 1)}
+        if not grams:
+            return []
+
+        postings = []
+        for gram in grams:
+            posting = self._ngram_index.get(gram)
+            if not posting:
+                # A missing bigram means no record can contain the query
+                return []
+            postings.append(posting)
+
+        # Intersect starting from the smallest posting set
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        results = []
+        for key in candidates:
+            record, searchable_text = self._records[key]
+            # Safety filter: bigram intersection can over-match across gaps
+            if query in searchable_text:
+                results.append((key[0], record))
+
+        return results
+
+
+# Global instances
+search_index = SearchIndex()
+document_search_index = SearchIndex(DOCUMENT_FIELDS)